@@ -0,0 +1,306 @@
+# Main/Benchmark/bench.py
+# -*- coding: utf-8 -*-
+#
+# Benchmarks do pipeline sobre um corpus sintético (Benchmark/corpus.py).
+# Rode a partir de Bot_/Main:
+#
+#   python -m Benchmark.bench                          # mede e grava Benchmark/resultados.json
+#   python -m Benchmark.bench --salvar-baseline        # mede e grava como baseline
+#   python -m Benchmark.bench --arquivos 2000 --casos lote
+#   python -m Benchmark.bench --casos inicio            # só a abertura da GUI
+#
+# Cada caso mede vazão (itens/s e MB/s de entrada) e latência por item
+# (p50/p90/p99/máx). Com uma baseline gravada, os resultados são comparados a
+# ela e o comando sai com código 1 se algum caso piorar além da tolerância.
+# O caso "inicio" mede a abertura da GUI em processos novos (Benchmark/startup.py)
+# e também acusa regressão se algum módulo pesado passar a ser carregado antes
+# de a janela aparecer.
+
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import subprocess
+import argparse
+import tempfile
+from datetime import datetime
+
+import markdown2
+
+from config import PARSER_BACKEND, BATCH_MODE, IMG_PADRAO_EORBIS, IMG_PADRAO_METAPRIME
+from Transformer.transformerFile import transformar_html
+from Transformer.markdownConverter import markdown_para_html
+from Transformer.parserBackend import resolver_backend
+from Transformer.imageResolver import ResolvedorImagens
+from Pipeline.batchProcessor import processar_lote
+from Pipeline.runReport import percentil
+from Preview.previewCache import renderizar_preview
+from Benchmark.corpus import gerar_corpus
+
+FORMATO_RESULTADOS = 1
+PASTA_BENCHMARK = os.path.dirname(os.path.abspath(__file__))
+BASELINE_PADRAO = os.path.join(PASTA_BENCHMARK, "baseline.json")
+RESULTADOS_PADRAO = os.path.join(PASTA_BENCHMARK, "resultados.json")
+CASOS = ("markdown", "transformer", "lote", "preview", "inicio")
+INICIO_EXECUCOES_MIN = 5
+VERSAO_BENCH = "0.0.0-bench"
+
+
+def _resumo(latencias, total, n, bytes_entrada):
+    ordenadas = sorted(latencias)
+    return {
+        "n": n,
+        "total_s": total,
+        "por_segundo": n / total if total > 0 else None,
+        "mb_por_segundo": bytes_entrada / (1024 * 1024) / total if total > 0 else None,
+        "latencia_ms": {
+            **{f"p{p}": percentil(ordenadas, p) * 1000 for p in (50, 90, 99)},
+            "max": (ordenadas[-1] * 1000) if ordenadas else 0.0,
+        },
+    }
+
+
+def _medir_itens(func, itens, repeticoes, bytes_entrada):
+    """Chama func(item) para cada item, `repeticoes` vezes; vale a repetição de tempo mediano."""
+    rodadas = []
+    for _ in range(repeticoes):
+        latencias = []
+        inicio = time.perf_counter()
+        for item in itens:
+            t0 = time.perf_counter()
+            func(item)
+            latencias.append(time.perf_counter() - t0)
+        rodadas.append((time.perf_counter() - inicio, latencias))
+    total, latencias = sorted(rodadas, key=lambda r: r[0])[len(rodadas) // 2]
+    return _resumo(latencias, total, len(itens), bytes_entrada)
+
+
+def caso_markdown(ctx):
+    return _medir_itens(markdown_para_html,
+                        ctx["markdowns"], ctx["repeticoes"], ctx["bytes"])
+
+
+def caso_transformer(ctx):
+    htmls = ctx.setdefault("htmls", [markdown_para_html(md) for md in ctx["markdowns"]])
+    return _medir_itens(lambda h: transformar_html(h, VERSAO_BENCH, IMG_PADRAO_EORBIS, IMG_PADRAO_METAPRIME),
+                        htmls, ctx["repeticoes"], ctx["bytes"])
+
+
+def caso_preview(ctx):
+    resolvedor = ResolvedorImagens(pastas=[])  # sem imagens locais: resultado não depende da máquina
+    return _medir_itens(lambda path: renderizar_preview(path, resolvedor),
+                        ctx["arquivos"], ctx["repeticoes"], ctx["bytes"])
+
+
+def caso_lote(ctx):
+    """Pipeline completo (leitura, conversão, gravação) com processar_lote, sem manifesto."""
+    rodadas = []
+    for _ in range(ctx["repeticoes"]):
+        saida = tempfile.mkdtemp(prefix="eorbis-bench-")
+        latencias = []
+        try:
+            inicio = time.perf_counter()
+            processar_lote(ctx["arquivos"], saida, VERSAO_BENCH, IMG_PADRAO_EORBIS, IMG_PADRAO_METAPRIME,
+                           modo=ctx["modo"], workers=ctx["workers"], raizes=ctx["raizes"],
+                           on_result=lambda r: latencias.append(r["duracao"]))
+            rodadas.append((time.perf_counter() - inicio, latencias))
+        finally:
+            shutil.rmtree(saida, ignore_errors=True)
+    total, latencias = sorted(rodadas, key=lambda r: r[0])[len(rodadas) // 2]
+    resumo = _resumo(latencias, total, len(ctx["arquivos"]), ctx["bytes"])
+    resumo.update(modo=ctx["modo"], workers=ctx["workers"])
+    return resumo
+
+
+def caso_inicio(ctx):
+    """
+    Abertura da GUI (python -m Benchmark.startup) em processos novos; a
+    latência de cada execução vai do spawn até a janela pronta para uso
+    (ou até `import main`, sem display).
+    """
+    pasta_main = os.path.dirname(PASTA_BENCHMARK)
+    execucoes = max(INICIO_EXECUCOES_MIN, ctx["repeticoes"])
+    medidas = []
+    inicio = time.perf_counter()
+    for _ in range(execucoes):
+        saida = subprocess.run([sys.executable, "-m", "Benchmark.startup", repr(time.time())],
+                               cwd=pasta_main, capture_output=True, text=True, check=True)
+        medidas.append(json.loads(saida.stdout.strip().splitlines()[-1]))
+    total = time.perf_counter() - inicio
+
+    resumo = _resumo([m["desde_spawn_s"] for m in medidas], total, execucoes, 0)
+    importacao = sorted(m["importacao_s"] for m in medidas)
+    resumo.update(
+        janela=all(m["janela"] for m in medidas),
+        importacao_ms={f"p{p}": percentil(importacao, p) * 1000 for p in (50, 90)},
+        modulos_pesados=sorted(set().union(*(m["modulos_pesados"] for m in medidas))),
+    )
+    return resumo
+
+
+FUNCOES_CASOS = {
+    "markdown": caso_markdown,
+    "transformer": caso_transformer,
+    "lote": caso_lote,
+    "preview": caso_preview,
+    "inicio": caso_inicio,
+}
+
+
+def _ambiente():
+    return {
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "cpus": os.cpu_count(),
+        "markdown2": getattr(markdown2, "__version__", None),
+        "parser_backend": resolver_backend(PARSER_BACKEND),
+    }
+
+
+def executar(casos, arquivos=200, secoes=8, semente=42, repeticoes=3, modo=None, workers=None, pasta_corpus=None):
+    """Gera o corpus, roda os casos pedidos e retorna o dicionário de resultados."""
+    temporaria = pasta_corpus is None
+    pasta_corpus = pasta_corpus or tempfile.mkdtemp(prefix="eorbis-corpus-")
+    try:
+        caminhos = gerar_corpus(pasta_corpus, arquivos=arquivos, secoes=secoes, semente=semente)
+        markdowns = []
+        for path in caminhos:
+            with open(path, "r", encoding="utf-8") as f:
+                markdowns.append(f.read())
+        ctx = {
+            "arquivos": caminhos,
+            "raizes": {path: pasta_corpus for path in caminhos},
+            "markdowns": markdowns,
+            "bytes": sum(os.path.getsize(p) for p in caminhos),
+            "repeticoes": max(1, repeticoes),
+            "modo": modo or BATCH_MODE,
+            "workers": workers,
+        }
+        resultados = {}
+        for caso in casos:
+            print(f"[INFO] Medindo {caso}…", file=sys.stderr)
+            resultados[caso] = FUNCOES_CASOS[caso](ctx)
+    finally:
+        if temporaria:
+            shutil.rmtree(pasta_corpus, ignore_errors=True)
+
+    return {
+        "formato": FORMATO_RESULTADOS,
+        "gerado_em": datetime.now().isoformat(timespec="seconds"),
+        "ambiente": _ambiente(),
+        "corpus": {"arquivos": arquivos, "secoes": secoes, "semente": semente, "bytes": ctx["bytes"],
+                   "repeticoes": ctx["repeticoes"]},
+        "casos": resultados,
+    }
+
+
+def comparar(atual, baseline, tolerancia):
+    """
+    Lista de (caso, métrica, base, atual, variação, regrediu). Vazão menor ou
+    p90 maior que a baseline em mais de `tolerancia` (fração) é regressão.
+    """
+    linhas = []
+    if baseline.get("corpus", {}).get("semente") != atual["corpus"]["semente"] or \
+            baseline.get("corpus", {}).get("arquivos") != atual["corpus"]["arquivos"]:
+        print("[WARN] A baseline foi medida com outro corpus; a comparação pode não ser justa.", file=sys.stderr)
+    for caso, medida in atual["casos"].items():
+        base = baseline.get("casos", {}).get(caso)
+        if not base:
+            continue
+        if base.get("por_segundo") and medida.get("por_segundo"):
+            variacao = medida["por_segundo"] / base["por_segundo"] - 1
+            linhas.append((caso, "itens/s", base["por_segundo"], medida["por_segundo"], variacao,
+                           variacao < -tolerancia))
+        base_p90, atual_p90 = base["latencia_ms"]["p90"], medida["latencia_ms"]["p90"]
+        if base_p90 > 0:
+            variacao = atual_p90 / base_p90 - 1
+            linhas.append((caso, "p90 ms", base_p90, atual_p90, variacao, variacao > tolerancia))
+        if "modulos_pesados" in medida:
+            # Um módulo pesado a mais na abertura da GUI é regressão, qualquer que seja o tempo
+            novos = set(medida["modulos_pesados"]) - set(base.get("modulos_pesados", ()))
+            for modulo in sorted(novos):
+                print(f"[WARN] {caso}: '{modulo}' agora é carregado antes de a janela aparecer.", file=sys.stderr)
+            base_n, atual_n = len(base.get("modulos_pesados", ())), len(medida["modulos_pesados"])
+            linhas.append((caso, "módulos", base_n, atual_n, (atual_n - base_n) / max(1, base_n), bool(novos)))
+    return linhas
+
+
+def _imprimir(resultados):
+    print(f"{'caso':<13}{'itens/s':>11}{'MB/s':>9}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'máx ms':>10}")
+    for caso, m in resultados["casos"].items():
+        lat = m["latencia_ms"]
+        print(f"{caso:<13}{m['por_segundo'] or 0:>11.1f}{m['mb_por_segundo'] or 0:>9.2f}"
+              f"{lat['p50']:>10.2f}{lat['p90']:>10.2f}{lat['p99']:>10.2f}{lat['max']:>10.2f}")
+    inicio = resultados["casos"].get("inicio")
+    if inicio:
+        alvo = "janela pronta" if inicio["janela"] else "import main (sem display)"
+        print(f"\ninicio: latência até {alvo}; import main p50 {inicio['importacao_ms']['p50']:.1f} ms; "
+              f"módulos pesados na abertura: {', '.join(inicio['modulos_pesados']) or 'nenhum'}")
+
+
+def _gravar(dados, path):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(dados, f, ensure_ascii=False, indent=1)
+
+
+def _criar_parser():
+    parser = argparse.ArgumentParser(prog="python -m Benchmark.bench",
+                                     description="Benchmarks do pipeline Markdown → HTML com corpus sintético.")
+    parser.add_argument("--casos", default=",".join(CASOS),
+                        help=f"Casos a medir, separados por vírgula (padrão: {','.join(CASOS)}).")
+    parser.add_argument("--arquivos", type=int, default=200, help="Quantidade de notas no corpus (padrão: 200).")
+    parser.add_argument("--secoes", type=int, default=8, help="Média de seções por nota (padrão: 8).")
+    parser.add_argument("--semente", type=int, default=42, help="Semente do gerador do corpus (padrão: 42).")
+    parser.add_argument("--repeticoes", type=int, default=3,
+                        help="Repetições de cada caso; vale a de tempo mediano (padrão: 3).")
+    parser.add_argument("--modo", choices=("processos", "threads", "sequencial"), default=None,
+                        help="Modo do caso 'lote' (padrão: config.BATCH_MODE).")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="Workers do caso 'lote'.")
+    parser.add_argument("--corpus", help="Gera (e mantém) o corpus nesta pasta em vez de uma pasta temporária.")
+    parser.add_argument("-o", "--saida", default=RESULTADOS_PADRAO, help="Arquivo JSON com os resultados.")
+    parser.add_argument("--baseline", default=BASELINE_PADRAO, help="Baseline para comparação.")
+    parser.add_argument("--salvar-baseline", action="store_true", help="Grava os resultados como nova baseline.")
+    parser.add_argument("--tolerancia", type=float, default=0.10,
+                        help="Piora aceita em relação à baseline, em fração (padrão: 0.10 = 10%%).")
+    return parser
+
+
+def main(argv=None):
+    args = _criar_parser().parse_args(argv)
+    casos = [c.strip() for c in args.casos.split(",") if c.strip()]
+    invalidos = [c for c in casos if c not in FUNCOES_CASOS]
+    if invalidos:
+        print(f"[ERRO] Caso(s) desconhecido(s): {', '.join(invalidos)}", file=sys.stderr)
+        return 2
+
+    resultados = executar(casos, args.arquivos, args.secoes, args.semente, args.repeticoes,
+                          args.modo, args.workers, args.corpus)
+    _imprimir(resultados)
+    _gravar(resultados, args.saida)
+    print(f"[INFO] Resultados gravados em {args.saida}")
+
+    if args.salvar_baseline:
+        _gravar(resultados, args.baseline)
+        print(f"[INFO] Baseline gravada em {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("[INFO] Sem baseline para comparar (use --salvar-baseline).")
+        return 0
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+
+    regressoes = 0
+    print(f"\nComparação com {args.baseline} (tolerância {args.tolerancia:.0%}):")
+    for caso, metrica, base, atual, variacao, regrediu in comparar(resultados, baseline, args.tolerancia):
+        regressoes += regrediu
+        marca = "  REGRESSÃO" if regrediu else ""
+        print(f"  {caso:<13}{metrica:<9}{base:>11.2f} → {atual:>11.2f}  ({variacao:+.1%}){marca}")
+    return 1 if regressoes else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
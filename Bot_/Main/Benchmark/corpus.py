@@ -0,0 +1,95 @@
+# Main/Benchmark/corpus.py
+
+import os
+import random
+
+# Gerador de corpus sintético no formato das notas do Obsidian usadas na
+# documentação: títulos (h1-h4), parágrafos, listas, tabelas, blocos de
+# código, blocos "OBS:", imagens ![[...]] e negrito com parênteses (os casos
+# que o transformer estiliza). Com a mesma semente o corpus é idêntico,
+# então resultados de máquinas/versões diferentes são comparáveis.
+
+PALAVRAS = (
+    "cadastro cliente pedido nota fiscal estoque produto tela botão campo relatório "
+    "filtro usuário permissão empresa filial parâmetro sistema módulo integração "
+    "financeiro título vencimento pagamento conta lançamento configuração menu opção "
+    "salvar imprimir exportar consulta período data valor desconto tabela preço"
+).split()
+
+PREFIXOS_OBS = ("OBS:", "Obs:", "Observação:", "OBSERVAÇÃO:")
+LINGUAGENS = ("sql", "python", "json", "")
+
+
+def _frase(rng, minimo=6, maximo=18):
+    palavras = [rng.choice(PALAVRAS) for _ in range(rng.randint(minimo, maximo))]
+    return " ".join(palavras).capitalize() + "."
+
+
+def _paragrafo(rng):
+    texto = " ".join(_frase(rng) for _ in range(rng.randint(1, 4)))
+    if rng.random() < 0.35:
+        termo = " ".join(rng.choice(PALAVRAS) for _ in range(2))
+        texto += f" **{termo.capitalize()} ({rng.choice(PALAVRAS)})**"
+    elif rng.random() < 0.2:
+        texto += f" **{rng.choice(PALAVRAS).capitalize()}**"
+    return texto
+
+
+def _tabela(rng):
+    colunas = rng.randint(2, 5)
+    cabecalho = [rng.choice(PALAVRAS).capitalize() for _ in range(colunas)]
+    linhas = ["| " + " | ".join(cabecalho) + " |", "|" + "---|" * colunas]
+    for _ in range(rng.randint(2, 8)):
+        linhas.append("| " + " | ".join(rng.choice(PALAVRAS) for _ in range(colunas)) + " |")
+    return "\n".join(linhas)
+
+
+def _codigo(rng):
+    linhas = [f"{rng.choice(PALAVRAS)}_{i} = {rng.randint(0, 999)}" for i in range(rng.randint(2, 12))]
+    return f"```{rng.choice(LINGUAGENS)}\n" + "\n".join(linhas) + "\n```"
+
+
+def _lista(rng):
+    return "\n".join(f"- {_frase(rng, 3, 8)}" for _ in range(rng.randint(2, 6)))
+
+
+def gerar_documento(rng, secoes=8, imagens=200):
+    """Texto Markdown de uma nota com `secoes` seções."""
+    partes = [f"# {_frase(rng, 2, 5)[:-1]}", _paragrafo(rng)]
+    for _ in range(secoes):
+        nivel = rng.choice((2, 2, 3, 3, 4))
+        partes.append("#" * nivel + " " + _frase(rng, 2, 6)[:-1])
+        for _ in range(rng.randint(1, 4)):
+            sorteio = rng.random()
+            if sorteio < 0.45:
+                partes.append(_paragrafo(rng))
+            elif sorteio < 0.55:
+                partes.append(_tabela(rng))
+            elif sorteio < 0.65:
+                partes.append(_codigo(rng))
+            elif sorteio < 0.75:
+                partes.append(f"{rng.choice(PREFIXOS_OBS)} {_frase(rng)}")
+            elif sorteio < 0.88:
+                partes.append(f"![[imagem_{rng.randrange(imagens):04d}.png]]")
+            else:
+                partes.append(_lista(rng))
+    return "\n\n".join(partes) + "\n"
+
+
+def gerar_corpus(pasta, arquivos=200, secoes=8, subpastas=4, semente=42):
+    """
+    Grava `arquivos` notas .md em `pasta` (distribuídas em `subpastas`) e
+    retorna os caminhos, em ordem. Arquivos já existentes são sobrescritos.
+    """
+    rng = random.Random(semente)
+    caminhos = []
+    for i in range(arquivos):
+        sub = os.path.join(pasta, f"secao_{i % subpastas:02d}") if subpastas else pasta
+        os.makedirs(sub, exist_ok=True)
+        # Seções variam em torno da média, como notas reais (curtas e longas)
+        n_secoes = max(1, int(rng.expovariate(1 / secoes)))
+        path = os.path.join(sub, f"nota_{i:05d}.md")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(gerar_documento(rng, n_secoes))
+        caminhos.append(path)
+    return caminhos
@@ -0,0 +1,55 @@
+# Main/Benchmark/startup.py
+# -*- coding: utf-8 -*-
+#
+# Mede a abertura da GUI num processo novo (chamado pelo caso "inicio" de
+# Benchmark/bench.py, uma vez por repetição):
+#
+#   python -m Benchmark.startup [instante_do_spawn]
+#
+# Imprime um JSON com o tempo até `import main`, até a janela estar
+# desenhada e pronta para uso (App criada + root.update()) e quais módulos
+# pesados já estavam carregados nesse momento. Sem display (servidor de
+# build), mede só a importação e informa "janela": false.
+
+import os
+import sys
+import json
+import time
+
+INICIO = time.perf_counter()
+
+MODULOS_PESADOS = ("bs4", "markdown2", "requests", "PIL", "tkhtmlview", "tkinterdnd2", "watchdog", "lxml")
+
+
+def medir(spawn=None):
+    import config
+    # O pré-carregamento roda depois da janela aparecer, em segundo plano;
+    # desligado aqui para a medição não depender de quanto dele já rodou.
+    config.GUI_PRECARREGAR = False
+
+    import tkinter as tk
+    import main
+
+    medida = {"importacao_s": time.perf_counter() - INICIO, "janela": False}
+    try:
+        root = tk.Tk()
+    except tk.TclError:
+        root = None
+    if root is not None:
+        root.geometry("+0+0")
+        main.App(root)
+        root.update()
+        medida["janela"] = True
+        medida["interativo_s"] = time.perf_counter() - INICIO
+    medida["modulos_pesados"] = sorted(m for m in MODULOS_PESADOS if m in sys.modules)
+    if spawn is not None:
+        # Inclui a subida do interpretador, medida pelo relógio de parede do processo pai
+        medida["desde_spawn_s"] = time.time() - spawn
+    if root is not None:
+        root.destroy()
+    return medida
+
+
+if __name__ == "__main__":
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    print(json.dumps(medir(float(sys.argv[1]) if len(sys.argv) > 1 else None)))
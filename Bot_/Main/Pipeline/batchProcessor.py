@@ -0,0 +1,497 @@
+# Main/Pipeline/batchProcessor.py
+
+import os
+import time
+import glob
+import hashlib
+import traceback
+import unicodedata
+import concurrent.futures
+from concurrent.futures.process import BrokenProcessPool
+
+from Transformer.transformerFile import transformar_html
+from Transformer.markdownConverter import markdown_para_html
+from Pipeline.fileDiscovery import descobrir_markdown
+from Pipeline.instrumentation import Cronometro, memoria_pico_processo, deve_perfilar, perfilar
+from Pipeline.imageOptimizer import otimizar_imagem
+from Pipeline.searchIndex import extrair_secoes
+from Pipeline.outputWriter import GravadorSaida, gravar_se_mudou
+from config import BATCH_MODE, BATCH_MODOS, BATCH_WORKERS, PERFIL_PASTA, SAIDA_REMOVER_OBSOLETOS
+
+# Este módulo não depende da UI: tudo o que roda nos workers precisa ser
+# importável (e "picklable") por um processo filho.
+
+MODOS_VALIDOS = BATCH_MODOS
+
+# MapaLinks deste processo do pool, recebido uma vez por _iniciar_worker em
+# vez de ir junto com cada arquivo
+_mapa_links = None
+
+
+def coletar_arquivos(entradas, raizes=None, incluir=None, excluir=None):
+    """
+    Expande uma lista de entradas (arquivos .md, pastas ou padrões glob)
+    em uma lista ordenada de arquivos .md, sem duplicatas.
+
+    Pastas são varridas recursivamente (ver Pipeline/fileDiscovery.py). Se
+    `raizes` for um dicionário, ele recebe arquivo -> pasta de origem, para
+    que a saída mantenha a estrutura de subpastas (ver caminho_saida).
+    """
+    encontrados = []
+    vistos = set()
+
+    def _adicionar(path, raiz=None):
+        path = os.path.abspath(path)
+        if path.lower().endswith(".md") and path not in vistos:
+            vistos.add(path)
+            encontrados.append(path)
+            if raiz is not None and raizes is not None:
+                raizes[path] = raiz
+
+    for entrada in entradas:
+        if os.path.isdir(entrada):
+            raiz = os.path.abspath(entrada)
+            for path in descobrir_markdown(raiz, incluir, excluir):
+                _adicionar(path, raiz)
+        elif glob.has_magic(entrada):
+            for path in sorted(glob.glob(entrada, recursive=True)):
+                if os.path.isfile(path):
+                    _adicionar(path)
+        elif os.path.isfile(entrada):
+            _adicionar(entrada)
+        else:
+            print(f"[WARN] Entrada ignorada (não encontrada): {entrada}")
+    return encontrados
+
+
+def caminho_saida(file_path, output_folder, raiz=None):
+    """
+    Retorna o caminho do .html gerado para um arquivo .md. Com `raiz` (a
+    pasta de onde o arquivo veio), mantém as subpastas relativas a ela;
+    sem raiz, o .html fica direto em `output_folder`.
+    """
+    relativo = os.path.basename(file_path)
+    if raiz:
+        caminho = os.path.relpath(os.path.abspath(file_path), os.path.abspath(raiz))
+        if not caminho.startswith(os.pardir):
+            relativo = caminho
+    return os.path.join(output_folder, os.path.splitext(relativo)[0] + ".html")
+
+
+def saidas_duplicadas(arquivos, output_folder, raizes=None):
+    """{saída: [arquivos .md]} das saídas geradas por mais de um arquivo da lista."""
+    raizes = raizes or {}
+    por_saida = {}
+    for file_path in arquivos:
+        destino = os.path.normcase(caminho_saida(file_path, output_folder, raizes.get(file_path)))
+        por_saida.setdefault(destino, []).append(file_path)
+    return {destino: origens for destino, origens in por_saida.items() if len(origens) > 1}
+
+
+def chave_saida(destino, output_folder):
+    """Caminho de `destino` relativo à pasta de saída, com "/" (a chave dos manifestos e índices)."""
+    return os.path.relpath(destino, output_folder).replace(os.sep, "/")
+
+
+def shard_de(chave, total):
+    """
+    Shard (de 1 a `total`) de uma saída pela sua chave_saida. Depende só do
+    caminho relativo, então é o mesmo em qualquer máquina e execução.
+    """
+    chave = unicodedata.normalize("NFC", chave)
+    return int.from_bytes(hashlib.sha1(chave.encode("utf-8")).digest()[:8], "big") % total + 1
+
+
+def arquivos_do_shard(arquivos, output_folder, shard, raizes=None):
+    """Os arquivos de `arquivos` cuja saída cai no shard `shard` ((indice, total))."""
+    raizes = raizes or {}
+    indice, total = shard
+    return [f for f in arquivos
+            if shard_de(chave_saida(caminho_saida(f, output_folder, raizes.get(f)), output_folder), total) == indice]
+
+
+def converter_arquivo(file_path, output_folder, versao, img_padrao_eorbis, img_padrao_metaprime, raiz=None,
+                      imagens=None, links=None, indexar=False, perfil=False):
+    """
+    Converte um único arquivo .md em .html (md -> html bruto -> transformer -> disco).
+    A página só é gravada se mudou (ver Pipeline/outputWriter.py); o
+    resultado traz `gravado` e `hash_saida`. `raiz` é repassada a
+    caminho_saida. Com `imagens` (um OtimizadorImagens), os <img> locais
+    apontam para as cópias otimizadas, listadas no resultado em `imagens`
+    ({destino: origem}) para a etapa otimizar_imagens. Com
+    `links` (um Pipeline.linkIndex.MapaLinks; num processo do pool, o
+    recebido por _iniciar_worker), os [[links]] entre notas são resolvidos e
+    vão no resultado em `links` ({alvo: href, ou None se quebrado}). Com
+    `indexar`, os termos de cada seção da página vão em `busca` (ver
+    Pipeline/searchIndex.py).
+    Nunca levanta exceção: o resultado é sempre um dicionário, para que o
+    erro de um arquivo não derrube o lote inteiro.
+
+    Além do status, o resultado traz as medições usadas no relatório da
+    execução (Pipeline/runReport.py): `duracao` (s), `etapas` (s por etapa),
+    `bytes_entrada`, `bytes_saida` e `memoria_processo`, o pico de memória
+    do processo que converteu o arquivo até ali (bytes; não é do arquivo).
+    Com `perfil`, a conversão roda sob cProfile e tracemalloc (ver
+    perfilar em Pipeline/instrumentation.py).
+    """
+    links = links if links is not None else _mapa_links
+    if perfil:
+        return perfilar(lambda: _converter(file_path, output_folder, versao, img_padrao_eorbis,
+                                           img_padrao_metaprime, raiz, imagens, links, indexar),
+                        file_path, PERFIL_PASTA, raiz)
+    return _converter(file_path, output_folder, versao, img_padrao_eorbis, img_padrao_metaprime, raiz, imagens,
+                      links, indexar)
+
+
+def _converter(file_path, output_folder, versao, img_padrao_eorbis, img_padrao_metaprime, raiz, imagens, links,
+               indexar):
+    inicio = time.perf_counter()
+    cron = Cronometro()
+    resultado = {"arquivo": file_path, "saida": None, "ok": False, "erro": None, "pulado": False,
+                 "bytes_entrada": 0, "bytes_saida": 0}
+    try:
+        with cron.etapa("leitura"):
+            with open(file_path, "r", encoding="utf-8") as f:
+                resultado["bytes_entrada"] = os.fstat(f.fileno()).st_size
+                raw_markdown = f.read()
+
+        final_html_path = caminho_saida(file_path, output_folder, raiz)
+        with cron.etapa("markdown"):
+            if links is None:
+                html_content_bruto = markdown_para_html(raw_markdown)
+            else:
+                pagina = os.path.relpath(final_html_path, output_folder).replace(os.sep, "/")
+                resultado["links"] = {}
+                html_content_bruto = markdown_para_html(raw_markdown,
+                                                        links=links.para_pagina(pagina, resultado["links"]))
+
+        with cron.etapa("transformacao"):
+            transformed_html = transformar_html(
+                html_content_bruto,
+                versao,
+                img_padrao_eorbis,
+                img_padrao_metaprime
+            )
+            if imagens is not None:
+                transformed_html, resultado["imagens"] = imagens.reescrever(transformed_html, final_html_path,
+                                                                            output_folder)
+
+        if indexar:
+            # O corpo que o transformer envolveu, sem o cabeçalho e o rodapé repetidos em toda página
+            with cron.etapa("indexacao"):
+                resultado["busca"] = extrair_secoes(html_content_bruto)
+
+        with cron.etapa("escrita"):
+            dados = transformed_html.encode("utf-8")
+            resultado["gravado"], resultado["hash_saida"] = gravar_se_mudou(final_html_path, dados)
+            resultado["bytes_saida"] = len(dados)
+
+        resultado.update(saida=final_html_path, ok=True)
+    except Exception as e:
+        resultado["erro"] = f"{e}\n{traceback.format_exc()}"
+    resultado.update(duracao=time.perf_counter() - inicio, etapas=cron.etapas,
+                     memoria_processo=memoria_pico_processo())
+    return resultado
+
+
+def _resultado_erro(file_path, erro):
+    """Resultado de um arquivo cuja conversão falhou fora de _converter (no pool, ao enviar ou receber)."""
+    return {"arquivo": file_path, "saida": None, "ok": False, "erro": erro, "pulado": False,
+            "bytes_entrada": 0, "bytes_saida": 0, "duracao": 0.0, "etapas": {}, "memoria_processo": None}
+
+
+def _num_workers(workers):
+    return max(1, workers or os.cpu_count() or 1)
+
+
+def _iniciar_worker(mapa_links):
+    global _mapa_links
+    _mapa_links = mapa_links
+
+
+def _criar_executor(modo, workers, mapa_links=None):
+    """
+    Cria o pool pedido; se processos não forem suportados, usa threads.
+    `mapa_links` é entregue a cada processo do pool uma única vez.
+    """
+    if modo == "processos":
+        try:
+            if mapa_links is not None:
+                return concurrent.futures.ProcessPoolExecutor(max_workers=workers, initializer=_iniciar_worker,
+                                                              initargs=(mapa_links,)), "processos"
+            return concurrent.futures.ProcessPoolExecutor(max_workers=workers), "processos"
+        except (OSError, NotImplementedError, ImportError) as e:
+            print(f"[WARN] Pool de processos indisponível ({e}). Usando threads.")
+    return concurrent.futures.ThreadPoolExecutor(max_workers=workers), "threads"
+
+
+def processar_lote(arquivos, output_folder, versao, img_padrao_eorbis, img_padrao_metaprime,
+                   modo=None, workers=None, on_result=None, should_stop=None, manifesto=None,
+                   raizes=None, imagens=None, links=None, busca=None, saidas=None, shard=None):
+    """
+    Converte uma lista de arquivos .md, em paralelo conforme `modo`.
+
+    `on_result(resultado)` é chamado na thread chamadora para cada arquivo
+    concluído (sucesso ou erro), na ordem de término. `should_stop()` é
+    consultado entre os envios; ao retornar True nenhum arquivo novo é
+    iniciado e os pendentes são cancelados.
+
+    Com um `manifesto` (Pipeline.buildCache.ManifestoBuild), arquivos sem
+    alterações não são reconvertidos: o resultado deles vem com
+    `pulado=True`, e o manifesto é salvo ao final (mesmo se interrompido).
+
+    `raizes` mapeia arquivo -> pasta de origem (ver caminho_saida).
+
+    Com `imagens` (Pipeline.imageOptimizer.OtimizadorImagens), ao final do
+    lote as imagens referenciadas pelas páginas são otimizadas em paralelo
+    (ver otimizar_imagens); os contadores ficam no próprio `imagens`.
+
+    Com `links` (Pipeline.linkIndex.IndiceLinks), o índice é atualizado com a
+    fila antes da conversão e os [[links]] entre notas são resolvidos; os
+    quebrados ficam em `links.quebrados`. Com o manifesto, uma página sem
+    alterações é reconvertida se algum dos seus links passou a resolver
+    para outro lugar.
+
+    Com `busca` (Pipeline.searchIndex.IndiceBusca), os termos das páginas
+    convertidas são guardados e, ao final do lote, o índice de busca da
+    pasta de saída é regravado (ver `busca.resumo()`).
+
+    `saidas` (Pipeline.outputWriter.GravadorSaida) recebe as contagens de
+    saídas gravadas, inalteradas e removidas; as pastas das saídas são
+    criadas aqui, antes do lote. Com o manifesto e SAIDA_REMOVER_OBSOLETOS,
+    as saídas cujo .md não existe mais são apagadas.
+
+    Com `shard` ((indice, total)), só os arquivos desse shard são convertidos
+    (ver arquivos_do_shard); o índice de links é montado com a fila inteira,
+    para resolver links para notas de outros shards. O manifesto e os termos
+    da busca são só lidos: vão no manifesto parcial do shard e são gravados
+    pela mesclagem (Pipeline/shardBuild.py), e o índice de busca não é gerado.
+
+    Retorna False se o lote foi interrompido, True caso contrário.
+    """
+    modo = modo or BATCH_MODE
+    if modo not in MODOS_VALIDOS:
+        raise ValueError(f"Modo de processamento inválido: {modo!r} (use {', '.join(MODOS_VALIDOS)})")
+    workers = _num_workers(workers if workers is not None else BATCH_WORKERS)
+    on_result = on_result or (lambda resultado: None)
+    should_stop = should_stop or (lambda: False)
+    args = (output_folder, versao, img_padrao_eorbis, img_padrao_metaprime)
+    arquivos = list(arquivos)
+    raizes = raizes or {}
+    referenciadas = {}
+    paginas_imagem = {}  # cópia otimizada -> páginas que a usam
+    mapa = None
+    opcoes = {"imagens": imagens, "indexar": busca is not None}
+    saidas = saidas if saidas is not None else GravadorSaida()
+    on_result_saidas = on_result
+
+    def on_result(resultado):
+        saidas.registrar(resultado)
+        on_result_saidas(resultado)
+
+    if imagens is not None:
+        on_result_imagens = on_result
+
+        def on_result(resultado):
+            for destino, origem in (resultado.get("imagens") or {}).items():
+                referenciadas[destino] = origem
+                paginas_imagem.setdefault(destino, []).append(resultado["saida"])
+            on_result_imagens(resultado)
+
+    if busca is not None:
+        on_result_busca = on_result
+
+        def on_result(resultado):
+            busca.registrar(resultado)
+            on_result_busca(resultado)
+
+    if links is not None:
+        mapa = links.atualizar(arquivos, raizes)
+        links.salvar()
+        on_result_links = on_result
+
+        def on_result(resultado):
+            links.registrar(resultado)
+            on_result_links(resultado)
+
+    if shard is not None:
+        arquivos = arquivos_do_shard(arquivos, output_folder, shard, raizes)
+
+    if manifesto is None:
+        saidas.preparar_pastas(caminho_saida(f, output_folder, raizes.get(f)) for f in arquivos)
+        concluido = _executar_lote(arquivos, args, raizes, opcoes, mapa, modo, workers, on_result, should_stop)
+    else:
+        pendentes = []
+        for file_path in arquivos:
+            destino = caminho_saida(file_path, output_folder, raizes.get(file_path))
+            # Sem os termos guardados, a página também precisa passar pela indexação
+            if manifesto.precisa_converter(file_path, destino, versao, mapa) \
+                    or (busca is not None and not busca.contem(destino)):
+                pendentes.append(file_path)
+            else:
+                # As cópias otimizadas de uma página pulada também precisam existir
+                on_result({"arquivo": file_path, "saida": destino, "ok": True, "erro": None, "pulado": True,
+                           "duracao": 0.0, "imagens": manifesto.imagens_de(destino),
+                           "links": manifesto.links_de(destino)})
+
+        def on_result_registrando(resultado):
+            manifesto.registrar(resultado, versao)
+            on_result(resultado)
+
+        saidas.preparar_pastas(caminho_saida(f, output_folder, raizes.get(f)) for f in pendentes)
+        if SAIDA_REMOVER_OBSOLETOS:
+            obsoletos = manifesto.obsoletos()
+            if shard is not None:
+                obsoletos = [o for o in obsoletos if shard_de(chave_saida(o, output_folder), shard[1]) == shard[0]]
+            manifesto.esquecer(saidas.remover(obsoletos))
+        try:
+            concluido = _executar_lote(pendentes, args, raizes, opcoes, mapa, modo, workers,
+                                       on_result_registrando, should_stop)
+        finally:
+            if shard is None:
+                manifesto.salvar()
+
+    if concluido and referenciadas:
+        concluido = otimizar_imagens(imagens, referenciadas, modo, workers, should_stop)
+        # As páginas das imagens que o Pillow não otimizou apontam para a cópia do original
+        imagens.corrigir_paginas({p for d in imagens.substitutos for p in paginas_imagem.get(d, ())})
+    if concluido and busca is not None and shard is None:
+        busca.gerar(saidas)
+    return concluido
+
+
+def otimizar_imagens(imagens, pendentes, modo=None, workers=None, should_stop=None):
+    """
+    Gera em paralelo as cópias otimizadas de `pendentes` ({destino: origem})
+    que ainda não existem. Retorna False se interrompido.
+    """
+    novos = list(imagens.faltantes(pendentes).items())
+    modo = modo or BATCH_MODE
+    workers = _num_workers(workers if workers is not None else BATCH_WORKERS)
+    should_stop = should_stop or (lambda: False)
+    args = (imagens.largura, imagens.qualidade)
+
+    if modo == "sequencial" or workers == 1 or len(novos) <= 1:
+        for destino, origem in novos:
+            if should_stop():
+                return False
+            imagens.registrar(otimizar_imagem(origem, destino, *args))
+        return True
+
+    executor, modo = _criar_executor(modo, workers)
+    restantes = dict(novos)
+    with executor:
+        futuros = {}
+        try:
+            for destino, origem in novos:
+                futuros[executor.submit(otimizar_imagem, origem, destino, *args)] = destino
+        except BrokenProcessPool:
+            pass  # as que não foram enviadas continuam em `restantes`
+        for fut in concurrent.futures.as_completed(futuros):
+            destino = futuros[fut]
+            try:
+                resultado = fut.result()
+            except BrokenProcessPool:
+                break
+            except concurrent.futures.CancelledError:
+                continue
+            except Exception as e:
+                # Como em converter_arquivo: o erro de uma imagem não derruba o lote
+                resultado = {"origem": restantes[destino], "destino": destino, "ok": False, "erro": str(e),
+                             "bytes_origem": 0, "bytes_destino": 0}
+            imagens.registrar(resultado)
+            restantes.pop(destino)
+            if should_stop():
+                for pendente in futuros:
+                    pendente.cancel()
+                return False
+        else:
+            if not restantes:
+                return True
+    print(f"[WARN] Pool de processos falhou; {len(restantes)} imagem(ns) serão refeitas com threads.")
+    return otimizar_imagens(imagens, restantes, "threads", workers, should_stop)
+
+
+def _executar_lote(arquivos, args, raizes, opcoes, mapa, modo, workers, on_result, should_stop, com_perfil=True):
+    # Só o primeiro arquivo que casar com o perfil, e fora do pool: o
+    # tracemalloc liga e desliga para o processo inteiro
+    perfilado = next((f for f in arquivos if deve_perfilar(f, raizes.get(f))), None) if com_perfil else None
+    if perfilado is not None:
+        if should_stop():
+            return False
+        on_result(converter_arquivo(perfilado, *args, raizes.get(perfilado), links=mapa, perfil=True, **opcoes))
+        arquivos = [f for f in arquivos if f != perfilado]
+
+    if modo == "sequencial" or workers == 1 or len(arquivos) <= 1:
+        for file_path in arquivos:
+            if should_stop():
+                return False
+            on_result(converter_arquivo(file_path, *args, raizes.get(file_path), links=mapa, **opcoes))
+        return True
+
+    executor, modo = _criar_executor(modo, workers, mapa)
+    # Nos processos, o mapa já foi entregue pelo inicializador do pool
+    links = None if modo == "processos" else mapa
+    pendentes_reexecutar = []
+    interrompido = False
+
+    with executor:
+        # Envio em janela: mantém só alguns arquivos por worker em voo, para
+        # que o cancelamento tenha efeito rápido e a memória fique limitada.
+        janela = workers * 2
+        restantes = iter(arquivos)
+        em_voo = {}
+        esgotado = False
+
+        while True:
+            while not esgotado and not interrompido and len(em_voo) < janela:
+                file_path = next(restantes, None)
+                if file_path is None:
+                    esgotado = True
+                    break
+                try:
+                    em_voo[executor.submit(converter_arquivo, file_path, *args, raizes.get(file_path), links=links,
+                                           **opcoes)] = file_path
+                except BrokenProcessPool:
+                    # O pool quebrou entre um envio e outro: o arquivo volta para a fila
+                    pendentes_reexecutar.append(file_path)
+                    break
+
+            if not em_voo and not pendentes_reexecutar:
+                break
+
+            feitos, _ = concurrent.futures.wait(
+                em_voo, timeout=0.2, return_when=concurrent.futures.FIRST_COMPLETED
+            )
+            for fut in feitos:
+                file_path = em_voo.pop(fut)
+                try:
+                    resultado = fut.result()
+                except BrokenProcessPool:
+                    pendentes_reexecutar.append(file_path)
+                    continue
+                except Exception as e:
+                    # Ex.: argumentos ou resultado que não passam pelo pickle. Como em
+                    # converter_arquivo, o erro de um arquivo não derruba o lote
+                    resultado = _resultado_erro(file_path, f"{e}\n{traceback.format_exc()}")
+                on_result(resultado)
+
+            if pendentes_reexecutar:
+                # Um worker morreu: o pool inteiro fica inutilizável.
+                pendentes_reexecutar.extend(em_voo.values())
+                pendentes_reexecutar.extend(restantes)
+                em_voo.clear()
+                break
+
+            if not interrompido and should_stop():
+                interrompido = True
+                for fut in list(em_voo):
+                    if fut.cancel():
+                        em_voo.pop(fut)
+
+    if pendentes_reexecutar and not interrompido:
+        print(f"[WARN] Pool de processos falhou; {len(pendentes_reexecutar)} arquivo(s) serão refeitos com threads.")
+        return _executar_lote(pendentes_reexecutar, args, raizes, opcoes, mapa, "threads", workers, on_result,
+                              should_stop, com_perfil=False)
+
+    return not interrompido
@@ -0,0 +1,169 @@
+# Main/Pipeline/buildCache.py
+
+import os
+import json
+import hashlib
+
+import markdown2
+
+import config
+from config import BUILD_MANIFEST
+from Transformer.parserBackend import resolver_backend
+
+# Manifesto persistente na pasta de saída: guarda, para cada .html gerado,
+# o hash do .md de origem, a versão carimbada e a impressão digital do
+# transformer/config. Se nada disso mudou, o arquivo não é reconvertido.
+# Com a otimização de imagens ligada, guarda também as cópias otimizadas
+# que a página referencia, para recriá-las se tiverem sido apagadas. Com os
+# links entre notas, guarda para onde cada [[link]] da página apontou: se
+# outra nota foi renomeada ou mudou de títulos, a página é reconvertida.
+
+FORMATO_MANIFESTO = 1
+_DIR_MAIN = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def hash_arquivo(path):
+    """SHA-256 do conteúdo de um arquivo."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for bloco in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(bloco)
+    return h.hexdigest()
+
+
+def fingerprint_transformer(imagens=None, links=False):
+    """
+    Impressão digital de tudo que influencia o HTML gerado além do .md e da
+    versão: código do transformer/pipeline, parser, extras do markdown2,
+    logos, a URL base e as pastas locais das imagens, as opções da
+    otimização de imagens (`imagens`, um OtimizadorImagens) e se os links
+    entre notas são resolvidos (`links`).
+    """
+    h = hashlib.sha256()
+    for pasta in ("Transformer", "Pipeline"):
+        raiz = os.path.join(_DIR_MAIN, pasta)
+        for nome in sorted(os.listdir(raiz)):
+            if nome.endswith(".py"):
+                with open(os.path.join(raiz, nome), "rb") as f:
+                    h.update(nome.encode("utf-8"))
+                    h.update(f.read())
+    relevante = {
+        "markdown2": getattr(markdown2, "__version__", ""),
+        "PARSER_BACKEND": resolver_backend(),
+        "MARKDOWN_EXTRAS": config.MARKDOWN_EXTRAS,
+        "IMG_PADRAO_EORBIS": config.IMG_PADRAO_EORBIS,
+        "IMG_PADRAO_METAPRIME": config.IMG_PADRAO_METAPRIME,
+        "URL_BASE_IMAGENS": config.URL_BASE_IMAGENS,
+        # Na ordem de config: a primeira pasta ganha em nomes repetidos
+        "IMG_DIRS_LOCAIS": [os.path.normcase(os.path.abspath(p)) for p in config.IMG_DIRS_LOCAIS],
+        "IMAGENS": imagens.assinatura() if imagens else None,
+        "LINKS": bool(links),
+    }
+    h.update(json.dumps(relevante, sort_keys=True).encode("utf-8"))
+    return h.hexdigest()
+
+
+class ManifestoBuild:
+    """Manifesto de build incremental de uma pasta de saída."""
+
+    def __init__(self, output_folder, forcar=False, imagens=None, links=False):
+        self.output_folder = output_folder
+        self.path = os.path.join(output_folder, BUILD_MANIFEST)
+        self.fingerprint = fingerprint_transformer(imagens, links)
+        self.forcar = forcar
+        self.entradas = {}
+        self._hashes = {}
+        self._carregar()
+
+    def _carregar(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                dados = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            print(f"[WARN] Manifesto de build ilegível, reconstruindo tudo: {e}")
+            return
+        # Transformer ou config mudaram: nenhuma entrada antiga é confiável.
+        if dados.get("formato") != FORMATO_MANIFESTO or dados.get("fingerprint") != self.fingerprint:
+            return
+        self.entradas = dados.get("arquivos", {})
+
+    def _chave(self, destino):
+        return os.path.relpath(destino, self.output_folder).replace(os.sep, "/")
+
+    def precisa_converter(self, file_path, destino, versao, mapa_links=None):
+        """
+        True se o .md (ou a versão) mudou desde a última conversão, se a saída
+        ou uma das cópias otimizadas de imagem que ela usa sumiu (a página foi
+        apontada para o original) ou se algum link da página resolve
+        diferente em `mapa_links`.
+        """
+        try:
+            self._hashes[file_path] = hash_arquivo(file_path)
+        except OSError:
+            return True  # deixa o worker reportar o erro de leitura
+        if self.forcar:
+            return True
+        chave = self._chave(destino)
+        anterior = self.entradas.get(chave)
+        return not (
+            anterior
+            and anterior.get("hash") == self._hashes[file_path]
+            and anterior.get("versao") == versao
+            and os.path.exists(destino)
+            and all(os.path.exists(imagem) for imagem in self.imagens_de(destino))
+            and (mapa_links is None
+                 or all(mapa_links.href(alvo, chave) == href for alvo, href in anterior.get("links", {}).items()))
+        )
+
+    def registrar(self, resultado, versao):
+        """Registra no manifesto um arquivo convertido com sucesso."""
+        if not resultado["ok"] or resultado["arquivo"] not in self._hashes:
+            return
+        entrada = {
+            "origem": os.path.abspath(resultado["arquivo"]),
+            "hash": self._hashes[resultado["arquivo"]],
+            "versao": versao,
+        }
+        if resultado.get("imagens"):
+            entrada["imagens"] = {self._chave(destino): origem for destino, origem in resultado["imagens"].items()}
+        if resultado.get("links"):
+            entrada["links"] = resultado["links"]
+        self.entradas[self._chave(resultado["saida"])] = entrada
+
+    def imagens_de(self, destino):
+        """{cópia otimizada: imagem de origem} referenciadas pela saída `destino`."""
+        entrada = self.entradas.get(self._chave(destino), {})
+        return {os.path.join(os.path.abspath(self.output_folder), chave): origem
+                for chave, origem in entrada.get("imagens", {}).items()}
+
+    def links_de(self, destino):
+        """{alvo: href} dos [[links]] da saída `destino` na última conversão (href None = quebrado)."""
+        return self.entradas.get(self._chave(destino), {}).get("links", {})
+
+    def obsoletos(self):
+        """Saídas registradas cujo .md de origem não existe mais."""
+        return sorted(
+            os.path.join(self.output_folder, chave)
+            for chave, entrada in self.entradas.items()
+            if not os.path.exists(entrada.get("origem", ""))
+        )
+
+    def esquecer(self, saidas):
+        """Tira do manifesto as saídas `saidas` (apagadas pelo lote)."""
+        for destino in saidas:
+            self.entradas.pop(self._chave(destino), None)
+
+    def salvar(self):
+        # Importado aqui: outputWriter importa hash_arquivo deste módulo
+        from Pipeline.outputWriter import gravar_se_mudou
+        os.makedirs(self.output_folder, exist_ok=True)
+        dados = {
+            "formato": FORMATO_MANIFESTO,
+            "fingerprint": self.fingerprint,
+            "arquivos": self.entradas,
+        }
+        # Um build sem mudanças não regrava o manifesto
+        texto = json.dumps(dados, ensure_ascii=False, indent=1, sort_keys=True)
+        gravar_se_mudou(self.path, texto.encode("utf-8"))
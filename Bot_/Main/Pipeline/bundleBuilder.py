@@ -0,0 +1,343 @@
+# Main/Pipeline/bundleBuilder.py
+
+import os
+import re
+import time
+import html
+import shutil
+import hashlib
+import tempfile
+import traceback
+import unicodedata
+from datetime import datetime
+
+from config import (BUNDLE_DOCUMENTO, BUNDLE_TITULO, BUNDLE_MODOS, URL_BASE_ASSETS, ASSETS_LOCAIS,
+                    IMG_PADRAO_EORBIS, IMG_PADRAO_METAPRIME, BATCH_MODE, BATCH_WORKERS)
+from Transformer.transformerFile import (estilizar_fragmento, ESTILOS_TITULOS, ESTILO_OBS,
+                                         ESTILO_IMAGEM, ESTILO_STRONG)
+from Transformer.markdownConverter import markdown_para_html
+from Transformer.imageResolver import ResolvedorImagens, resolvedor_padrao
+from concurrent.futures.process import BrokenProcessPool
+
+from Pipeline.batchProcessor import caminho_saida, otimizar_imagens, _criar_executor, _num_workers
+from Pipeline.buildCache import hash_arquivo
+from Pipeline.outputWriter import gravar_se_mudou
+
+# Modo pacote: em vez de uma página independente por arquivo (cada uma com
+# cabeçalho, rodapé e style= repetidos em cada elemento), gera
+#   "documento": um único .html com sumário e uma <section> por nota;
+#   "site":      uma página por nota e um index.html com o sumário.
+# Nos dois casos os estilos do transformer viram classes de um estilo.css
+# compartilhado, e as imagens locais (img_doc e os logos de Bot_/Assets)
+# são copiadas uma única vez para assets/, com o hash do conteúdo no nome.
+# Imagens sem cópia local continuam apontando para a URL original. Com a
+# otimização de imagens ligada (Pipeline/imageOptimizer.py), os screenshots
+# vão para assets/ já reduzidos/recomprimidos em vez de copiados.
+
+PASTA_ASSETS = "assets"
+ARQUIVO_CSS = "estilo.css"
+
+# Estilos inline do transformer -> classe equivalente no estilo.css
+CLASSES_ESTILO = {
+    **{estilo: f"eo-{tag}" for tag, estilo in ESTILOS_TITULOS.items()},
+    ESTILO_OBS: "eo-obs",
+    ESTILO_IMAGEM: "eo-imagem",
+    ESTILO_STRONG: "eo-destaque",
+}
+
+CSS_BASE = """body { font-family: Arial, Helvetica, sans-serif; max-width: 1200px; margin: 0 auto; padding: 0 16px; }
+.eo-cabecalho { border-bottom: 2px solid #ccc; padding-bottom: 10px; margin-bottom: 20px; }
+.eo-cabecalho img { max-width: 200px; display: block; margin: 10px 0; }
+.eo-versao { font-size: 12pt; text-align: left; margin: 10px 0; }
+.eo-rodape { border-top: 2px solid #ccc; padding-top: 10px; margin-top: 20px; text-align: right; }
+.eo-rodape img { max-width: 200px; display: inline-block; }
+.eo-sumario ul { list-style: none; padding-left: 1.2em; }
+.eo-sumario > ul { padding-left: 0; }
+.eo-nota { border-bottom: 1px solid #eee; padding-bottom: 20px; }
+"""
+
+_STYLE_ATTR = re.compile(r' style="([^"]*)"')
+_IMG_SRC = re.compile(r'(<img\b[^>]*?\bsrc=")([^"]*)(")')
+_H1 = re.compile(r'<h1\b[^>]*>(.*?)</h1>', re.S)
+_H2 = re.compile(r'<h2\b([^>]*)>(.*?)</h2>', re.S)
+_TAGS = re.compile(r'<[^>]+>')
+
+
+def css_pacote():
+    regras = "".join(f".{classe} {{ {estilo} }}\n" for estilo, classe in CLASSES_ESTILO.items())
+    return CSS_BASE + regras
+
+
+def _trocar_estilos(fragmento):
+    """style="<estilo do transformer>" -> class="eo-..." (outros style= ficam como estão)."""
+    def trocar(m):
+        classe = CLASSES_ESTILO.get(html.unescape(m.group(1)))
+        return f' class="{classe}"' if classe else m.group(0)
+    return _STYLE_ATTR.sub(trocar, fragmento)
+
+
+def slug(texto):
+    texto = unicodedata.normalize("NFKD", texto).encode("ascii", "ignore").decode("ascii")
+    return re.sub(r"[^a-z0-9]+", "-", texto.lower()).strip("-") or "secao"
+
+
+def _texto(fragmento_html):
+    return html.unescape(_TAGS.sub("", fragmento_html)).strip()
+
+
+def preparar_nota(file_path):
+    """
+    Lê e converte uma nota para o pacote (roda nos workers):
+    (arquivo, fragmento com classes, erro, duração em segundos).
+    """
+    inicio = time.perf_counter()
+    try:
+        with open(file_path, "r", encoding="utf-8") as f:
+            fragmento = estilizar_fragmento(markdown_para_html(f.read()))
+        return file_path, _trocar_estilos(fragmento), None, time.perf_counter() - inicio
+    except Exception as e:
+        return file_path, None, f"{e}\n{traceback.format_exc()}", time.perf_counter() - inicio
+
+
+class GerenciadorAssets:
+    """Copia cada imagem local uma única vez para assets/<hash><ext>."""
+
+    def __init__(self, output_folder, imagens=None):
+        self.output_folder = output_folder
+        self.pasta = os.path.join(output_folder, PASTA_ASSETS)
+        self.imagens = imagens
+        self.otimizar = {}      # destino em assets/ -> imagem de origem, para otimizar_imagens
+        self._por_src = {}     # src original -> caminho relativo em assets/ (ou None se remoto)
+        self._por_arquivo = {}  # (caminho local, mtime, tamanho) -> caminho relativo
+        self.copiados = 0
+        self.bytes = 0
+        self._resolvedores = (resolvedor_padrao(), ResolvedorImagens([ASSETS_LOCAIS], URL_BASE_ASSETS))
+
+    def _local(self, src):
+        if os.path.isfile(src):
+            return src
+        for resolvedor in self._resolvedores:
+            local = resolvedor.local_ou_url(src)
+            if local != src:
+                return local
+        return None
+
+    def registrar(self, src):
+        """Caminho relativo (com '/') do asset para `src`, ou None se não houver cópia local."""
+        if src in self._por_src:
+            return self._por_src[src]
+        relativo = None
+        otimizavel = self.imagens.local(src) if self.imagens else None
+        local = None if otimizavel else self._local(src)
+        if otimizavel:
+            nome = self.imagens.nome(otimizavel)
+            self.otimizar[os.path.join(os.path.abspath(self.pasta), nome)] = otimizavel
+            relativo = f"{PASTA_ASSETS}/{nome}"
+        elif local:
+            st = os.stat(local)
+            chave = (os.path.abspath(local), st.st_mtime_ns, st.st_size)
+            relativo = self._por_arquivo.get(chave)
+            if relativo is None:
+                relativo = self._copiar(local)
+                self._por_arquivo[chave] = relativo
+        self._por_src[src] = relativo
+        return relativo
+
+    def _copiar(self, local):
+        h = hashlib.sha256()
+        with open(local, "rb") as f:
+            for bloco in iter(lambda: f.read(1024 * 1024), b""):
+                h.update(bloco)
+        nome = h.hexdigest()[:16] + os.path.splitext(local)[1].lower()
+        destino = os.path.join(self.pasta, nome)
+        # Conteúdo igual = mesmo nome: imagens repetidas (mesmo com nomes diferentes) ocupam um arquivo
+        if not os.path.exists(destino):
+            os.makedirs(self.pasta, exist_ok=True)
+            shutil.copyfile(local, destino + ".tmp")
+            os.replace(destino + ".tmp", destino)
+            self.copiados += 1
+            self.bytes += os.path.getsize(destino)
+        return f"{PASTA_ASSETS}/{nome}"
+
+    def reescrever(self, fragmento, prefixo=""):
+        """Aponta os <img src> com cópia local para assets/ (relativo à página via `prefixo`)."""
+        def trocar(m):
+            relativo = self.registrar(html.unescape(m.group(2)))
+            if relativo is None:
+                return m.group(0)
+            return m.group(1) + html.escape(prefixo + relativo) + m.group(3)
+        return _IMG_SRC.sub(trocar, fragmento)
+
+
+def _cabecalho(versao, assets, prefixo):
+    logo = assets.registrar(IMG_PADRAO_EORBIS)
+    src = html.escape(prefixo + logo) if logo else html.escape(IMG_PADRAO_EORBIS)
+    data = datetime.today().strftime('%d/%m/%Y')
+    return (f'<header class="eo-cabecalho"><img alt="Logo E-Orbis" src="{src}"/>'
+            f'<p class="eo-versao">Versão: {html.escape(versao)} | Última atualização: {data}</p></header>\n')
+
+
+def _rodape(assets, prefixo):
+    logo = assets.registrar(IMG_PADRAO_METAPRIME)
+    src = html.escape(prefixo + logo) if logo else html.escape(IMG_PADRAO_METAPRIME)
+    return f'<footer class="eo-rodape"><img alt="Logo Meta Prime" src="{src}"/></footer>\n'
+
+
+def _inicio_pagina(titulo, prefixo):
+    return (f'<!DOCTYPE html>\n<html lang="pt-BR"><head><meta charset="UTF-8"/>'
+            f'<meta name="viewport" content="width=device-width, initial-scale=1"/>'
+            f'<title>{html.escape(titulo)}</title>'
+            f'<link rel="stylesheet" href="{html.escape(prefixo + ARQUIVO_CSS)}"/></head>\n<body>\n')
+
+
+def _id_unico(base, usados):
+    """`base`, ou `base`-2, -3... se já estiver em `usados` (que recebe o id escolhido)."""
+    ident, n = base, 2
+    while ident in usados:
+        ident, n = f"{base}-{n}", n + 1
+    usados.add(ident)
+    return ident
+
+
+def _ancorar_h2(fragmento, prefixo_id):
+    """Dá um id a cada <h2> e retorna (fragmento, [(id, texto)])."""
+    secoes = []
+    usados = set()
+
+    def trocar(m):
+        texto = _texto(m.group(2))
+        ident = _id_unico(f"{prefixo_id}--{slug(texto)}", usados)
+        secoes.append((ident, texto))
+        return f'<h2 id="{ident}"{m.group(1)}>{m.group(2)}</h2>'
+    return _H2.sub(trocar, fragmento), secoes
+
+
+def _titulo(fragmento, file_path):
+    m = _H1.search(fragmento)
+    return _texto(m.group(1)) if m else os.path.splitext(os.path.basename(file_path))[0]
+
+
+def _sumario(entradas):
+    """entradas: [(href, título, [(href da seção, texto)])]"""
+    itens = []
+    for href, titulo, secoes in entradas:
+        sub = "".join(f'<li><a href="{html.escape(h)}">{html.escape(t)}</a></li>' for h, t in secoes)
+        itens.append(f'<li><a href="{html.escape(href)}">{html.escape(titulo)}</a>'
+                     + (f"<ul>{sub}</ul>" if sub else "") + "</li>")
+    return f'<nav class="eo-sumario"><h2>Sumário</h2><ul>{"".join(itens)}</ul></nav>\n'
+
+
+def _notas(arquivos, modo, workers):
+    """Gera os resultados de preparar_nota na ordem da fila, convertendo em paralelo."""
+    workers = _num_workers(workers if workers is not None else BATCH_WORKERS)
+    if modo == "sequencial" or workers == 1 or len(arquivos) <= 1:
+        yield from map(preparar_nota, arquivos)
+        return
+    executor, modo = _criar_executor(modo, workers)
+    feitos = 0
+    try:
+        with executor:
+            for resultado in executor.map(preparar_nota, arquivos, chunksize=8):
+                yield resultado
+                feitos += 1
+        return
+    except BrokenProcessPool:
+        pass
+    # Um worker morreu: como em processar_lote, o que faltou é refeito com threads
+    print(f"[WARN] Pool de processos falhou; {len(arquivos) - feitos} nota(s) serão refeitas com threads.")
+    yield from _notas(arquivos[feitos:], "threads", workers)
+
+
+def gerar_pacote(arquivos, output_folder, versao, modo_pacote="documento", raizes=None,
+                 modo=None, workers=None, on_result=None, should_stop=None, imagens=None):
+    """
+    Gera o pacote (`modo_pacote` = "documento" ou "site") em `output_folder`.
+    `on_result` recebe um resultado por nota, no formato de converter_arquivo
+    (em "documento", `saida` é o .html único). `imagens` é um
+    OtimizadorImagens opcional. Retorna um resumo do pacote.
+    """
+    if modo_pacote not in BUNDLE_MODOS:
+        raise ValueError(f"Modo de pacote inválido: {modo_pacote!r} (use {', '.join(BUNDLE_MODOS)})")
+    raizes = raizes or {}
+    on_result = on_result or (lambda resultado: None)
+    should_stop = should_stop or (lambda: False)
+    os.makedirs(output_folder, exist_ok=True)
+    assets = GerenciadorAssets(output_folder, imagens)
+
+    gravar_se_mudou(os.path.join(output_folder, ARQUIVO_CSS), css_pacote().encode("utf-8"))
+
+    entradas = []
+    idents = set()
+    interrompido = False
+    documento = os.path.join(output_folder, BUNDLE_DOCUMENTO)
+    # No modo documento as seções vão para um temporário; o sumário (que
+    # precisa de todos os títulos) é escrito antes delas no final
+    corpo = tempfile.TemporaryFile("w+", encoding="utf-8") if modo_pacote == "documento" else None
+    try:
+        for file_path, fragmento, erro, duracao in _notas(list(arquivos), modo or BATCH_MODE, workers):
+            if should_stop():
+                interrompido = True
+                break
+            if erro:
+                on_result({"arquivo": file_path, "saida": None, "ok": False, "erro": erro, "pulado": False,
+                           "duracao": duracao})
+                continue
+
+            destino = caminho_saida(file_path, output_folder, raizes.get(file_path))
+            relativo = os.path.relpath(destino, output_folder).replace(os.sep, "/")
+            titulo = _titulo(fragmento, file_path)
+
+            if modo_pacote == "documento":
+                # "a b.md" e "a-b.md" dão o mesmo slug: o id de cada nota precisa ser único
+                ident = _id_unico("nota-" + slug(os.path.splitext(relativo)[0]), idents)
+                fragmento, secoes = _ancorar_h2(assets.reescrever(fragmento), ident)
+                corpo.write(f'<section class="eo-nota" id="{ident}">\n{fragmento}\n</section>\n')
+                entradas.append((f"#{ident}", titulo, [(f"#{i}", t) for i, t in secoes]))
+                saida = documento
+            else:
+                prefixo = "../" * relativo.count("/")
+                fragmento, secoes = _ancorar_h2(assets.reescrever(fragmento, prefixo), "secao")
+                pagina = (_inicio_pagina(titulo, prefixo) + _cabecalho(versao, assets, prefixo)
+                          + fragmento + "\n" + _rodape(assets, prefixo) + "</body></html>\n")
+                gravado, _ = gravar_se_mudou(destino, pagina.encode("utf-8"))
+                entradas.append((relativo, titulo, [(f"{relativo}#{i}", t) for i, t in secoes]))
+                saida = destino
+            resultado = {"arquivo": file_path, "saida": saida, "ok": True, "erro": None, "pulado": False,
+                         "duracao": duracao}
+            if modo_pacote == "site":
+                resultado["gravado"] = gravado
+            on_result(resultado)
+
+        if modo_pacote == "documento":
+            saida_final = documento
+            # O documento pode ser grande demais para montar em memória: vai
+            # para um temporário e, como em gravar_se_mudou, só substitui o
+            # atual se o conteúdo mudou
+            tmp = documento + ".tmp"
+            with open(tmp, "w", encoding="utf-8", newline="") as f:
+                f.write(_inicio_pagina(BUNDLE_TITULO, "") + _cabecalho(versao, assets, "") + _sumario(entradas))
+                corpo.seek(0)
+                shutil.copyfileobj(corpo, f)
+                f.write(_rodape(assets, "") + "</body></html>\n")
+            if os.path.isfile(documento) and hash_arquivo(tmp) == hash_arquivo(documento):
+                os.remove(tmp)
+            else:
+                os.replace(tmp, documento)
+        else:
+            saida_final = os.path.join(output_folder, "index.html")
+            indice = (_inicio_pagina(BUNDLE_TITULO, "") + _cabecalho(versao, assets, "")
+                      + _sumario(entradas) + _rodape(assets, "") + "</body></html>\n")
+            gravar_se_mudou(saida_final, indice.encode("utf-8"))
+    finally:
+        if corpo is not None:
+            corpo.close()
+
+    if assets.otimizar and not interrompido:
+        interrompido = not otimizar_imagens(imagens, assets.otimizar, modo, workers, should_stop)
+        paginas = [saida_final]
+        if modo_pacote == "site":
+            paginas += [os.path.join(output_folder, relativo) for relativo, _, _ in entradas]
+        imagens.corrigir_paginas(paginas)
+
+    return {"modo": modo_pacote, "saida": saida_final, "notas": len(entradas),
+            "assets": assets.copiados, "bytes_assets": assets.bytes, "interrompido": interrompido}
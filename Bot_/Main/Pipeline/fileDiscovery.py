@@ -0,0 +1,76 @@
+# Main/Pipeline/fileDiscovery.py
+
+import os
+from fnmatch import fnmatch
+
+from config import PASTA_INCLUIR, PASTA_EXCLUIR
+
+# Descoberta recursiva de arquivos .md numa pasta (o vault do Obsidian).
+#
+# A varredura usa os.scandir e é um gerador: quem chama recebe os arquivos
+# à medida que são encontrados, pode agrupá-los em lotes (em_lotes) e
+# interromper a qualquer momento. Os padrões são globs do fnmatch aplicados
+# ao caminho relativo à raiz (com "/") e também ao nome do arquivo/pasta,
+# então "*.md", "rascunhos/*" e ".obsidian" funcionam como esperado.
+
+
+def separar_padroes(texto):
+    """Converte "*.md; rascunhos/*" em ["*.md", "rascunhos/*"]."""
+    return [p.strip() for p in texto.replace(",", ";").split(";") if p.strip()]
+
+
+def _casa(relativo, nome, padroes):
+    return any(fnmatch(relativo, p) or fnmatch(nome, p) for p in padroes)
+
+
+def descobrir_markdown(raiz, incluir=None, excluir=None, should_stop=None):
+    """
+    Gera os caminhos absolutos dos arquivos de `raiz` (recursivamente) que
+    casam com algum padrão de `incluir` e com nenhum de `excluir`. Pastas
+    excluídas nem são visitadas. A ordem é estável: alfabética por pasta.
+    """
+    incluir = PASTA_INCLUIR if incluir is None else incluir
+    excluir = PASTA_EXCLUIR if excluir is None else excluir
+    should_stop = should_stop or (lambda: False)
+    raiz = os.path.abspath(raiz)
+
+    pendentes = [(raiz, "")]
+    while pendentes:
+        if should_stop():
+            return
+        pasta, prefixo = pendentes.pop()
+        try:
+            with os.scandir(pasta) as it:
+                entradas = sorted(it, key=lambda e: e.name.lower())
+        except OSError as e:
+            print(f"[WARN] Pasta ignorada ({e})")
+            continue
+
+        subpastas = []
+        for entrada in entradas:
+            relativo = prefixo + entrada.name
+            try:
+                eh_pasta = entrada.is_dir(follow_symlinks=False)
+                eh_arquivo = not eh_pasta and entrada.is_file()
+            except OSError:
+                continue
+            if _casa(relativo, entrada.name, excluir):
+                continue
+            if eh_pasta:
+                subpastas.append((entrada.path, relativo + "/"))
+            elif eh_arquivo and _casa(relativo, entrada.name, incluir):
+                yield entrada.path
+        # Pilha: empilha ao contrário para visitar as subpastas em ordem alfabética
+        pendentes.extend(reversed(subpastas))
+
+
+def em_lotes(iteravel, tamanho):
+    """Agrupa um iterável em listas de até `tamanho` itens."""
+    lote = []
+    for item in iteravel:
+        lote.append(item)
+        if len(lote) >= tamanho:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
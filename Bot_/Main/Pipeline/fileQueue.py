@@ -0,0 +1,107 @@
+# Main/Pipeline/fileQueue.py
+
+import itertools
+
+# Fila de arquivos da interface. Substitui a lista simples em
+# state['file_queue']: pertinência, posição e troca de vizinhos são O(1)
+# e cada item tem um id estável, que não muda quando a fila é reordenada.
+# Itens vindos de "Adicionar Pasta" guardam também a pasta de origem, usada
+# para manter as subpastas na saída (ver batchProcessor.caminho_saida).
+
+
+class FilaArquivos:
+    def __init__(self, caminhos=()):
+        self._ids = []            # ids na ordem da fila
+        self._posicao = {}        # id -> posição em _ids
+        self._caminhos = {}       # id -> caminho
+        self._por_caminho = {}    # caminho -> id
+        self._raizes = {}         # id -> pasta de origem (só itens vindos de uma pasta)
+        self._contador = itertools.count(1)
+        self.adicionar(caminhos)
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __contains__(self, caminho):
+        return caminho in self._por_caminho
+
+    def __iter__(self):
+        """Caminhos na ordem da fila."""
+        return (self._caminhos[i] for i in self._ids)
+
+    def caminhos(self):
+        """Cópia da fila como lista de caminhos (para entregar a outra thread)."""
+        return [self._caminhos[i] for i in self._ids]
+
+    def raizes(self):
+        """Cópia de {caminho: pasta de origem} dos itens que vieram de uma pasta."""
+        return {self._caminhos[i]: raiz for i, raiz in self._raizes.items()}
+
+    def adicionar(self, caminhos, raiz=None):
+        """Adiciona ao fim os caminhos ainda ausentes; retorna [(id, caminho)] dos novos."""
+        novos = []
+        for caminho in caminhos:
+            if caminho in self._por_caminho:
+                continue
+            item_id = next(self._contador)
+            self._posicao[item_id] = len(self._ids)
+            self._ids.append(item_id)
+            self._caminhos[item_id] = caminho
+            self._por_caminho[caminho] = item_id
+            if raiz is not None:
+                self._raizes[item_id] = raiz
+            novos.append((item_id, caminho))
+        return novos
+
+    def id_de(self, caminho):
+        return self._por_caminho.get(caminho)
+
+    def id_em(self, posicao):
+        return self._ids[posicao]
+
+    def caminho_em(self, posicao):
+        return self._caminhos[self._ids[posicao]]
+
+    def caminho_de(self, item_id):
+        return self._caminhos[item_id]
+
+    def posicao(self, item_id):
+        """Posição atual do item na fila, em O(1)."""
+        return self._posicao[item_id]
+
+    def remover_posicoes(self, posicoes):
+        """Remove vários itens de uma vez (uma única reindexação); retorna os caminhos removidos."""
+        remover = set(posicoes)
+        if not remover:
+            return []
+        removidos = []
+        restantes = []
+        for pos, item_id in enumerate(self._ids):
+            if pos in remover:
+                caminho = self._caminhos.pop(item_id)
+                del self._por_caminho[caminho]
+                del self._posicao[item_id]
+                self._raizes.pop(item_id, None)
+                removidos.append(caminho)
+            else:
+                self._posicao[item_id] = len(restantes)
+                restantes.append(item_id)
+        self._ids = restantes
+        return removidos
+
+    def mover(self, posicao, direcao):
+        """Troca o item com o vizinho (direcao = -1 ou 1). Retorna a nova posição ou None."""
+        nova = posicao + direcao
+        if not (0 <= posicao < len(self._ids) and 0 <= nova < len(self._ids)):
+            return None
+        a, b = self._ids[posicao], self._ids[nova]
+        self._ids[posicao], self._ids[nova] = b, a
+        self._posicao[a], self._posicao[b] = nova, posicao
+        return nova
+
+    def limpar(self):
+        self._ids.clear()
+        self._posicao.clear()
+        self._caminhos.clear()
+        self._por_caminho.clear()
+        self._raizes.clear()
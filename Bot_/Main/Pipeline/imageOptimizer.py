@@ -0,0 +1,221 @@
+# Main/Pipeline/imageOptimizer.py
+
+import os
+import re
+import html
+import time
+import shutil
+import threading
+import importlib.util
+
+from config import IMG_LARGURA_MAX, IMG_FORMATO, IMG_FORMATOS, IMG_QUALIDADE, IMG_PASTA_SAIDA
+from Pipeline.buildCache import hash_arquivo
+from Pipeline.outputWriter import gravar_se_mudou
+from Transformer.imageResolver import resolvedor_padrao
+
+# O Pillow só é importado quando a otimização roda (em otimizar_imagem): este
+# módulo é carregado pelo batchProcessor em toda execução e em cada worker
+PIL_AVAILABLE = importlib.util.find_spec("PIL") is not None
+
+# Etapa opcional de otimização das imagens referenciadas pelas páginas.
+#
+# Os screenshots de Bot_/img_doc costumam ter quase 2000px de largura, mas
+# são exibidos com max-width:1200px. Com a etapa ligada, o transformer
+# continua igual; depois dele cada <img> com cópia local passa a apontar para
+# <saída>/imagens/<hash do conteúdo>-<largura>q<qualidade>.<ext>, e as cópias
+# são geradas com Pillow em paralelo ao final do lote (otimizar_imagens, em
+# batchProcessor). Como o nome depende só do conteúdo e das opções, uma
+# imagem usada por várias páginas é processada uma vez, e nas execuções
+# seguintes as cópias que já existem na pasta de saída são reaproveitadas.
+#
+# Se o Pillow falhar, a cópia otimizada não é criada: o original vai para
+# <hash><ext original> e as páginas passam a apontar para ele
+# (corrigir_paginas). Como o nome otimizado continua faltando, a próxima
+# execução tenta de novo.
+
+EXTENSOES = {"webp": ".webp", "jpeg": ".jpg", "png": ".png"}
+FORMATOS_PIL = {".png": "PNG", ".jpg": "JPEG", ".jpeg": "JPEG", ".webp": "WEBP"}
+OPCOES_SAVE = {
+    "WEBP": lambda qualidade: {"quality": qualidade, "method": 4},
+    "JPEG": lambda qualidade: {"quality": qualidade, "optimize": True, "progressive": True},
+    "PNG": lambda qualidade: {"optimize": True},
+}
+
+_IMG_SRC = re.compile(r'(<img\b[^>]*?\bsrc=")([^"]*)(")')
+
+# Hash de cada imagem por (caminho, mtime, tamanho), por processo: a mesma
+# imagem aparece em várias páginas convertidas pelo mesmo worker.
+_hashes = {}
+_hashes_lock = threading.Lock()
+
+
+def hash_imagem(path):
+    st = os.stat(path)
+    chave = (os.path.abspath(path), st.st_mtime_ns, st.st_size)
+    with _hashes_lock:
+        h = _hashes.get(chave)
+    if h is None:
+        h = hash_arquivo(path)
+        with _hashes_lock:
+            _hashes[chave] = h
+    return h
+
+
+class OtimizadorImagens:
+    """
+    Opções da otimização e contadores da execução. É repassado aos workers
+    (precisa ser "picklable"); os contadores só mudam no processo principal.
+    """
+
+    def __init__(self, largura=IMG_LARGURA_MAX, formato=IMG_FORMATO, qualidade=IMG_QUALIDADE, pasta=IMG_PASTA_SAIDA):
+        if not PIL_AVAILABLE:
+            raise RuntimeError("A otimização de imagens requer o Pillow (pip install Pillow).")
+        if formato not in IMG_FORMATOS:
+            raise ValueError(f"Formato de imagem inválido: {formato!r} (use {', '.join(IMG_FORMATOS)})")
+        self.largura = largura
+        self.formato = formato
+        self.qualidade = qualidade
+        self.pasta = pasta
+        self.processadas = 0
+        self.em_cache = 0
+        self.erros = []
+        self.substitutos = {}  # cópia otimizada que falhou -> cópia do original
+        self.bytes_origem = 0
+        self.bytes_destino = 0
+
+    def assinatura(self):
+        """Opções que mudam o resultado (entra na impressão digital do manifesto de build)."""
+        return f"{self.largura}w-{self.formato}-q{self.qualidade}"
+
+    def local(self, src):
+        """Caminho local de uma imagem de IMG_DIRS_LOCAIS que o Pillow sabe gravar, ou None."""
+        local = resolvedor_padrao().local_ou_url(src)
+        if local == src or os.path.splitext(local)[1].lower() not in FORMATOS_PIL:
+            return None
+        return local
+
+    def nome(self, origem):
+        """Nome da cópia otimizada: hash do conteúdo + opções."""
+        ext = os.path.splitext(origem)[1].lower()
+        if self.formato != "original":
+            ext = EXTENSOES[self.formato]
+        return f"{hash_imagem(origem)[:16]}-{self.largura}q{self.qualidade}{ext}"
+
+    def reescrever(self, html_content, pagina, output_folder):
+        """
+        Aponta os <img> com cópia local para <output_folder>/<pasta>, com
+        caminho relativo à `pagina`. Retorna o HTML e {destino: origem} das
+        cópias referenciadas.
+        """
+        pendentes = {}
+        pasta = os.path.join(os.path.abspath(output_folder), self.pasta)
+        base = os.path.dirname(os.path.abspath(pagina))
+
+        def trocar(m):
+            origem = self.local(html.unescape(m.group(2)))
+            if origem is None:
+                return m.group(0)
+            destino = os.path.join(pasta, self.nome(origem))
+            pendentes[destino] = origem
+            return m.group(1) + html.escape(os.path.relpath(destino, base).replace(os.sep, "/")) + m.group(3)
+
+        return _IMG_SRC.sub(trocar, html_content), pendentes
+
+    def faltantes(self, pendentes):
+        """As cópias de `pendentes` que ainda não existem; as demais contam como cache."""
+        novos = {destino: origem for destino, origem in pendentes.items() if not os.path.exists(destino)}
+        self.em_cache += len(pendentes) - len(novos)
+        return novos
+
+    def registrar(self, resultado):
+        if resultado["ok"]:
+            # Otimizada desta vez: as páginas podem voltar para a cópia otimizada
+            self.substitutos.pop(resultado["destino"], None)
+            self.processadas += 1
+            self.bytes_origem += resultado["bytes_origem"]
+            self.bytes_destino += resultado["bytes_destino"]
+        else:
+            self.erros.append(f"{resultado['origem']}: {resultado['erro']}")
+            if resultado.get("substituto"):
+                self.substitutos[resultado["destino"]] = resultado["substituto"]
+
+    def corrigir_paginas(self, paginas):
+        """
+        Nas `paginas` (caminhos dos .html), troca o nome das cópias otimizadas
+        que falharam pelo da cópia do original, na mesma pasta. Os nomes são
+        hashes, então a troca direta no texto não pega outra coisa.
+        """
+        trocas = {os.path.basename(d): os.path.basename(s) for d, s in self.substitutos.items()}
+        if not trocas:
+            return
+        for pagina in paginas:
+            try:
+                with open(pagina, "r", encoding="utf-8") as f:
+                    texto = f.read()
+            except OSError:
+                continue
+            for otimizado, original in trocas.items():
+                texto = texto.replace(otimizado, original)
+            gravar_se_mudou(pagina, texto.encode("utf-8"))
+
+    def resumo(self):
+        return {
+            "opcoes": self.assinatura(),
+            "processadas": self.processadas,
+            "em_cache": self.em_cache,
+            "erros": len(self.erros),
+            "bytes_origem": self.bytes_origem,
+            "bytes_destino": self.bytes_destino,
+        }
+
+
+def otimizar_imagem(origem, destino, largura=IMG_LARGURA_MAX, qualidade=IMG_QUALIDADE):
+    """
+    Grava em `destino` a imagem `origem` reduzida para no máximo `largura`
+    pixels e recomprimida no formato da extensão de `destino`. Roda nos
+    workers e nunca levanta exceção: se o Pillow falhar, o original é copiado
+    para <hash><ext original> ao lado de `destino`, que vai no resultado em
+    `substituto` junto com o erro (ver corrigir_paginas).
+    """
+    inicio = time.perf_counter()
+    resultado = {"origem": origem, "destino": destino, "ok": False, "erro": None,
+                 "bytes_origem": 0, "bytes_destino": 0}
+    tmp = f"{destino}.{os.getpid()}.tmp"
+    try:
+        resultado["bytes_origem"] = os.path.getsize(origem)
+        os.makedirs(os.path.dirname(destino), exist_ok=True)
+        try:
+            from PIL import Image
+            formato = FORMATOS_PIL[os.path.splitext(destino)[1].lower()]
+            with Image.open(origem) as img:
+                img.load()
+                if img.width > largura:
+                    img = img.resize((largura, max(1, round(img.height * largura / img.width))), Image.LANCZOS)
+                if formato == "JPEG" and img.mode not in ("RGB", "L"):
+                    rgba = img.convert("RGBA")
+                    img = Image.new("RGB", rgba.size, (255, 255, 255))
+                    img.paste(rgba, mask=rgba.getchannel("A"))
+                elif formato == "WEBP" and img.mode not in ("RGB", "RGBA"):
+                    img = img.convert("RGBA")
+                img.save(tmp, format=formato, **OPCOES_SAVE[formato](qualidade))
+            # Mesmo formato e já pequena: a recompressão pode sair maior que o original
+            if FORMATOS_PIL.get(os.path.splitext(origem)[1].lower()) == formato \
+                    and os.path.getsize(tmp) >= resultado["bytes_origem"]:
+                shutil.copyfile(origem, tmp)
+            resultado["ok"] = True
+        except Exception as e:
+            # Nada em `destino`: um original com o nome da cópia otimizada
+            # contaria como cache para sempre (e um PNG chamado .webp)
+            resultado["erro"] = str(e)
+            hash_nome = os.path.basename(destino).split("-", 1)[0]
+            destino = os.path.join(os.path.dirname(destino), hash_nome + os.path.splitext(origem)[1].lower())
+            resultado["substituto"] = destino
+            shutil.copyfile(origem, tmp)
+        os.replace(tmp, destino)
+        resultado["bytes_destino"] = os.path.getsize(destino)
+    except OSError as e:
+        resultado.update(ok=False, erro=str(e))
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    resultado["duracao"] = time.perf_counter() - inicio
+    return resultado
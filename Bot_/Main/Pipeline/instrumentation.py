@@ -0,0 +1,143 @@
+# Main/Pipeline/instrumentation.py
+
+import os
+import io
+import sys
+import time
+import pstats
+import threading
+import cProfile
+import tracemalloc
+from contextlib import contextmanager
+
+from config import PERFIL_ARQUIVO
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+# Medições da conversão de um arquivo: tempo de cada etapa, pico de memória
+# do processo que o converteu (não do arquivo: num worker reaproveitado o
+# valor só cresce) e, opcionalmente, um perfil completo (cProfile + tracemalloc)
+# de um único arquivo, escolhido em config.PERFIL_ARQUIVO ou pela variável
+# de ambiente EORBIS_PERFIL: o nome do .md (ex.: "Instalacao.md") ou o
+# caminho dele relativo à pasta de origem (ex.: "Guia/Instalacao.md").
+#
+# tracemalloc e o cProfile valem para o processo inteiro: dois perfis ao
+# mesmo tempo se atrapalham. Por isso processar_lote converte o arquivo
+# perfilado sozinho, antes do pool, e perfilar() ainda roda sob um lock.
+
+ETAPAS = ("leitura", "markdown", "transformacao", "indexacao", "escrita")
+
+
+class Cronometro:
+    """Acumula o tempo (s) de cada etapa: `with cron.etapa("markdown"): ...`."""
+
+    def __init__(self):
+        self.etapas = {}
+
+    @contextmanager
+    def etapa(self, nome):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.etapas[nome] = self.etapas.get(nome, 0.0) + time.perf_counter() - inicio
+
+
+def memoria_pico_processo():
+    """Pico de memória residente do processo atual, em bytes (None se indisponível)."""
+    if resource is not None:
+        pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux informa em KiB; macOS, em bytes
+        return pico if sys.platform == "darwin" else pico * 1024
+    if psutil is not None:
+        info = psutil.Process().memory_info()
+        return getattr(info, "peak_wset", None) or info.rss
+    return None
+
+
+def arquivo_perfilado():
+    """Nome ou caminho relativo do .md a perfilar (EORBIS_PERFIL tem prioridade), ou None."""
+    return os.environ.get("EORBIS_PERFIL") or PERFIL_ARQUIVO
+
+
+def _relativo(file_path, raiz):
+    """Caminho de `file_path` relativo a `raiz` (ou só o nome), com "/"."""
+    relativo = os.path.relpath(file_path, raiz) if raiz else os.path.basename(file_path)
+    return relativo.replace("\\", "/")
+
+
+def deve_perfilar(file_path, raiz=None):
+    """True se o alvo é o nome de `file_path`, o caminho relativo a `raiz` ou o caminho inteiro."""
+    alvo = arquivo_perfilado()
+    if not alvo:
+        return False
+    alvo = alvo.replace("\\", "/")
+    caminho = file_path.replace("\\", "/")
+    return alvo in (caminho, caminho.rsplit("/", 1)[-1], _relativo(file_path, raiz))
+
+
+_perfil_lock = threading.Lock()
+
+
+def perfilar(func, file_path, pasta, raiz=None):
+    """
+    Executa `func()` sob cProfile e tracemalloc e grava em `pasta`:
+    <nome>.prof (abrir com pstats/snakeviz), <nome>.perfil.txt (funções
+    mais caras) e <nome>.memoria.txt (linhas que mais alocaram), com o
+    caminho relativo a `raiz` no nome ("Guia/Instalacao.md" vira
+    "Guia__Instalacao"). Retorna o resultado de `func()`, com `perfil` (o
+    caminho do .prof) ou, se o perfil falhou, `erro_perfil`: a conversão
+    em si nunca falha por causa do perfil.
+    """
+    nome = os.path.splitext(_relativo(file_path, raiz))[0].replace("/", "__")
+    with _perfil_lock:
+        perfil = cProfile.Profile()
+        # Com PYTHONTRACEMALLOC o rastreamento já está ligado: não desligar o dos outros
+        ja_rastreando = tracemalloc.is_tracing()
+        if not ja_rastreando:
+            tracemalloc.start()
+        try:
+            try:
+                perfil.enable()
+            except ValueError as e:  # outro profiler ativo no processo
+                resultado = func()
+                resultado["erro_perfil"] = str(e)
+                return resultado
+            try:
+                resultado = func()
+            finally:
+                perfil.disable()
+            try:
+                snapshot = tracemalloc.take_snapshot()
+                _, pico = tracemalloc.get_traced_memory()
+            except RuntimeError as e:
+                resultado["erro_perfil"] = str(e)
+                return resultado
+        finally:
+            if not ja_rastreando:
+                tracemalloc.stop()
+
+    base = os.path.join(pasta, nome)
+    try:
+        os.makedirs(pasta, exist_ok=True)
+        perfil.dump_stats(base + ".prof")
+        texto = io.StringIO()
+        pstats.Stats(perfil, stream=texto).sort_stats("cumulative").print_stats(40)
+        with open(base + ".perfil.txt", "w", encoding="utf-8") as f:
+            f.write(texto.getvalue())
+        with open(base + ".memoria.txt", "w", encoding="utf-8") as f:
+            f.write(f"Pico alocado pelo Python durante a conversão: {pico / 1024:.1f} KiB\n\n")
+            for estatistica in snapshot.statistics("lineno")[:25]:
+                f.write(f"{estatistica}\n")
+        resultado["perfil"] = base + ".prof"
+    except Exception as e:
+        resultado["erro_perfil"] = str(e)
+    return resultado
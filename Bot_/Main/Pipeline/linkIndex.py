@@ -0,0 +1,256 @@
+# Main/Pipeline/linkIndex.py
+
+import os
+import re
+import json
+import posixpath
+import unicodedata
+
+from config import LINKS_INDICE
+from Pipeline.batchProcessor import caminho_saida
+from Pipeline.outputWriter import gravar_se_mudou
+from Transformer.markdownConverter import ancora_titulo
+
+# Índice dos links entre notas do Obsidian ([[Nota]], [[Nota#Título]],
+# [[pasta/Nota|texto]]), gravado na pasta de saída.
+#
+# Antes da conversão, processar_lote passa uma vez pela fila: de cada .md
+# saem o nome, os aliases do frontmatter e os ids dos títulos, guardados
+# junto com o .html que ele gera. Nas execuções seguintes só são relidas as
+# notas cujo .md mudou (mtime/tamanho); as de execuções anteriores continuam
+# valendo enquanto o .md existir. Para os workers vai só o MapaLinks, com
+# dicionários nome -> saídas e saída -> ids, e cada [[link]] é resolvido com
+# uma consulta a eles, sem reler outras notas.
+
+FORMATO_INDICE = 1
+
+_CERCA = re.compile(r'^[ ]{0,3}(`{3,}|~{3,})')
+# Os mesmos títulos que o markdown2 reconhece (ATX e sublinhado)
+_TITULO_ATX = re.compile(r'^(#{1,6})[ \t]*(.+?)[ \t]*(?<!\\)#*$')
+_SUBLINHADO = re.compile(r'^(=+|-+)[ \t]*$')
+_FRONTMATTER = re.compile(r'\A---[ \t]*\n(.*?)\n---[ \t]*(?:\n|\Z)', re.S)
+_ALIASES = re.compile(r'^(?:aliases|alias)[ \t]*:[ \t]*(.*)$')
+_ITEM_YAML = re.compile(r'^[ \t]*-[ \t]+(.*)$')
+
+
+def chave_nota(nome):
+    """Forma normalizada de um nome ou caminho de nota usada nas consultas."""
+    nome = unicodedata.normalize("NFC", nome.replace("\\", "/").strip().strip("/"))
+    if nome.lower().endswith(".md"):
+        nome = nome[:-3]
+    return nome.casefold()
+
+
+def _sem_aspas(valor):
+    valor = valor.strip()
+    if len(valor) >= 2 and valor[0] == valor[-1] and valor[0] in "'\"":
+        valor = valor[1:-1]
+    return valor.strip()
+
+
+def _aliases(frontmatter):
+    """aliases (ou alias) do frontmatter: "a", "[a, b]" ou uma lista com "- a"."""
+    linhas = frontmatter.splitlines()
+    for i, linha in enumerate(linhas):
+        m = _ALIASES.match(linha)
+        if not m:
+            continue
+        valor = m.group(1).strip()
+        if valor.startswith("[") and valor.endswith("]"):
+            itens = valor[1:-1].split(",")
+        elif valor:
+            itens = [valor]
+        else:
+            itens = []
+            for seguinte in linhas[i + 1:]:
+                item = _ITEM_YAML.match(seguinte)
+                if not item:
+                    break
+                itens.append(item.group(1))
+        return [alias for alias in map(_sem_aspas, itens) if alias]
+    return []
+
+
+def ler_nota(path):
+    """{"aliases": [...], "ancoras": [...]} de um .md (ids dos títulos como em markdownConverter)."""
+    with open(path, "r", encoding="utf-8") as f:
+        texto = f.read()
+    aliases = []
+    m = _FRONTMATTER.match(texto)
+    if m:
+        aliases = _aliases(m.group(1))
+        texto = texto[m.end():]
+
+    ancoras = set()
+    cerca = None
+    anterior = ""
+    for linha in texto.splitlines():
+        m = _CERCA.match(linha)
+        if cerca is not None:
+            if m and m.group(1)[0] == cerca[0] and len(m.group(1)) >= len(cerca):
+                cerca = None
+        elif m:
+            cerca = m.group(1)
+        elif linha.startswith("#"):
+            titulo = _TITULO_ATX.match(linha)
+            if titulo:
+                ancoras.add(ancora_titulo(titulo.group(2)))
+        elif anterior.strip() and not anterior.startswith("#") and _SUBLINHADO.match(linha):
+            ancoras.add(ancora_titulo(anterior.strip()))
+        anterior = linha if cerca is None else ""
+    return {"aliases": aliases, "ancoras": sorted(ancoras)}
+
+
+class MapaLinks:
+    """
+    A parte do índice usada na conversão: nome -> saídas e saída -> ids dos
+    títulos, com as saídas relativas à pasta de saída. Vai para os workers
+    (só dicionários e tuplas, "picklable").
+    """
+
+    __slots__ = ("notas", "ancoras")
+
+    def __init__(self, notas, ancoras):
+        self.notas = notas
+        self.ancoras = ancoras
+
+    def destino(self, nota, pagina, ancora=None):
+        """
+        Saída da nota `nota` (que tenha o título `ancora`, se informado). Com
+        nomes repetidos, a da pasta de `pagina` ou a primeira.
+        """
+        destinos = self.notas.get(chave_nota(nota), ())
+        if ancora is not None:
+            destinos = [destino for destino in destinos if ancora in self.ancoras.get(destino, ())]
+        if not destinos:
+            return None
+        if len(destinos) > 1:
+            pasta = posixpath.dirname(pagina)
+            for destino in destinos:
+                if posixpath.dirname(destino) == pasta:
+                    return destino
+        return destinos[0]
+
+    def href(self, alvo, pagina):
+        """href de [[alvo]] ("Nota", "Nota#Título" ou "#Título") em `pagina`, ou None se quebrado."""
+        nota, _, titulo = alvo.partition("#")
+        titulo = titulo.rsplit("#", 1)[-1].strip()
+        # "#^bloco": os blocos não têm id, o link vai para a página
+        ancora = ancora_titulo(titulo) if titulo and not titulo.startswith("^") else None
+        if nota.strip():
+            destino = self.destino(nota, pagina, ancora)
+        else:
+            destino = pagina if ancora is None or ancora in self.ancoras.get(pagina, ()) else None
+        if destino is None:
+            return None
+        fragmento = "#" + ancora if ancora else ""
+        if destino == pagina:
+            return fragmento or posixpath.basename(pagina)
+        return posixpath.relpath(destino, posixpath.dirname(pagina) or ".") + fragmento
+
+    def para_pagina(self, pagina, registro):
+        """A função links(alvo) de markdown_para_html para `pagina`; anota {alvo: href} em `registro`."""
+        def links(alvo):
+            href = registro[alvo] = self.href(alvo, pagina)
+            return href
+        return links
+
+
+class IndiceLinks:
+    """Índice persistente de notas, aliases e títulos de uma pasta de saída, e os links da execução."""
+
+    def __init__(self, output_folder):
+        self.output_folder = output_folder
+        self.path = os.path.join(output_folder, LINKS_INDICE)
+        self.entradas = {}
+        self.lidas = 0
+        self.resolvidos = 0
+        self.quebrados = []
+        self._carregar()
+
+    def _carregar(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                dados = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            print(f"[WARN] Índice de links ilegível, reconstruindo: {e}")
+            return
+        if dados.get("formato") == FORMATO_INDICE:
+            self.entradas = dados.get("notas", {})
+
+    def _chave(self, destino):
+        return os.path.relpath(destino, self.output_folder).replace(os.sep, "/")
+
+    def atualizar(self, arquivos, raizes=None):
+        """
+        Atualiza o índice com os arquivos da fila e retorna o MapaLinks. Só
+        são relidas as notas novas ou alteradas; as que já estavam no índice
+        saem dele quando o .md deixa de existir.
+        """
+        raizes = raizes or {}
+        origens = {chave: entrada["origem"] for chave, entrada in self.entradas.items()}
+        for file_path in arquivos:
+            destino = caminho_saida(file_path, self.output_folder, raizes.get(file_path))
+            origens[self._chave(destino)] = os.path.abspath(file_path)
+
+        for chave, origem in origens.items():
+            try:
+                st = os.stat(origem)
+            except OSError:
+                self.entradas.pop(chave, None)
+                continue
+            anterior = self.entradas.get(chave)
+            if anterior and anterior["origem"] == origem and anterior["mtime"] == st.st_mtime_ns \
+                    and anterior["tamanho"] == st.st_size:
+                continue
+            try:
+                nota = ler_nota(origem)
+            except (OSError, UnicodeDecodeError):
+                self.entradas.pop(chave, None)  # o worker reporta o erro de leitura
+                continue
+            self.entradas[chave] = dict(origem=origem, mtime=st.st_mtime_ns, tamanho=st.st_size, **nota)
+            self.lidas += 1
+        return self.mapa()
+
+    def mapa(self):
+        """MapaLinks das notas do índice: nome, caminho (e seus finais) e aliases -> saídas."""
+        notas = {}
+        ancoras = {}
+        for chave in sorted(self.entradas):
+            entrada = self.entradas[chave]
+            partes = posixpath.splitext(chave)[0].split("/")
+            nomes = {"/".join(partes[i:]) for i in range(len(partes))}
+            nomes.update(entrada["aliases"])
+            for nome in {chave_nota(nome) for nome in nomes}:
+                notas.setdefault(nome, []).append(chave)
+            ancoras[chave] = frozenset(entrada["ancoras"])
+        return MapaLinks({nome: tuple(destinos) for nome, destinos in notas.items()}, ancoras)
+
+    def registrar(self, resultado):
+        """Conta os links resolvidos e guarda os quebrados de uma página convertida (ou pulada)."""
+        if not resultado["ok"]:
+            return
+        for alvo, href in (resultado.get("links") or {}).items():
+            if href is None:
+                self.quebrados.append((resultado["arquivo"], alvo))
+            else:
+                self.resolvidos += 1
+
+    def resumo(self):
+        return {
+            "notas": len(self.entradas),
+            "lidas": self.lidas,
+            "resolvidos": self.resolvidos,
+            "quebrados": len(self.quebrados),
+        }
+
+    def salvar(self):
+        # Os shards de um build dividido gravam o mesmo índice (montado com a
+        # fila inteira) na mesma pasta: temporário por processo e nada a
+        # gravar se não mudou
+        os.makedirs(self.output_folder, exist_ok=True)
+        dados = {"formato": FORMATO_INDICE, "notas": self.entradas}
+        texto = json.dumps(dados, ensure_ascii=False, indent=1, sort_keys=True)
+        gravar_se_mudou(self.path, texto.encode("utf-8"))
@@ -0,0 +1,112 @@
+# Main/Pipeline/outputWriter.py
+
+import os
+import hashlib
+import threading
+
+from Pipeline.buildCache import hash_arquivo
+
+# Escrita das saídas do lote (páginas e índice de busca).
+#
+# Uma saída só é regravada se o conteúdo mudou: o hash do conteúdo novo é
+# comparado com o do arquivo existente (que só é lido se o tamanho for o
+# mesmo). Assim o mtime das páginas iguais não muda e a sincronização com o
+# servidor de documentação só envia o que mudou. A gravação vai para um
+# temporário na mesma pasta e entra no lugar com os.replace, então uma
+# execução interrompida nunca deixa uma página pela metade. As pastas são
+# criadas pelo processo principal antes do lote, uma vez cada
+# (GravadorSaida.preparar_pastas), e não a cada arquivo nos workers.
+
+
+def hash_conteudo(dados):
+    """SHA-256 de `dados` (bytes), no mesmo formato de buildCache.hash_arquivo."""
+    return hashlib.sha256(dados).hexdigest()
+
+
+def gravar_se_mudou(path, dados):
+    """
+    Grava `dados` (bytes) em `path` se o arquivo não existir ou tiver outro
+    conteúdo. Retorna (gravado, hash do conteúdo). A pasta já deve existir;
+    se tiver sido apagada durante a execução, é recriada.
+    """
+    novo = hash_conteudo(dados)
+    try:
+        if os.path.getsize(path) == len(dados) and hash_arquivo(path) == novo:
+            return False, novo
+    except OSError:
+        pass
+
+    pasta, nome = os.path.split(os.path.abspath(path))
+    tmp = os.path.join(pasta, f".{nome}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        f = open(tmp, "wb")
+    except FileNotFoundError:
+        os.makedirs(pasta, exist_ok=True)
+        f = open(tmp, "wb")
+    try:
+        with f:
+            f.write(dados)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+    return True, novo
+
+
+class GravadorSaida:
+    """
+    Contadores de uma execução (gravados, inalterados, removidos) e as
+    operações feitas no processo principal: criar as pastas e remover saídas.
+    """
+
+    def __init__(self):
+        self.gravados = 0
+        self.inalterados = 0
+        self.removidos = []
+        self._pastas = set()
+        self._lock = threading.Lock()
+
+    def preparar_pastas(self, destinos):
+        """Cria as pastas de `destinos` que esta execução ainda não criou."""
+        for pasta in {os.path.dirname(os.path.abspath(destino)) for destino in destinos}:
+            if pasta not in self._pastas:
+                os.makedirs(pasta, exist_ok=True)
+                self._pastas.add(pasta)
+
+    def _contar(self, gravado):
+        with self._lock:
+            if gravado:
+                self.gravados += 1
+            else:
+                self.inalterados += 1
+
+    def gravar(self, path, dados):
+        """gravar_se_mudou no processo principal, com a pasta criada uma vez e a contagem."""
+        self.preparar_pastas([path])
+        gravado, _ = gravar_se_mudou(path, dados)
+        self._contar(gravado)
+        return gravado
+
+    def registrar(self, resultado):
+        """Conta a página de um resultado de converter_arquivo (as puladas não passam pela escrita)."""
+        if resultado["ok"] and not resultado["pulado"] and "gravado" in resultado:
+            self._contar(resultado["gravado"])
+
+    def remover(self, paths):
+        """Apaga as saídas `paths` que existirem; retorna as apagadas."""
+        apagados = []
+        for path in paths:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                continue
+            apagados.append(path)
+        with self._lock:
+            self.removidos.extend(apagados)
+        return apagados
+
+    def resumo(self):
+        return {"gravados": self.gravados, "inalterados": self.inalterados, "removidos": len(self.removidos)}
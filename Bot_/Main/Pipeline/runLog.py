@@ -0,0 +1,61 @@
+# Main/Pipeline/runLog.py
+
+import os
+import json
+import glob
+import threading
+from datetime import datetime
+
+from config import LOGS_DIR, LOG_EXECUCOES_MANTER
+
+# Log estruturado de uma execução da fila: um arquivo JSON lines em Logs/
+# (execucao-AAAAMMDD-HHMMSS.jsonl) com um registro de início, um por
+# arquivo convertido (com o tempo gasto) e um resumo final. O log da
+# interface mostra só as últimas linhas; este arquivo guarda tudo.
+
+
+class LogExecucao:
+    def __init__(self, pasta=LOGS_DIR, prefixo="execucao", manter=LOG_EXECUCOES_MANTER):
+        os.makedirs(pasta, exist_ok=True)
+        self._limpar_antigos(pasta, prefixo, manter)
+        carimbo = datetime.now().strftime("%Y%m%d-%H%M%S")
+        self.path = os.path.join(pasta, f"{prefixo}-{carimbo}.jsonl")
+        self._lock = threading.Lock()
+        self._f = open(self.path, "a", encoding="utf-8")
+
+    @staticmethod
+    def _limpar_antigos(pasta, prefixo, manter):
+        # O nome tem a data em ordem lexicográfica: os primeiros são os mais antigos
+        antigos = sorted(glob.glob(os.path.join(pasta, f"{prefixo}-*.jsonl")))
+        for path in antigos[:max(0, len(antigos) - manter + 1)]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def registrar(self, evento, **campos):
+        """Grava um registro {"ts", "evento", ...campos} (seguro entre threads)."""
+        registro = {"ts": datetime.now().isoformat(timespec="milliseconds"), "evento": evento}
+        registro.update(campos)
+        linha = json.dumps(registro, ensure_ascii=False, default=str)
+        with self._lock:
+            if self._f is not None:
+                self._f.write(linha + "\n")
+
+    def arquivo(self, resultado):
+        """Registro de um resultado de batchProcessor.converter_arquivo (sem os termos do índice de busca)."""
+        self.registrar("arquivo", **{k: v for k, v in resultado.items() if k != "busca"})
+
+    def fechar(self, **resumo):
+        self.registrar("fim", **resumo)
+        with self._lock:
+            if self._f is not None:
+                self._f.close()
+                self._f = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        if self._f is not None:
+            self.fechar(interrompido=exc[0] is not None)
@@ -0,0 +1,162 @@
+# Main/Pipeline/runReport.py
+
+import os
+import json
+from datetime import datetime
+
+from config import RELATORIO_ARQUIVO, RELATORIO_MAIS_LENTOS, RELATORIO_PASTA
+from Pipeline.instrumentation import ETAPAS, memoria_pico_processo
+
+# Relatório de uma execução da fila, montado a partir dos resultados de
+# batchProcessor.converter_arquivo: totais e percentis do tempo de cada
+# etapa, bytes lidos/gravados, pico de memória do maior processo e os
+# arquivos mais lentos.
+# Gravado como JSON na pasta de saída (ou em config.RELATORIO_PASTA);
+# `formatar` gera o texto para a GUI e para o cli.py.
+
+PERCENTIS = (50, 90, 99)
+
+
+def percentil(valores_ordenados, p):
+    """Percentil `p` (0-100) por interpolação linear; 0.0 para lista vazia."""
+    if not valores_ordenados:
+        return 0.0
+    posicao = (len(valores_ordenados) - 1) * p / 100
+    base = int(posicao)
+    proximo = min(base + 1, len(valores_ordenados) - 1)
+    return valores_ordenados[base] + (valores_ordenados[proximo] - valores_ordenados[base]) * (posicao - base)
+
+
+def _estatisticas(valores):
+    valores = sorted(valores)
+    estat = {"total": sum(valores), "max": valores[-1] if valores else 0.0}
+    estat.update({f"p{p}": percentil(valores, p) for p in PERCENTIS})
+    return estat
+
+
+class RelatorioExecucao:
+    def __init__(self, mais_lentos=RELATORIO_MAIS_LENTOS):
+        self.mais_lentos = mais_lentos
+        self.convertidos = []
+        self.pulados = 0
+        self.erros = []
+
+    def adicionar(self, resultado):
+        if resultado["pulado"]:
+            self.pulados += 1
+        elif resultado["ok"]:
+            self.convertidos.append(resultado)
+        else:
+            self.erros.append(resultado["arquivo"])
+
+    def gerar(self, duracao, **extras):
+        """Dicionário do relatório; `duracao` é o tempo de parede da execução (s)."""
+        convertidos = self.convertidos
+        # Pico por processo (o desta execução e o de cada worker), não por arquivo
+        picos = [r["memoria_processo"] for r in convertidos if r.get("memoria_processo")]
+        picos.append(memoria_pico_processo() or 0)
+        bytes_entrada = sum(r.get("bytes_entrada", 0) for r in convertidos)
+        lentos = sorted(convertidos, key=lambda r: r["duracao"], reverse=True)[:self.mais_lentos]
+
+        relatorio = {
+            "gerado_em": datetime.now().isoformat(timespec="seconds"),
+            "duracao": duracao,
+            "arquivos": {
+                "convertidos": len(convertidos),
+                "pulados": self.pulados,
+                "erros": len(self.erros),
+            },
+            "arquivos_por_segundo": len(convertidos) / duracao if duracao > 0 else None,
+            "bytes": {
+                "entrada": bytes_entrada,
+                "saida": sum(r.get("bytes_saida", 0) for r in convertidos),
+                "entrada_por_segundo": bytes_entrada / duracao if duracao > 0 else None,
+            },
+            "memoria_pico_processo": max(picos) or None,
+            "tempo_por_arquivo": _estatisticas([r["duracao"] for r in convertidos]),
+            "etapas": {
+                etapa: _estatisticas([r.get("etapas", {}).get(etapa, 0.0) for r in convertidos])
+                for etapa in ETAPAS
+            },
+            "mais_lentos": [
+                {"arquivo": r["arquivo"], "duracao": r["duracao"], "etapas": r.get("etapas", {}),
+                 "bytes_entrada": r.get("bytes_entrada", 0)}
+                for r in lentos
+            ],
+            "com_erro": self.erros,
+        }
+        relatorio.update(extras)
+        return relatorio
+
+    @staticmethod
+    def salvar(relatorio, output_folder):
+        """Grava o relatório em `output_folder` (ou em RELATORIO_PASTA) e retorna o caminho."""
+        pasta = RELATORIO_PASTA or output_folder
+        os.makedirs(pasta, exist_ok=True)
+        path = os.path.join(pasta, RELATORIO_ARQUIVO)
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(relatorio, f, ensure_ascii=False, indent=1)
+        os.replace(tmp, path)
+        return path
+
+
+def _ms(segundos):
+    return f"{segundos * 1000:.1f} ms"
+
+
+def _mb(n):
+    return f"{n / (1024 * 1024):.1f} MB" if n else "—"
+
+
+def formatar(relatorio):
+    """Resumo do relatório em texto (uma tabela por etapa e os arquivos mais lentos)."""
+    arquivos = relatorio["arquivos"]
+    por_segundo = relatorio["arquivos_por_segundo"]
+    linhas = [
+        f"Duração: {relatorio['duracao']:.2f}s • convertidos: {arquivos['convertidos']} • "
+        f"pulados: {arquivos['pulados']} • erros: {arquivos['erros']}"
+        + (f" • {por_segundo:.1f} arquivos/s" if por_segundo else ""),
+        f"Entrada: {_mb(relatorio['bytes']['entrada'])} • saída: {_mb(relatorio['bytes']['saida'])} • "
+        f"pico de memória do processo: {_mb(relatorio['memoria_pico_processo'])}",
+    ]
+    imagens = relatorio.get("imagens")
+    if imagens:
+        linhas.append(f"Imagens ({imagens['opcoes']}): {imagens['processadas']} otimizadas, "
+                      f"{imagens['em_cache']} do cache, {imagens['erros']} com erro • "
+                      f"{_mb(imagens['bytes_origem'])} → {_mb(imagens['bytes_destino'])}")
+    links = relatorio.get("links")
+    if links:
+        linhas.append(f"Links entre notas: {links['resolvidos']} resolvidos, {links['quebrados']} quebrados • "
+                      f"índice com {links['notas']} nota(s), {links['lidas']} relida(s)")
+    busca = relatorio.get("busca")
+    if busca:
+        linhas.append(f"Busca: {busca['paginas']} página(s), {busca['secoes']} seções, {busca['termos']} termos "
+                      f"em {busca['shards']} arquivo(s) • {_mb(busca['bytes'])}")
+    saidas = relatorio.get("saidas")
+    if saidas:
+        linhas.append(f"Saídas: {saidas['gravados']} gravada(s), {saidas['inalterados']} inalterada(s), "
+                      f"{saidas['removidos']} removida(s)")
+    shards = relatorio.get("shards")
+    if shards:
+        linhas.append(f"Shards: {shards['mesclados']} de {shards['total']} mesclados • "
+                      f"tempo somado: {shards['tempo_somado']:.2f}s (duração acima: a do mais lento)")
+    mesclagem = relatorio.get("mesclagem")
+    if mesclagem:
+        linhas.append(f"Mesclagem: {len(mesclagem['problemas'])} problema(s), {len(mesclagem['faltando'])} "
+                      f"saída(s) faltando, {len(mesclagem['duplicadas'])} duplicada(s)")
+    linhas += [
+        "",
+        f"{'etapa':<15}{'total':>12}" + "".join(f"{'p' + str(p):>12}" for p in PERCENTIS) + f"{'máx':>12}",
+    ]
+    tabela = dict(relatorio["etapas"], arquivo=relatorio["tempo_por_arquivo"])
+    for etapa, estat in tabela.items():
+        linhas.append(f"{etapa:<15}{estat['total']:>11.2f}s"
+                      + "".join(f"{_ms(estat[f'p{p}']):>12}" for p in PERCENTIS)
+                      + f"{_ms(estat['max']):>12}")
+    if relatorio["mais_lentos"]:
+        linhas += ["", "Mais lentos:"]
+        for r in relatorio["mais_lentos"]:
+            etapa = max(r["etapas"], key=r["etapas"].get) if r["etapas"] else "—"
+            linhas.append(f"  {_ms(r['duracao']):>10}  {r['arquivo']}  (mais tempo em: {etapa})")
+    return "\n".join(linhas)
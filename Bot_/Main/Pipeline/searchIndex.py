@@ -0,0 +1,388 @@
+# Main/Pipeline/searchIndex.py
+
+import os
+import re
+import bisect
+import html
+import json
+import unicodedata
+from collections import Counter
+
+from Pipeline.outputWriter import GravadorSaida, gravar_se_mudou
+from config import BUSCA_DADOS, BUSCA_PASTA, BUSCA_PAGINA, BUSCA_PREFIXO, BUSCA_TITULO
+
+# Índice de busca de texto completo, gerado junto com os .html.
+#
+# Na conversão (batchProcessor), cada página é quebrada em seções pelos
+# títulos e cada seção vira um contador de termos (extrair_secoes). No
+# processo principal, IndiceBusca guarda esses contadores por página em
+# <saída>/.eorbis_busca.json (as páginas puladas pelo build incremental
+# continuam lá) e, ao final do lote, monta o índice invertido:
+#
+#   <saída>/busca/_paginas.js páginas e seções ({doc: seção})
+#   <saída>/busca/<ab>.js     termos que começam com "ab" -> [doc, peso, ...]
+#   <saída>/busca.html        página de busca
+#
+# O doc de cada seção vem de uma tabela guardada junto com os termos (página,
+# âncora e título da seção -> doc) e de um contador que só cresce: seções
+# novas ganham um doc novo e as que já existiam mantêm o seu. Assim, incluir
+# ou remover uma nota (ou um título) não renumera as outras seções, e só os
+# arquivos dos termos que de fato mudaram são regravados.
+#
+# Os arquivos são .js carregados com <script>, e não JSON com fetch(), para
+# a busca funcionar também abrindo as páginas direto do disco (file://). A
+# página só carrega os arquivos dos prefixos dos termos digitados. O mesmo
+# índice alimenta o filtro da fila na interface (ConsultaIndice).
+
+FORMATO_BUSCA = 1
+TAMANHO_MINIMO = 2
+PESO_TITULO = 5
+MAX_RESULTADOS = 50
+
+PALAVRAS_VAZIAS = frozenset("""
+    as os da das de do dos em na nas no nos um uma uns umas ao aos com por para pra pela pelas pelo pelos
+    que se ou ja e o a mais muito como mas nao sao ser esta este essa esse isso isto sua seu suas seus
+""".split())
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+_TITULO = re.compile(r'<h([1-6])\b([^>]*)>(.*?)</h\1>', re.S | re.I)
+_ID = re.compile(r'\bid="([^"]*)"')
+_TAGS = re.compile(r'<[^>]+>')
+
+
+def termos(texto):
+    """Termos indexados de um texto: sem acentos, minúsculos, sem palavras vazias."""
+    texto = unicodedata.normalize("NFKD", texto.lower()).encode("ascii", "ignore").decode("ascii")
+    return [t for t in _TOKEN.findall(texto) if len(t) >= TAMANHO_MINIMO and t not in PALAVRAS_VAZIAS]
+
+
+def _texto(fragmento_html):
+    return html.unescape(_TAGS.sub(" ", fragmento_html))
+
+
+def extrair_secoes(html_content):
+    """
+    Quebra o HTML de uma página nas seções de cada título. Retorna
+    {"titulo": texto do primeiro <h1> ou None, "secoes": [[id do título,
+    texto do título, {termo: peso}]]}; o trecho antes do primeiro título é a
+    seção "" e os termos do título contam PESO_TITULO vezes.
+    """
+    titulo_pagina = None
+    secoes = []
+    pos = 0
+    ancora, titulo = "", ""
+    for m in _TITULO.finditer(html_content):
+        secoes.append((ancora, titulo, html_content[pos:m.start()]))
+        ident = _ID.search(m.group(2))
+        ancora, titulo = (ident.group(1) if ident else ""), " ".join(_texto(m.group(3)).split())
+        if titulo_pagina is None and m.group(1) == "1":
+            titulo_pagina = titulo
+        pos = m.end()
+    secoes.append((ancora, titulo, html_content[pos:]))
+
+    resultado = []
+    for ancora, titulo, corpo in secoes:
+        contagem = Counter(termos(_texto(corpo)))
+        for termo in termos(titulo):
+            contagem[termo] += PESO_TITULO
+        if contagem or titulo:
+            resultado.append([ancora, titulo, dict(contagem)])
+    return {"titulo": titulo_pagina, "secoes": resultado}
+
+
+class IndiceBusca:
+    """Termos por página de uma pasta de saída, e a geração do índice invertido."""
+
+    def __init__(self, output_folder):
+        self.output_folder = output_folder
+        self.path = os.path.join(output_folder, BUSCA_DADOS)
+        self.paginas = {}
+        self.docs = {}       # seção (ver _secao) -> doc
+        self.proximo = 0     # próximo doc livre; nunca diminui
+        self.gerado = None
+        self._alterado = False
+        self._carregar()
+
+    def _carregar(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                dados = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            print(f"[WARN] Dados da busca ilegíveis, reindexando: {e}")
+            return
+        if dados.get("formato") == FORMATO_BUSCA:
+            self.paginas = dados.get("paginas", {})
+            self.docs = dados.get("docs", {})
+            self.proximo = dados.get("proximo", max(self.docs.values(), default=-1) + 1)
+
+    def _chave(self, destino):
+        return os.path.relpath(destino, self.output_folder).replace(os.sep, "/")
+
+    def contem(self, destino):
+        """True se a saída `destino` já tem os termos guardados (senão precisa ser reconvertida)."""
+        return self._chave(destino) in self.paginas
+
+    def registrar(self, resultado):
+        """Guarda os termos de uma página convertida (as puladas mantêm os da conversão anterior)."""
+        if resultado["ok"] and resultado.get("busca"):
+            self.paginas[self._chave(resultado["saida"])] = dict(origem=os.path.abspath(resultado["arquivo"]),
+                                                                 **resultado["busca"])
+            self._alterado = True
+
+    def substituir(self, paginas):
+        """Troca todos os termos guardados por `paginas` (as dos shards de um build dividido)."""
+        self.paginas = paginas
+        self._alterado = True
+
+    def gerar(self, saidas=None):
+        """
+        Grava o índice invertido e a página de busca com todas as páginas
+        guardadas cujo .md e .html ainda existem, pelo GravadorSaida
+        `saidas` (arquivos iguais aos existentes não são regravados).
+        Retorna o resumo.
+        """
+        saidas = saidas if saidas is not None else GravadorSaida()
+        for chave in [c for c, p in self.paginas.items()
+                      if not (os.path.exists(p["origem"]) and os.path.exists(os.path.join(self.output_folder, c)))]:
+            del self.paginas[chave]
+            self._alterado = True
+
+        paginas = []
+        secoes = {}
+        postings = {}
+        docs = {}
+        for chave in sorted(self.paginas):
+            pagina = self.paginas[chave]
+            titulo = pagina["titulo"] or os.path.splitext(os.path.basename(chave))[0]
+            repetidas = Counter()
+            for ancora, titulo_secao, contagem in pagina["secoes"]:
+                secao = self._secao(chave, ancora, titulo_secao, repetidas)
+                doc = self.docs.get(secao)
+                if doc is None:
+                    doc = self.proximo
+                    self.proximo += 1
+                docs[secao] = doc
+                secoes[doc] = [len(paginas), ancora, titulo_secao]
+                for termo, peso in contagem.items():
+                    postings.setdefault(termo, []).extend((doc, peso))
+            paginas.append([chave, titulo])
+        if docs != self.docs:
+            # Os docs das seções que saíram não voltam a ser usados (o contador só cresce)
+            self.docs = docs
+            self._alterado = True
+
+        shards = {}
+        for termo in sorted(postings):
+            shards.setdefault(termo[:BUSCA_PREFIXO], {})[termo] = postings[termo]
+
+        pasta = os.path.join(self.output_folder, BUSCA_PASTA)
+        gravados = {"_paginas.js"}
+        total = self._gravar_js(saidas, os.path.join(pasta, "_paginas.js"), "documentos",
+                                {"paginas": paginas, "secoes": secoes})
+        for prefixo, conteudo in shards.items():
+            gravados.add(f"{prefixo}.js")
+            total += self._gravar_js(saidas, os.path.join(pasta, f"{prefixo}.js"), "shard", conteudo, prefixo)
+        saidas.remover(os.path.join(pasta, nome) for nome in os.listdir(pasta)
+                       if nome.endswith(".js") and nome not in gravados)
+        total += self._gravar(saidas, os.path.join(self.output_folder, BUSCA_PAGINA), pagina_busca())
+        if self._alterado:
+            self.salvar()
+        self.gerado = {"paginas": len(paginas), "secoes": len(secoes), "termos": len(postings),
+                       "shards": len(shards), "bytes": total}
+        return self.gerado
+
+    @staticmethod
+    def _secao(chave, ancora, titulo, repetidas):
+        """Chave de uma seção na tabela de docs; `repetidas` numera seções iguais da mesma página."""
+        secao = f"{chave}\t{ancora}\t{titulo}"
+        repetidas[secao] += 1
+        return secao if repetidas[secao] == 1 else f"{secao}\t{repetidas[secao]}"
+
+    def resumo(self):
+        """Resumo do último índice gerado (None se o lote foi interrompido antes)."""
+        return self.gerado
+
+    def _gravar_js(self, saidas, path, funcao, dados, *args):
+        argumentos = [json.dumps(a) for a in args] + [json.dumps(dados, ensure_ascii=False, separators=(",", ":"))]
+        return self._gravar(saidas, path, f"EORBIS_BUSCA.{funcao}({','.join(argumentos)});\n")
+
+    def _gravar(self, saidas, path, texto):
+        dados = texto.encode("utf-8")
+        saidas.gravar(path, dados)
+        return len(dados)
+
+    def salvar(self):
+        os.makedirs(self.output_folder, exist_ok=True)
+        # dumps() e não dump(): só o primeiro usa o codificador em C
+        texto = json.dumps({"formato": FORMATO_BUSCA, "paginas": self.paginas, "docs": self.docs,
+                            "proximo": self.proximo}, ensure_ascii=False,
+                           separators=(",", ":"), sort_keys=True)
+        gravar_se_mudou(self.path, texto.encode("utf-8"))
+        self._alterado = False
+
+
+class ConsultaIndice:
+    """
+    Consulta em memória dos termos de uma pasta de saída, para filtrar a
+    fila: um arquivo passa se cada termo digitado for o começo de algum termo
+    do seu conteúdo ou do seu nome.
+    """
+
+    def __init__(self, paginas=None):
+        por_termo = {}
+        for pagina in (paginas or {}).values():
+            for _, _, contagem in pagina["secoes"]:
+                for termo in contagem:
+                    por_termo.setdefault(termo, set()).add(pagina["origem"])
+        self._por_termo = por_termo
+        self._termos = sorted(por_termo)
+
+    @classmethod
+    def carregar(cls, output_folder):
+        return cls(IndiceBusca(output_folder).paginas)
+
+    def _com_prefixo(self, prefixo):
+        arquivos = set()
+        i = bisect.bisect_left(self._termos, prefixo)
+        while i < len(self._termos) and self._termos[i].startswith(prefixo):
+            arquivos |= self._por_termo[self._termos[i]]
+            i += 1
+        return arquivos
+
+    def filtrar(self, caminhos, consulta):
+        """Os caminhos (na mesma ordem) que atendem a `consulta`; todos se ela não tiver termos."""
+        procurados = list(dict.fromkeys(termos(consulta)))
+        if not procurados:
+            return list(caminhos)
+        no_conteudo = [self._com_prefixo(termo) for termo in procurados]
+        aprovados = []
+        for caminho in caminhos:
+            no_nome = termos(os.path.basename(caminho))
+            if all(os.path.abspath(caminho) in arquivos or any(t.startswith(termo) for t in no_nome)
+                   for termo, arquivos in zip(procurados, no_conteudo)):
+                aprovados.append(caminho)
+        return aprovados
+
+
+def pagina_busca():
+    """HTML da página de busca (a tokenização em JavaScript é a mesma de termos())."""
+    config_js = json.dumps({
+        "pasta": BUSCA_PASTA,
+        "prefixo": BUSCA_PREFIXO,
+        "minimo": TAMANHO_MINIMO,
+        "vazias": sorted(PALAVRAS_VAZIAS),
+        "max": MAX_RESULTADOS,
+    })
+    return PAGINA_BUSCA.replace("%TITULO%", html.escape(BUSCA_TITULO)).replace("%CONFIG%", config_js)
+
+
+PAGINA_BUSCA = """<!DOCTYPE html>
+<html lang="pt-BR"><head><meta charset="utf-8"/>
+<meta name="viewport" content="width=device-width, initial-scale=1"/>
+<title>%TITULO%</title>
+<style>
+body { font-family: Arial, Helvetica, sans-serif; max-width: 900px; margin: 0 auto; padding: 20px 16px; }
+h1 { font-size: 20pt; text-align: center; }
+#consulta { width: 100%; box-sizing: border-box; font-size: 14pt; padding: 8px 10px; border: 2px solid #ccc; border-radius: 6px; }
+#status { color: #666; margin: 10px 0; }
+#resultados { list-style: none; padding: 0; }
+#resultados li { padding: 8px 0; border-bottom: 1px solid #eee; }
+#resultados a { color: #2563eb; font-weight: bold; text-decoration: none; }
+#resultados .secao { color: #444; }
+</style></head>
+<body>
+<h1>%TITULO%</h1>
+<input id="consulta" type="search" placeholder="Digite para buscar…" autofocus autocomplete="off"/>
+<p id="status"></p>
+<ul id="resultados"></ul>
+<script>
+var EORBIS_BUSCA = (function () {
+  var CONFIG = %CONFIG%;
+  var vazias = {};
+  CONFIG.vazias.forEach(function (p) { vazias[p] = true; });
+  var docs = null, shards = {}, carregando = {}, esperando = [];
+
+  function termos(texto) {
+    var s = texto.toLowerCase().normalize("NFKD").replace(/[^\\x00-\\x7f]/g, "");
+    var vistos = {};
+    return (s.match(/[a-z0-9]+/g) || []).filter(function (t) {
+      if (t.length < CONFIG.minimo || vazias[t] || vistos[t]) return false;
+      return (vistos[t] = true);
+    });
+  }
+
+  function script(nome, chave) {
+    if (carregando[chave]) return;
+    carregando[chave] = true;
+    var el = document.createElement("script");
+    el.src = CONFIG.pasta + "/" + nome + ".js";
+    el.onerror = function () {
+      if (chave === "#paginas") docs = docs || {paginas: [], secoes: {}};
+      else shards[chave] = shards[chave] || {};
+      pronto();
+    };
+    document.head.appendChild(el);
+  }
+
+  function pronto() { var fila = esperando; esperando = []; fila.forEach(function (f) { f(); }); }
+
+  function buscar() {
+    var consulta = termos(document.getElementById("consulta").value);
+    var status = document.getElementById("status"), lista = document.getElementById("resultados");
+    if (!consulta.length) { status.textContent = ""; lista.innerHTML = ""; return; }
+    var faltam = consulta.filter(function (t) { return !shards[t.slice(0, CONFIG.prefixo)]; });
+    if (!docs || faltam.length) {
+      status.textContent = "Carregando índice…";
+      esperando.push(buscar);
+      script("_paginas", "#paginas");
+      faltam.forEach(function (t) { script(t.slice(0, CONFIG.prefixo), t.slice(0, CONFIG.prefixo)); });
+      return;
+    }
+    var pontos = null;
+    consulta.forEach(function (termo) {
+      var shard = shards[termo.slice(0, CONFIG.prefixo)], deste = {};
+      Object.keys(shard).forEach(function (t) {
+        if (t.lastIndexOf(termo, 0) !== 0) return;
+        var lista = shard[t], bonus = t === termo ? 2 : 1;
+        for (var i = 0; i < lista.length; i += 2) deste[lista[i]] = (deste[lista[i]] || 0) + lista[i + 1] * bonus;
+      });
+      if (pontos === null) { pontos = deste; return; }
+      Object.keys(pontos).forEach(function (d) {
+        if (deste[d]) pontos[d] += deste[d]; else delete pontos[d];
+      });
+    });
+    var ordem = Object.keys(pontos).sort(function (a, b) { return pontos[b] - pontos[a]; });
+    status.textContent = ordem.length ? ordem.length + " resultado(s)" : "Nenhum resultado.";
+    lista.innerHTML = "";
+    ordem.slice(0, CONFIG.max).forEach(function (d) {
+      var secao = docs.secoes[d], pagina = docs.paginas[secao[0]];
+      var li = document.createElement("li"), a = document.createElement("a");
+      a.href = pagina[0] + (secao[1] ? "#" + secao[1] : "");
+      a.textContent = pagina[1];
+      li.appendChild(a);
+      if (secao[2] && secao[2] !== pagina[1]) {
+        var sub = document.createElement("span");
+        sub.className = "secao";
+        sub.textContent = " › " + secao[2];
+        li.appendChild(sub);
+      }
+      lista.appendChild(li);
+    });
+  }
+
+  var espera = null;
+  document.getElementById("consulta").addEventListener("input", function () {
+    clearTimeout(espera);
+    espera = setTimeout(buscar, 120);
+  });
+
+  return {
+    documentos: function (dados) { docs = dados; pronto(); },
+    shard: function (prefixo, dados) { shards[prefixo] = dados; pronto(); }
+  };
+})();
+</script>
+</body></html>
+"""
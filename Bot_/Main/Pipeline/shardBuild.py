@@ -0,0 +1,205 @@
+# Main/Pipeline/shardBuild.py
+
+import os
+import glob
+import json
+import hashlib
+from datetime import datetime
+
+from config import SHARD_PARCIAL
+from Pipeline.batchProcessor import caminho_saida, chave_saida, shard_de
+from Pipeline.buildCache import ManifestoBuild
+from Pipeline.outputWriter import GravadorSaida, gravar_se_mudou
+from Pipeline.runReport import RelatorioExecucao
+from Pipeline.searchIndex import IndiceBusca
+
+# Build dividido em shards, para repartir uma reconstrução completa entre
+# várias invocações independentes (jobs do CI, máquinas ou processos locais).
+#
+# Cada invocação (cli.py --shard I/N) recebe a lista inteira de entradas e
+# converte só os arquivos do shard I (batchProcessor.shard_de, pelo caminho
+# de saída relativo). O manifesto de build, o índice de busca e o relatório
+# são da pasta de saída inteira, então o shard não os grava: guarda num
+# manifesto parcial (config.SHARD_PARCIAL) o status e os tempos de cada
+# arquivo, as entradas do manifesto de build e os termos das suas páginas.
+#
+# Com as saídas dos N shards reunidas numa pasta (a mesma pasta, ou copiadas
+# de cada máquina), cli.py --mesclar junta os manifestos parciais: confere se
+# estão todos lá e foram gerados com as mesmas entradas, versão e
+# configuração, aponta saídas faltando ou geradas mais de uma vez, grava o
+# manifesto de build e o índice de busca e gera o relatório final. As
+# entradas precisam estar no mesmo caminho de quando os shards rodaram (como
+# num checkout do CI): o manifesto e a busca guardam a origem de cada página.
+
+FORMATO_PARCIAL = 1
+
+# Campos de cada resultado de converter_arquivo guardados no manifesto parcial
+_CAMPOS = ("arquivo", "ok", "erro", "pulado", "duracao", "etapas", "bytes_entrada", "bytes_saida",
+           "memoria_processo", "gravado", "links")
+
+
+def ler_shard(texto):
+    """(indice, total) de "I/N" (ex.: "2/4"), com 1 <= I <= N."""
+    try:
+        indice, total = (int(parte) for parte in texto.split("/"))
+    except ValueError:
+        raise ValueError(f"shard inválido: {texto!r} (use I/N, ex.: 2/4)") from None
+    if not 1 <= indice <= total:
+        raise ValueError(f"shard inválido: {texto!r} (I vai de 1 a N)")
+    return indice, total
+
+
+def caminho_parcial(output_folder, shard):
+    indice, total = shard
+    return os.path.join(output_folder, SHARD_PARCIAL.format(indice=indice, total=total))
+
+
+class ManifestoParcial:
+    """Resultados de um shard e a parte dele do manifesto de build e da busca."""
+
+    def __init__(self, output_folder, shard, arquivos, raizes=None):
+        raizes = raizes or {}
+        self.output_folder = output_folder
+        self.indice, self.total = shard
+        self.path = caminho_parcial(output_folder, shard)
+        chaves = sorted({chave_saida(caminho_saida(f, output_folder, raizes.get(f)), output_folder)
+                         for f in arquivos})
+        # Identifica a lista de entradas: todos os shards precisam ter recebido a mesma
+        self.entradas = {"total": len(chaves),
+                         "hash": hashlib.sha256("\n".join(chaves).encode("utf-8")).hexdigest()}
+        self.esperadas = [chave for chave in chaves if self._do_shard(chave)]
+        self.resultados = []
+
+    def _do_shard(self, chave):
+        return shard_de(chave, self.total) == self.indice
+
+    def adicionar(self, resultado):
+        registro = {campo: resultado[campo] for campo in _CAMPOS if campo in resultado}
+        registro["saida"] = chave_saida(resultado["saida"], self.output_folder) if resultado.get("saida") else None
+        self.resultados.append(registro)
+
+    def salvar(self, duracao, concluido, versao, manifesto=None, busca=None, links=None, saidas=None):
+        """Grava o manifesto parcial na pasta de saída e retorna o caminho."""
+        dados = {
+            "formato": FORMATO_PARCIAL,
+            "shard": [self.indice, self.total],
+            "gerado_em": datetime.now().isoformat(timespec="seconds"),
+            "versao": versao,
+            "entradas": self.entradas,
+            "esperadas": self.esperadas,
+            "duracao": duracao,
+            "concluido": concluido,
+            "resultados": self.resultados,
+            "manifesto": None if manifesto is None else {
+                "fingerprint": manifesto.fingerprint,
+                "arquivos": {k: v for k, v in manifesto.entradas.items() if self._do_shard(k)},
+            },
+            "busca": None if busca is None else {k: v for k, v in busca.paginas.items() if self._do_shard(k)},
+            "links": links.resumo() if links else None,
+            "saidas": saidas.resumo() if saidas else None,
+        }
+        os.makedirs(self.output_folder, exist_ok=True)
+        texto = json.dumps(dados, ensure_ascii=False, separators=(",", ":"))
+        gravar_se_mudou(self.path, texto.encode("utf-8"))
+        return self.path
+
+
+def _ler_parciais(output_folder):
+    parciais = []
+    padrao = os.path.join(glob.escape(output_folder), SHARD_PARCIAL.format(indice="*", total="*"))
+    for path in sorted(glob.glob(padrao)):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                dados = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"[WARN] Manifesto parcial ilegível, ignorado: {path} ({e})")
+            continue
+        if dados.get("formato") == FORMATO_PARCIAL:
+            parciais.append(dict(dados, path=path))
+    return parciais
+
+
+def _somar(resumos):
+    soma = {}
+    for resumo in resumos:
+        for campo, valor in resumo.items():
+            soma[campo] = soma.get(campo, 0) + valor
+    return soma
+
+
+def mesclar(output_folder):
+    """
+    Junta os manifestos parciais de `output_folder` e retorna o relatório
+    final (o de RelatorioExecucao.gerar), com "shards" e "mesclagem"
+    (problemas, saídas faltando e duplicadas). O manifesto de build e o
+    índice de busca só são gravados se os N shards estiverem presentes e
+    consistentes. Levanta RuntimeError se não houver manifestos parciais.
+    """
+    parciais = _ler_parciais(output_folder)
+    if not parciais:
+        raise RuntimeError(f"Nenhum manifesto parcial em {output_folder} (gere os shards com --shard I/N).")
+
+    # Parciais de uma divisão anterior (outro N) ficam de fora: vale a mais recente
+    total = max(parciais, key=lambda p: p["gerado_em"])["shard"][1]
+    ignorados = [p["path"] for p in parciais if p["shard"][1] != total]
+    parciais = sorted((p for p in parciais if p["shard"][1] == total), key=lambda p: p["shard"][0])
+    indices = [p["shard"][0] for p in parciais]
+
+    problemas = [f"Shard {i}/{total} não encontrado." for i in range(1, total + 1) if i not in indices]
+    referencia = parciais[0]
+    for p in parciais[1:]:
+        shard = f"{p['shard'][0]}/{total}"
+        if p["entradas"] != referencia["entradas"]:
+            problemas.append(f"Shard {shard} recebeu outra lista de entradas "
+                             f"({p['entradas']['total']} arquivos; o shard {indices[0]} recebeu "
+                             f"{referencia['entradas']['total']}).")
+        if p["versao"] != referencia["versao"]:
+            problemas.append(f"Shard {shard} foi gerado com a versão {p['versao']} "
+                             f"(o shard {indices[0]}, com {referencia['versao']}).")
+        if (p["manifesto"] or {}).get("fingerprint") != (referencia["manifesto"] or {}).get("fingerprint"):
+            problemas.append(f"Shard {shard} foi gerado com outra configuração do transformer.")
+    completo = not problemas
+    problemas += [f"Shard {p['shard'][0]}/{total} foi interrompido." for p in parciais if not p["concluido"]]
+
+    relatorio = RelatorioExecucao()
+    por_saida = {}
+    for p in parciais:
+        for resultado in p["resultados"]:
+            saida = resultado["saida"]
+            relatorio.adicionar(dict(resultado, saida=os.path.join(output_folder, saida) if saida else None))
+            if resultado["ok"]:
+                por_saida.setdefault(saida, []).append(f"{resultado['arquivo']} (shard {p['shard'][0]})")
+    duplicadas = {saida: origens for saida, origens in sorted(por_saida.items()) if len(origens) > 1}
+    faltando = sorted(chave for p in parciais for chave in p["esperadas"]
+                      if not os.path.exists(os.path.join(output_folder, chave)))
+
+    saidas = GravadorSaida()
+    extras = {}
+    if completo and all(p["manifesto"] is not None for p in parciais):
+        manifesto = ManifestoBuild(output_folder)
+        manifesto.fingerprint = referencia["manifesto"]["fingerprint"]
+        manifesto.entradas = {}
+        for p in parciais:
+            manifesto.entradas.update(p["manifesto"]["arquivos"])
+        manifesto.salvar()
+    if completo and all(p["busca"] is not None for p in parciais):
+        busca = IndiceBusca(output_folder)
+        busca.substituir({k: v for p in parciais for k, v in p["busca"].items()})
+        extras["busca"] = busca.gerar(saidas)
+    if all(p["links"] for p in parciais):
+        # Cada shard monta o índice de links com todas as entradas: notas e
+        # relidas são as do índice, não uma soma
+        extras["links"] = dict(_somar({"resolvidos": p["links"]["resolvidos"], "quebrados": p["links"]["quebrados"]}
+                                      for p in parciais),
+                               notas=max(p["links"]["notas"] for p in parciais),
+                               lidas=max(p["links"]["lidas"] for p in parciais))
+    extras["saidas"] = _somar([p["saidas"] for p in parciais if p["saidas"]] + [saidas.resumo()])
+
+    duracoes = {str(p["shard"][0]): p["duracao"] for p in parciais}
+    extras["shards"] = {"total": total, "mesclados": len(parciais), "duracoes": duracoes,
+                        "tempo_somado": sum(duracoes.values())}
+    extras["mesclagem"] = {"problemas": problemas, "faltando": faltando, "duplicadas": duplicadas,
+                           "ignorados": ignorados, "indices_gravados": completo}
+    # Os shards rodam ao mesmo tempo: a duração do build é a do mais lento
+    return relatorio.gerar(max(duracoes.values()), versao=referencia["versao"],
+                           concluido=not problemas, **extras)
@@ -0,0 +1,262 @@
+# Main/Pipeline/watcher.py
+
+import os
+import threading
+import time
+from fnmatch import fnmatch
+
+from config import PASTA_INCLUIR, PASTA_EXCLUIR, WATCH_DEBOUNCE, WATCH_INTERVALO, WATCH_INTERVALO_MAX
+
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+    WATCHDOG_AVAILABLE = True
+except ImportError:
+    WATCHDOG_AVAILABLE = False
+
+# Modo "watch": observa arquivos e pastas e avisa quando um .md muda.
+#
+# Com o pacote watchdog instalado usa as notificações do sistema (inotify no
+# Linux, ReadDirectoryChangesW no Windows, FSEvents no macOS); sem ele,
+# compara mtime/tamanho dos .md conhecidos e o mtime das pastas a cada
+# WATCH_INTERVALO segundos, espaçando até WATCH_INTERVALO_MAX sem mudanças.
+#
+# Eventos são agrupados: cada arquivo alterado entra num conjunto pendente e
+# só é entregue quando fica WATCH_DEBOUNCE segundos sem novos eventos. Uma
+# rajada de salvamentos (ou os vários eventos de um único salvamento atômico)
+# vira uma única chamada de `on_mudanca(arquivos)`, com cada arquivo uma vez.
+
+
+class ObservadorArquivos:
+    def __init__(self, on_mudanca, arquivos=(), pastas=(), incluir=None, excluir=None,
+                 debounce=WATCH_DEBOUNCE, intervalo=WATCH_INTERVALO, polling=False):
+        self.on_mudanca = on_mudanca
+        self.arquivos = {os.path.abspath(a) for a in arquivos}
+        self.pastas = sorted({os.path.abspath(p) for p in pastas})
+        self.incluir = PASTA_INCLUIR if incluir is None else incluir
+        self.excluir = PASTA_EXCLUIR if excluir is None else excluir
+        self.debounce = debounce
+        self.intervalo = intervalo
+        self.modo = "watchdog" if WATCHDOG_AVAILABLE and not polling else "polling"
+
+        self._pendentes = {}  # caminho -> instante do último evento
+        self._lock = threading.Lock()
+        self._acordar = threading.Event()
+        self._parar = threading.Event()
+        self._threads = []
+        self._observer = None
+
+    # --- filtro ---
+    def observa(self, path):
+        """True se `path` é um dos arquivos observados ou um .md aceito por uma das pastas."""
+        path = os.path.abspath(path)
+        if path in self.arquivos:
+            return True
+        for pasta in self.pastas:
+            if not path.startswith(pasta + os.sep):
+                continue
+            relativo = os.path.relpath(path, pasta).replace(os.sep, "/")
+            partes = relativo.split("/")
+            # Mesma regra da varredura: nenhuma pasta do caminho pode estar excluída
+            if any(fnmatch(p, e) for p in partes for e in self.excluir):
+                continue
+            if any(fnmatch(relativo, e) for e in self.excluir):
+                continue
+            if any(fnmatch(relativo, i) or fnmatch(partes[-1], i) for i in self.incluir):
+                return True
+        return False
+
+    def raiz_de(self, path):
+        """Pasta observada que contém `path` (a mais interna), ou None para arquivos avulsos."""
+        path = os.path.abspath(path)
+        dentro = [p for p in self.pastas if path.startswith(p + os.sep)]
+        return max(dentro, key=len) if dentro else None
+
+    def notificar(self, path):
+        """Registra um evento para `path` (qualquer thread)."""
+        if not self.observa(path):
+            return
+        with self._lock:
+            self._pendentes[os.path.abspath(path)] = time.monotonic()
+        self._acordar.set()
+
+    # --- despacho com debounce ---
+    def _despachar(self):
+        while not self._parar.is_set():
+            with self._lock:
+                if self._pendentes:
+                    agora = time.monotonic()
+                    prontos = [p for p, t in self._pendentes.items() if agora - t >= self.debounce]
+                    for p in prontos:
+                        del self._pendentes[p]
+                    # Acorda quando o próximo pendente completar o debounce
+                    espera = (self.debounce - (agora - min(self._pendentes.values()))
+                              if self._pendentes else None)
+                else:
+                    prontos, espera = [], None
+            if prontos:
+                try:
+                    self.on_mudanca(sorted(prontos))
+                except Exception as e:
+                    print(f"[WARN] Falha ao tratar arquivos alterados: {e}")
+                continue
+            self._acordar.wait(max(espera, 0.01) if espera is not None else None)
+            self._acordar.clear()
+
+    # --- polling ---
+    def _ler_pasta(self, pasta, raiz):
+        """
+        Relê `pasta` sem recursão: guarda o mtime dela, os .md aceitos e as
+        subpastas não excluídas, entrando nas subpastas novas. Devolve os .md
+        que ainda não estavam no estado.
+        """
+        try:
+            mtime = os.stat(pasta).st_mtime_ns
+            with os.scandir(pasta) as it:
+                entradas = list(it)
+        except OSError:
+            self._esquecer_pasta(pasta)
+            return []
+        arquivos, subpastas = set(), set()
+        for entrada in entradas:
+            try:
+                eh_pasta = entrada.is_dir(follow_symlinks=False)
+            except OSError:
+                continue
+            if eh_pasta:
+                relativo = os.path.relpath(entrada.path, raiz).replace(os.sep, "/")
+                if not any(fnmatch(relativo, e) or fnmatch(entrada.name, e) for e in self.excluir):
+                    subpastas.add(entrada.path)
+            elif self.observa(entrada.path):
+                arquivos.add(entrada.path)
+
+        _, _, _, arquivos_antes, subpastas_antes = self._pastas.get(pasta, (None, None, None, set(), set()))
+        # mtime de pasta tem resolução grossa em alguns sistemas (FAT, SMB): se a
+        # pasta mudou há pouco, pode mudar de novo sem alterar o mtime. Relê na próxima volta
+        recente = time.time_ns() - mtime < 2_000_000_000
+        self._pastas[pasta] = (raiz, mtime, recente, arquivos, subpastas)
+
+        novos = []
+        for path in sorted(arquivos - arquivos_antes):
+            if path in self._estado:
+                continue
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            self._estado[path] = (st.st_mtime_ns, st.st_size)
+            novos.append(path)
+        for path in arquivos_antes - arquivos:
+            if path not in self.arquivos:
+                self._estado.pop(path, None)
+        for sub in sorted(subpastas - subpastas_antes):
+            novos.extend(self._ler_pasta(sub, raiz))
+        for sub in subpastas_antes - subpastas:
+            self._esquecer_pasta(sub)
+        return novos
+
+    def _esquecer_pasta(self, pasta):
+        """Tira `pasta` (removida ou ilegível) e tudo abaixo dela do estado."""
+        entrada = self._pastas.pop(pasta, None)
+        if entrada is None:
+            return
+        for path in entrada[3]:
+            if path not in self.arquivos:
+                self._estado.pop(path, None)
+        for sub in entrada[4]:
+            self._esquecer_pasta(sub)
+
+    def _verificar(self):
+        # Sem percorrer a árvore a cada volta: só os .md já conhecidos são
+        # consultados (stat), e uma pasta só é relida quando o mtime dela muda,
+        # o que acontece quando uma entrada é criada, removida ou renomeada
+        self._pastas = {}  # pasta -> (raiz, mtime, recente, arquivos, subpastas)
+        self._estado = {}  # arquivo -> (mtime, tamanho)
+        for path in self.arquivos:
+            try:
+                st = os.stat(path)
+                self._estado[path] = (st.st_mtime_ns, st.st_size)
+            except OSError:
+                self._estado[path] = None
+        for pasta in self.pastas:
+            if self._parar.is_set():
+                return
+            self._ler_pasta(pasta, pasta)
+
+        espera = self.intervalo
+        while not self._parar.wait(espera):
+            mudou = False
+            for pasta, (raiz, mtime, recente, _, _) in list(self._pastas.items()):
+                if pasta not in self._pastas:
+                    continue  # esquecida junto com a pasta de cima nesta volta
+                try:
+                    atual = os.stat(pasta).st_mtime_ns
+                except OSError:
+                    self._esquecer_pasta(pasta)
+                    mudou = True
+                    continue
+                if atual != mtime or recente:
+                    for path in self._ler_pasta(pasta, raiz):
+                        self.notificar(path)
+                        mudou = True
+            for path, assinatura in list(self._estado.items()):
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue  # removido: a releitura da pasta tira do estado
+                atual = (st.st_mtime_ns, st.st_size)
+                if atual != assinatura:
+                    self._estado[path] = atual
+                    self.notificar(path)
+                    mudou = True
+            # Sem mudanças, espaça as verificações até WATCH_INTERVALO_MAX
+            espera = self.intervalo if mudou else min(espera * 2, max(self.intervalo, WATCH_INTERVALO_MAX))
+
+    # --- watchdog ---
+    def _iniciar_watchdog(self):
+        observador = self
+
+        class _Handler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                if event.is_directory or event.event_type in ("deleted", "opened", "closed_no_write"):
+                    return
+                # Salvamento atômico (grava .tmp e renomeia): vale o destino
+                observador.notificar(getattr(event, "dest_path", "") or event.src_path)
+
+        handler = _Handler()
+        self._observer = Observer()
+        recursivas = set(self.pastas)
+        for pasta in self.pastas:
+            self._observer.schedule(handler, pasta, recursive=True)
+        # Arquivos avulsos: observa só a pasta de cada um, sem recursão
+        for pasta in sorted({os.path.dirname(a) for a in self.arquivos}):
+            if os.path.isdir(pasta) and not any(pasta == r or pasta.startswith(r + os.sep) for r in recursivas):
+                self._observer.schedule(handler, pasta, recursive=False)
+        self._observer.daemon = True
+        self._observer.start()
+
+    def iniciar(self):
+        if self.modo == "watchdog":
+            try:
+                self._iniciar_watchdog()
+            except OSError as e:
+                # Ex.: limite de inotify watches atingido
+                print(f"[WARN] Notificações do sistema indisponíveis ({e}). Usando polling.")
+                self.modo = "polling"
+        alvos = [self._despachar] + ([self._verificar] if self.modo == "polling" else [])
+        for alvo in alvos:
+            t = threading.Thread(target=alvo, daemon=True, name=f"watch-{alvo.__name__.strip('_')}")
+            t.start()
+            self._threads.append(t)
+        return self
+
+    def parar(self):
+        self._parar.set()
+        self._acordar.set()
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join(timeout=2)
+            self._observer = None
+        for t in self._threads:
+            t.join(timeout=2)
+        self._threads = []
@@ -0,0 +1,84 @@
+# Main/Preview/previewCache.py
+
+import os
+import threading
+from collections import OrderedDict
+
+from config import PREVIEW_CACHE_BYTES
+from Transformer.imageResolver import resolvedor_padrao
+from Transformer.markdownConverter import markdown_para_html, extrair_urls_imagens
+
+# Renderização do preview (Markdown -> HTML com imagens do Obsidian) e um
+# cache LRU do resultado, para que reselecionar um arquivo da fila custe só
+# a atualização dos widgets. A chave é (caminho, mtime, tamanho): qualquer
+# edição do .md invalida a entrada.
+
+
+def renderizar_preview(md_path, resolvedor=None):
+    """Lê o Markdown e retorna (html, urls das imagens) para o preview."""
+    resolvedor = resolvedor or resolvedor_padrao()
+    with open(md_path, "r", encoding="utf-8") as f:
+        raw_markdown = f.read()
+
+    # Mesma conversão da fila; só as imagens do Obsidian preferem o arquivo local
+    html_content = markdown_para_html(raw_markdown, resolvedor)
+    return html_content, extrair_urls_imagens(html_content)
+
+
+class CachePreview:
+    """LRU de previews renderizados, limitado pelo tamanho total em bytes."""
+
+    def __init__(self, max_bytes=PREVIEW_CACHE_BYTES, resolvedor=None):
+        self.max_bytes = max_bytes
+        self.resolvedor = resolvedor
+        self._itens = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def _chave(self, md_path):
+        st = os.stat(md_path)
+        return (os.path.abspath(md_path), st.st_mtime_ns, st.st_size)
+
+    @staticmethod
+    def _tamanho(html_content, urls):
+        return len(html_content) + sum(len(u) for u in urls)
+
+    def obter(self, md_path):
+        """Preview em cache para a versão atual do arquivo, ou None."""
+        try:
+            chave = self._chave(md_path)
+        except OSError:
+            return None
+        with self._lock:
+            item = self._itens.get(chave)
+            if item is not None:
+                self._itens.move_to_end(chave)
+            return item
+
+    def renderizar(self, md_path):
+        """(html, urls) do cache, ou renderiza e guarda."""
+        chave = self._chave(md_path)
+        with self._lock:
+            item = self._itens.get(chave)
+            if item is not None:
+                self._itens.move_to_end(chave)
+                return item
+
+        item = renderizar_preview(md_path, self.resolvedor)
+        tamanho = self._tamanho(*item)
+        if tamanho > self.max_bytes:
+            return item  # maior que o cache inteiro: não guarda
+
+        with self._lock:
+            if chave not in self._itens:
+                self._itens[chave] = item
+                self._bytes += tamanho
+            while self._bytes > self.max_bytes:
+                _, antigo = self._itens.popitem(last=False)
+                self._bytes -= self._tamanho(*antigo)
+        return item
+
+    def limpar(self):
+        with self._lock:
+            self._itens.clear()
+            self._bytes = 0
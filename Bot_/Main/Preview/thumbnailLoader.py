@@ -0,0 +1,162 @@
+# Main/Preview/thumbnailLoader.py
+
+import io
+import os
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from config import (THUMB_CACHE_DIR, THUMB_CACHE_MEMORIA, THUMB_TAMANHO,
+                    THUMB_TIMEOUT, THUMB_WORKERS)
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+# Carregador de thumbnails em segundo plano para o preview. Aceita URLs e
+# caminhos de arquivos locais (ver Transformer/imageResolver.py).
+#
+# Cache em dois níveis: um LRU em memória com as miniaturas já decodificadas
+# (reselecionar um arquivo não toca na rede) e um cache em disco, indexado
+# por URL + ETag, revalidado com If-None-Match. Nada aqui usa o Tk: o
+# callback recebe uma imagem PIL e quem chama cria o PhotoImage na thread
+# da interface.
+
+
+class CarregadorThumbnails:
+    def __init__(self, pasta_cache=THUMB_CACHE_DIR, max_memoria=THUMB_CACHE_MEMORIA,
+                 tamanho=THUMB_TAMANHO, workers=THUMB_WORKERS):
+        self.pasta_cache = pasta_cache
+        self.max_memoria = max_memoria
+        self.tamanho = tamanho
+        self._memoria = OrderedDict()
+        self._lock = threading.Lock()
+        self._sessoes = threading.local()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="thumbs")
+
+    # --- cache em memória ---
+    def da_memoria(self, url):
+        """Thumbnail já decodificada, ou None. Seguro para a thread da UI."""
+        if self._eh_local(url):
+            url = self._chave_local(url)
+        with self._lock:
+            img = self._memoria.get(url)
+            if img is not None:
+                self._memoria.move_to_end(url)
+            return img
+
+    def _guardar_memoria(self, url, img):
+        with self._lock:
+            self._memoria[url] = img
+            self._memoria.move_to_end(url)
+            while len(self._memoria) > self.max_memoria:
+                self._memoria.popitem(last=False)
+
+    # --- cache em disco ---
+    def _caminhos_disco(self, url):
+        chave = hashlib.sha1(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.pasta_cache, chave + ".json"), os.path.join(self.pasta_cache, chave)
+
+    def _ler_disco(self, url):
+        """(etag, imagem) do cache em disco, ou (None, None)."""
+        meta_path, base = self._caminhos_disco(url)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                etag = json.load(f).get("etag")
+            img = Image.open(self._arquivo_thumb(base, etag))
+            img.load()
+            return etag, img
+        except (OSError, ValueError):
+            return None, None
+
+    def _arquivo_thumb(self, base, etag):
+        return base + "-" + hashlib.sha1((etag or "").encode("utf-8")).hexdigest()[:12] + ".png"
+
+    def _gravar_disco(self, url, etag, img):
+        meta_path, base = self._caminhos_disco(url)
+        try:
+            os.makedirs(self.pasta_cache, exist_ok=True)
+            arquivo = self._arquivo_thumb(base, etag)
+            img.save(arquivo + ".tmp", format="PNG")
+            os.replace(arquivo + ".tmp", arquivo)
+            with open(meta_path, "w", encoding="utf-8") as f:
+                json.dump({"url": url, "etag": etag}, f)
+        except OSError as e:
+            print(f"[WARN] Não foi possível gravar thumbnail em cache: {e}")
+
+    # --- rede ---
+    def _sessao(self):
+        # requests.Session não é thread-safe: uma por worker, com conexões reaproveitadas
+        sessao = getattr(self._sessoes, "sessao", None)
+        if sessao is None:
+            sessao = requests.Session()
+            adaptador = HTTPAdapter(pool_connections=4, pool_maxsize=4)
+            sessao.mount("http://", adaptador)
+            sessao.mount("https://", adaptador)
+            self._sessoes.sessao = sessao
+        return sessao
+
+    def _miniatura(self, dados):
+        img = Image.open(io.BytesIO(dados))
+        img.thumbnail(self.tamanho)
+        if img.mode not in ("RGB", "RGBA", "L", "LA", "P"):
+            img = img.convert("RGBA")
+        return img
+
+    def _carregar(self, url):
+        etag, img_disco = self._ler_disco(url)
+        headers = {"If-None-Match": etag} if img_disco is not None and etag else {}
+        try:
+            resp = self._sessao().get(url, timeout=THUMB_TIMEOUT, headers=headers)
+            if resp.status_code == 304 and img_disco is not None:
+                img = img_disco
+            else:
+                resp.raise_for_status()
+                img = self._miniatura(resp.content)
+                self._gravar_disco(url, resp.headers.get("ETag"), img)
+        except requests.RequestException:
+            if img_disco is None:
+                raise
+            img = img_disco  # sem rede: usa a cópia em disco
+        self._guardar_memoria(url, img)
+        return img
+
+    def _carregar_local(self, path):
+        with open(path, "rb") as f:
+            img = self._miniatura(f.read())
+        self._guardar_memoria(self._chave_local(path), img)
+        return img
+
+    def _chave_local(self, path):
+        # Arquivos locais: o mtime entra na chave, então uma imagem editada é relida
+        try:
+            return f"{path}@{os.stat(path).st_mtime_ns}"
+        except OSError:
+            return path
+
+    def _eh_local(self, url):
+        return not url.startswith(("http://", "https://"))
+
+    def carregar(self, url, callback):
+        """
+        Busca a thumbnail em segundo plano e chama `callback(url, imagem)`
+        na thread do worker (imagem = None em caso de falha).
+        """
+        def tarefa():
+            try:
+                img = self.da_memoria(url)
+                if img is None:
+                    img = self._carregar_local(url) if self._eh_local(url) else self._carregar(url)
+            except Exception:
+                img = None
+            callback(url, img)
+        return self._executor.submit(tarefa)
+
+    def encerrar(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,105 @@
+# Main/Transformer/imageResolver.py
+
+import os
+import threading
+from urllib.parse import unquote
+
+from config import IMG_DIRS_LOCAIS, URL_BASE_IMAGENS
+
+# Resolve imagens do Obsidian (![[nome.png]]) para os arquivos locais em
+# Bot_/img_doc (ou outras pastas configuradas), caindo para a URL pública
+# quando a imagem não existe localmente.
+#
+# As pastas são indexadas uma vez (nome do arquivo -> caminho). O índice é
+# refeito só quando o mtime de alguma pasta indexada muda, ou seja, quando
+# arquivos são criados, removidos ou renomeados.
+
+
+class ResolvedorImagens:
+    def __init__(self, pastas=None, url_base=URL_BASE_IMAGENS):
+        self.pastas = [os.path.abspath(p) for p in (pastas if pastas is not None else IMG_DIRS_LOCAIS)]
+        self.url_base = url_base
+        self._lock = threading.Lock()
+        self._indice = {}
+        self._mtimes = None
+
+    def _assinatura(self):
+        """mtime de cada pasta indexada (inclusive subpastas)."""
+        mtimes = {}
+        pendentes = [p for p in self.pastas if os.path.isdir(p)]
+        while pendentes:
+            pasta = pendentes.pop()
+            try:
+                mtimes[pasta] = os.stat(pasta).st_mtime_ns
+                with os.scandir(pasta) as it:
+                    pendentes.extend(e.path for e in it if e.is_dir(follow_symlinks=False) and not e.name.startswith("."))
+            except OSError:
+                continue
+        return mtimes
+
+    def _pastas_mudaram(self):
+        if self._mtimes is None:
+            return True
+        for pasta, mtime in self._mtimes.items():
+            try:
+                if os.stat(pasta).st_mtime_ns != mtime:
+                    return True
+            except OSError:
+                return True
+        return False
+
+    def _reindexar(self):
+        mtimes = self._assinatura()
+        indice = {}
+        # Pastas listadas primeiro têm prioridade em nomes repetidos
+        for pasta in reversed(sorted(mtimes, key=lambda p: (self._raiz(p), p))):
+            try:
+                with os.scandir(pasta) as it:
+                    for e in it:
+                        if e.is_file():
+                            indice[e.name] = e.path
+            except OSError:
+                continue
+        self._indice = indice
+        self._mtimes = mtimes
+
+    def _raiz(self, pasta):
+        for i, raiz in enumerate(self.pastas):
+            if pasta == raiz or pasta.startswith(raiz + os.sep):
+                return i
+        return len(self.pastas)
+
+    def caminho_local(self, nome):
+        """Caminho local da imagem `nome` (como em ![[nome]]), ou None."""
+        nome = os.path.basename(nome.split("|")[0].strip())
+        with self._lock:
+            if self._pastas_mudaram():
+                self._reindexar()
+            return self._indice.get(nome)
+
+    def src(self, nome, preferir_local=True):
+        """src para uma imagem embutida: o arquivo local se existir, senão a URL pública."""
+        if preferir_local:
+            local = self.caminho_local(nome)
+            if local:
+                return local
+        return f"{self.url_base}{nome}"
+
+    def local_ou_url(self, url):
+        """Troca uma URL de URL_BASE_IMAGENS pelo arquivo local correspondente, se existir."""
+        if url.startswith(self.url_base):
+            local = self.caminho_local(unquote(url[len(self.url_base):]))
+            if local:
+                return local
+        return url
+
+
+_padrao = None
+
+
+def resolvedor_padrao():
+    """Instância compartilhada, com as pastas de config.IMG_DIRS_LOCAIS."""
+    global _padrao
+    if _padrao is None:
+        _padrao = ResolvedorImagens()
+    return _padrao
@@ -0,0 +1,127 @@
+# Main/Transformer/markdownConverter.py
+
+import re
+import html
+import threading
+import unicodedata
+from urllib.parse import quote
+
+import markdown2
+
+from config import MARKDOWN_EXTRAS, URL_BASE_IMAGENS
+
+# Conversão Markdown -> HTML compartilhada pela fila (batchProcessor) e pelo
+# preview (previewCache), com as mesmas opções nos dois caminhos.
+#
+# markdown2.markdown() cria e configura um Markdown novo a cada chamada; aqui
+# cada thread (e cada processo do pool) mantém uma instância configurada e a
+# reutiliza com convert(), que reinicia o estado interno a cada documento.
+# As regex usadas depois da conversão também são compiladas uma única vez.
+#
+# Os links entre notas ([[Nota#Título|texto]]) são reescritos antes da
+# conversão, fora dos blocos e trechos de código: depois dela o markdown2 já
+# teria transformado os "_" e "*" dos nomes em ênfase. Com eles, os títulos
+# ganham id (ancora_titulo), o mesmo que Pipeline/linkIndex.py indexa.
+
+EMBED_OBSIDIAN = re.compile(r'!\[\[(.*?)\]\]')
+IMG_SRC = re.compile(r'<img[^>]+src=["\']([^"\']+)["\']')
+WIKILINK = re.compile(r'(?<!!)\[\[([^\[\]\n]+?)\]\]')
+CODIGO_MARKDOWN = re.compile(r'^[ ]{0,3}(`{3,}|~{3,})[^\n]*\n.*?(?:^[ ]{0,3}\1[ \t]*$|\Z)|(`+)[^\n]*?\2',
+                             re.M | re.S)
+_ESCAPE_MARKDOWN = re.compile(r'([\\`*_\[\]])')
+
+_local = threading.local()
+
+
+def ancora_titulo(texto):
+    """Id de um título a partir do seu texto no .md ("Seção A" -> "secao-a")."""
+    texto = unicodedata.normalize("NFKD", texto).encode("ascii", "ignore").decode("ascii")
+    return re.sub(r"[^a-z0-9]+", "-", texto.lower()).strip("-") or "secao"
+
+
+class _MarkdownComAncoras(markdown2.Markdown):
+    """markdown2 com "header-ids", mas com os ids de ancora_titulo."""
+
+    def header_id_from_text(self, text, prefix, n=None):
+        base = ancora_titulo(text)
+        self._count_from_header_id[base] += 1
+        n = self._count_from_header_id[base]
+        return base if n == 1 else f"{base}-{n}"
+
+
+def conversor(ancoras=False):
+    """
+    Instância de markdown2.Markdown da thread atual, com MARKDOWN_EXTRAS.
+    Com `ancoras`, os títulos recebem id (usado quando os links são resolvidos).
+    """
+    chave = "markdown_ancoras" if ancoras else "markdown"
+    md = getattr(_local, chave, None)
+    if md is None:
+        if ancoras:
+            md = _MarkdownComAncoras(extras=list(MARKDOWN_EXTRAS) + ["header-ids"])
+        else:
+            md = markdown2.Markdown(extras=MARKDOWN_EXTRAS)
+        setattr(_local, chave, md)
+    return md
+
+
+def reescrever_embeds(html_content, resolvedor=None):
+    """
+    Troca as imagens do Obsidian (![[nome.png]]) por <img>. Sem `resolvedor`
+    o src é a URL pública (URL_BASE_IMAGENS), como nas páginas geradas; com
+    um ResolvedorImagens, o arquivo local quando existir (preview).
+    """
+    if "![[" not in html_content:
+        return html_content
+    if resolvedor is None:
+        src = lambda nome: f"{URL_BASE_IMAGENS}{nome}"
+    else:
+        src = resolvedor.src
+    return EMBED_OBSIDIAN.sub(lambda m: f'<img src="{src(m.group(1))}" alt="{m.group(1)}">', html_content)
+
+
+def _link_markdown(m, links):
+    alvo, _, texto = m.group(1).partition("|")
+    alvo = alvo.rstrip("\\").strip()  # "[[Nota\|texto]]" dentro de tabelas
+    if not texto:
+        nota, _, titulo = alvo.partition("#")
+        texto = f"{nota} > {titulo}" if nota and titulo else (nota or titulo)
+    texto = _ESCAPE_MARKDOWN.sub(r"\\\1", html.escape(texto.strip(), quote=False))
+    href = links(alvo)
+    if href is None:
+        return f'<span class="link-quebrado" title="{html.escape(alvo)}">{texto}</span>'
+    return f"[{texto}]({quote(href, safe='/#%-._~')})"
+
+
+def reescrever_wikilinks(texto, links):
+    """
+    Troca os links do Obsidian ([[Nota]], [[Nota#Título]], [[Nota|texto]])
+    por links Markdown, fora do código. `links(alvo)` recebe "Nota#Título" e
+    retorna o href, ou None para um link quebrado (que vira só o texto).
+    """
+    if "[[" not in texto:
+        return texto
+    trocar = lambda m: _link_markdown(m, links)
+    partes = []
+    pos = 0
+    for m in CODIGO_MARKDOWN.finditer(texto):
+        partes.append(WIKILINK.sub(trocar, texto[pos:m.start()]))
+        partes.append(m.group(0))
+        pos = m.end()
+    partes.append(WIKILINK.sub(trocar, texto[pos:]))
+    return "".join(partes)
+
+
+def markdown_para_html(texto, resolvedor=None, links=None):
+    """
+    Markdown -> HTML (antes do transformer), com os embeds do Obsidian já
+    reescritos. Com `links` (ver reescrever_wikilinks), também os links entre
+    notas, e os títulos ganham id.
+    """
+    if links is None:
+        return reescrever_embeds(conversor().convert(texto), resolvedor)
+    return reescrever_embeds(conversor(ancoras=True).convert(reescrever_wikilinks(texto, links)), resolvedor)
+
+
+def extrair_urls_imagens(html_content):
+    return IMG_SRC.findall(html_content)
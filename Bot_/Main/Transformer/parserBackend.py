@@ -0,0 +1,48 @@
+# Main/Transformer/parserBackend.py
+
+import importlib.util
+
+from config import PARSER_BACKEND
+
+# Backends de parsing suportados pelo transformer. "html.parser" é o parser
+# puro-Python da biblioteca padrão e sempre está disponível; os demais só são
+# usados se o pacote correspondente estiver instalado.
+BACKENDS = ("html.parser", "lxml", "selectolax")
+
+# Ordem de preferência do modo "auto" (mais rápido primeiro)
+_ORDEM_AUTO = ("selectolax", "lxml", "html.parser")
+
+_avisados = set()
+
+
+def backend_disponivel(nome):
+    if nome == "html.parser":
+        return True
+    return importlib.util.find_spec(nome) is not None
+
+
+def resolver_backend(nome=None):
+    """
+    Retorna o backend efetivo para `nome` (padrão: config.PARSER_BACKEND).
+    Se o backend pedido não estiver instalado, cai para "html.parser".
+    """
+    nome = nome or PARSER_BACKEND
+    if nome == "auto":
+        return next(b for b in _ORDEM_AUTO if backend_disponivel(b))
+    if nome not in BACKENDS:
+        raise ValueError(f"Backend de parser inválido: {nome!r} (use auto, {', '.join(BACKENDS)})")
+    if backend_disponivel(nome):
+        return nome
+    if nome not in _avisados:
+        _avisados.add(nome)
+        print(f"[WARN] Backend '{nome}' não instalado. Usando 'html.parser'.")
+    return "html.parser"
+
+
+def features_bs4(backend):
+    """Nome do parser a passar para o BeautifulSoup para um backend."""
+    # O selectolax não é um parser do BeautifulSoup; para quem precisa de
+    # uma soup (ex.: obter_versao), o lxml é o equivalente mais próximo.
+    if backend == "selectolax":
+        return "lxml" if backend_disponivel("lxml") else "html.parser"
+    return backend
@@ -0,0 +1,76 @@
+# Main/Transformer/selectolaxTransformer.py
+
+import re
+import html
+from datetime import datetime
+
+from selectolax.lexbor import LexborHTMLParser
+
+from Transformer.transformerFile import (
+    ESTILOS_TITULOS, ESTILO_OBS, ESTILO_IMAGEM, ESTILO_STRONG, PREFIXOS_OBS, ALTS_LOGOS
+)
+
+# Mesmas transformações de transformar_html, sobre o parser Lexbor (C) do
+# selectolax. O HTML gerado é equivalente ao do BeautifulSoup, mas não
+# idêntico byte a byte (ex.: <meta ...> em vez de <meta .../>).
+
+_SELETOR = ",".join([*ESTILOS_TITULOS, "p", "img", "strong"])
+_TAG_HEAD = re.compile(r"<head[\s>/]", re.I)
+
+
+def _no(fragmento):
+    """Cria um nó a partir de um trecho de HTML (copiado ao ser inserido)."""
+    return LexborHTMLParser(fragmento).body.child
+
+
+def transformar_html_selectolax(html_content, versao, img_padrao_eorbis, img_padrao_metaprime):
+    """Equivalente a transformar_html usando o selectolax."""
+    tree = LexborHTMLParser(html_content)
+    body = tree.body
+
+    # O Lexbor sempre cria <html>, <head> e <body>. Como no caminho DOM, o
+    # charset só entra no <head> criado agora, não num que já veio na página
+    if not _TAG_HEAD.search(html_content):
+        tree.head.insert_child(LexborHTMLParser('<meta charset="UTF-8">').head.child)
+
+    hr = _no("<hr>")
+    for el in tree.css(_SELETOR):
+        tag = el.tag
+        if tag in ESTILOS_TITULOS:
+            el.attrs["style"] = ESTILOS_TITULOS[tag]
+        elif tag == "p":
+            if el.text(deep=True).strip().startswith(PREFIXOS_OBS):
+                el.attrs["style"] = ESTILO_OBS
+                el.insert_before(hr)
+                el.insert_after(hr)
+        elif tag == "img":
+            alt = el.attributes.get("alt") or ""
+            if not any(logo in alt for logo in ALTS_LOGOS):
+                el.attrs["style"] = ESTILO_IMAGEM
+        elif tag == "strong":
+            texto = el.text(deep=True)
+            if "(" in texto and ")" in texto:
+                el.attrs["style"] = ESTILO_STRONG
+
+    # Cabeçalho com logo e versão
+    data = datetime.today().strftime('%d/%m/%Y')
+    header = _no(
+        '<div style="border-bottom: 2px solid #ccc; padding-bottom: 10px; margin-bottom: 20px;">'
+        f'<img src="{html.escape(img_padrao_eorbis)}" alt="Logo E-Orbis" '
+        'style="max-width:200px; display:block; margin:10px 0;">'
+        '<p style="font-size:12pt; text-align:left; margin:10px 0;">'
+        f'Versão: {html.escape(versao, quote=False)} | Última atualização: {data}</p></div>'
+    )
+    if body.child is not None:
+        body.child.insert_before(header)
+    else:
+        body.insert_child(header)
+
+    # Footer com o logo MetaPrime
+    body.insert_child(_no(
+        '<footer style="border-top: 2px solid #ccc; padding-top: 10px; margin-top: 20px; text-align: right;">'
+        f'<img src="{html.escape(img_padrao_metaprime)}" alt="Logo Meta Prime" '
+        'style="max-width:200px; display:inline-block;"></footer>'
+    ))
+
+    return tree.html
@@ -0,0 +1,232 @@
+# Main/Transformer/streamTransformer.py
+
+from datetime import datetime
+from html.parser import HTMLParser
+
+from bs4.builder import HTMLTreeBuilder
+from bs4.dammit import EntitySubstitution
+
+from Transformer.transformerFile import (
+    _transformar_html_dom, ESTILOS_TITULOS, ESTILO_OBS, ESTILO_IMAGEM, ESTILO_STRONG,
+    PREFIXOS_OBS, ALTS_LOGOS
+)
+
+# Caminho rápido do transformer para o backend "html.parser".
+#
+# A saída do markdown2 é um fragmento bem formado; em vez de montar a árvore
+# do BeautifulSoup e serializá-la de novo, o fragmento passa por um único
+# tokenizer (o mesmo HTMLParser usado pelo BeautifulSoup) que reescreve as
+# tags com os estilos e emite o texto direto para a saída. Cabeçalho e
+# rodapé vêm de um template pré-gerado pelo caminho DOM.
+#
+# A saída é idêntica byte a byte à de _transformar_html_dom. Qualquer coisa
+# que o BeautifulSoup precisaria "consertar" (tags desbalanceadas, <html>/
+# <head>/<body> já presentes, script/style, doctype, entidades estranhas)
+# faz o caminho rápido desistir e devolver None.
+
+# Mesmas tabelas que o BeautifulSoup usa ao montar a árvore
+_BUILDER = HTMLTreeBuilder()
+_VOID = frozenset(_BUILDER.empty_element_tags)
+_LISTA_ATRIBUTOS = _BUILDER.cdata_list_attributes
+_PRESERVA_ESPACOS = frozenset(_BUILDER.preserve_whitespace_tags)
+_ASCII_SPACES = "\x20\x0a\x09\x0c\x0d"
+
+# Tags que o BeautifulSoup trata de forma especial: ficam para o caminho DOM
+_PRECISA_DOM = frozenset({"html", "head", "body", "script", "style", "template", "rt", "rp"})
+
+_SENTINELA_VERSAO = "\ue000"  # caractere de uso privado, não escapado na serialização
+_templates = {}
+
+
+class _PrecisaReparo(Exception):
+    """O fragmento não é trivialmente bem formado; usar o caminho DOM."""
+
+
+def _escapar_texto(texto):
+    return texto.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+
+def _valor_atributo(valor):
+    valor = _escapar_texto(valor)
+    if '"' in valor:
+        if "'" in valor:
+            return '"' + valor.replace('"', "&quot;") + '"'
+        return "'" + valor + "'"
+    return '"' + valor + '"'
+
+
+def _abrir(tag, attrs, vazio=False):
+    # O BeautifulSoup serializa os atributos em ordem alfabética
+    partes = [tag]
+    partes.extend(f"{k}={_valor_atributo(v)}" for k, v in sorted(attrs.items()))
+    return "<" + " ".join(partes) + ("/>" if vazio else ">")
+
+
+def _template(img_padrao_eorbis, img_padrao_metaprime):
+    """
+    (antes do body, cabeçalho, rodapé) gerados uma vez pelo caminho DOM, com
+    uma sentinela no lugar da versão. Recriado quando a data muda.
+    """
+    chave = (img_padrao_eorbis, img_padrao_metaprime, datetime.today().strftime('%d/%m/%Y'))
+    template = _templates.get(chave)
+    if template is None:
+        vazio = _transformar_html_dom("", _SENTINELA_VERSAO, img_padrao_eorbis, img_padrao_metaprime, "html.parser")
+        inicio_body = vazio.index("<body>")
+        inicio_footer = vazio.rindex("<footer")
+        template = (vazio[:inicio_body], vazio[inicio_body:inicio_footer], vazio[inicio_footer:])
+        # Outra thread pode limpar o cache entre a inserção e a leitura (virada
+        # do dia): devolve a tupla local, nunca _templates[chave]
+        _templates.clear()
+        _templates[chave] = template
+    return template
+
+
+class _TransformadorStream(HTMLParser):
+    def __init__(self, fragmento=False):
+        super().__init__(convert_charrefs=False)
+        # Texto de nível 0: o caminho DOM o deixa fora do <body>; num fragmento fica no lugar
+        self.fragmento = fragmento
+        self.antes_body = []
+        self.saida = []
+        self.pilha = []       # [tag, índice da tag de abertura adiada, attrs, textos]
+        self.dados = []
+        self.preserva = 0
+
+    # --- texto ---
+    def _descarregar(self):
+        if not self.dados:
+            return
+        texto = "".join(self.dados)
+        self.dados = []
+        # Mesma regra do BeautifulSoup: texto só de espaços vira " " ou "\n"
+        if not self.preserva and not texto.strip(_ASCII_SPACES):
+            texto = "\n" if "\n" in texto else " "
+        (self.saida if self.pilha or self.fragmento else self.antes_body).append(_escapar_texto(texto))
+        for frame in self.pilha:
+            if frame[3] is not None:
+                frame[3].append(texto)
+
+    def handle_data(self, data):
+        self.dados.append(data)
+
+    def handle_entityref(self, name):
+        caractere = EntitySubstitution.HTML_ENTITY_TO_CHARACTER.get(name)
+        if caractere is None:
+            raise _PrecisaReparo(f"&{name}")
+        self.dados.append(caractere)
+
+    def handle_charref(self, name):
+        try:
+            codigo = int(name[1:], 16) if name[:1] in ("x", "X") else int(name)
+        except ValueError:
+            raise _PrecisaReparo(f"&#{name}")
+        # Fora desta faixa o BeautifulSoup aplica substituições próprias
+        if not (0x20 <= codigo < 0x7F or codigo in (0x09, 0x0A, 0x0D)
+                or (0xA0 <= codigo <= 0xFFFD and not 0xD800 <= codigo <= 0xDFFF
+                    and not 0xFDD0 <= codigo <= 0xFDEF)):
+            raise _PrecisaReparo(f"&#{name}")
+        self.dados.append(chr(codigo))
+
+    def handle_comment(self, data):
+        self._descarregar()
+        (self.saida if self.pilha or self.fragmento else self.antes_body).append(f"<!--{data}-->")
+
+    def handle_decl(self, decl):
+        raise _PrecisaReparo(decl)
+
+    def handle_pi(self, data):
+        raise _PrecisaReparo(data)
+
+    def unknown_decl(self, data):
+        raise _PrecisaReparo(data)
+
+    # --- tags ---
+    def handle_starttag(self, tag, attrs):
+        self._descarregar()
+        if tag in _PRECISA_DOM:
+            raise _PrecisaReparo(tag)
+
+        listas = set(_LISTA_ATRIBUTOS.get("*", ())) | set(_LISTA_ATRIBUTOS.get(tag, ()))
+        d = {}
+        for k, v in attrs:
+            v = "" if v is None else v
+            d[k] = " ".join(v.split()) if k in listas else v
+
+        if tag in ESTILOS_TITULOS:
+            d["style"] = ESTILOS_TITULOS[tag]
+        elif tag == "img" and not any(logo in d.get("alt", "") for logo in ALTS_LOGOS):
+            d["style"] = ESTILO_IMAGEM
+
+        if tag in _VOID:
+            self.saida.append(_abrir(tag, d, vazio=True))
+            return
+
+        if tag in ("p", "strong"):
+            # O estilo depende do texto: a tag de abertura é escrita no fechamento
+            self.pilha.append([tag, len(self.saida), d, []])
+            self.saida.append(None)
+        else:
+            self.pilha.append([tag, None, None, None])
+            self.saida.append(_abrir(tag, d))
+        if tag in _PRESERVA_ESPACOS:
+            self.preserva += 1
+
+    def handle_startendtag(self, tag, attrs):
+        if tag not in _VOID:
+            raise _PrecisaReparo(f"<{tag}/>")
+        self.handle_starttag(tag, attrs)
+
+    def handle_endtag(self, tag):
+        self._descarregar()
+        if not self.pilha or self.pilha[-1][0] != tag:
+            raise _PrecisaReparo(f"</{tag}>")
+        _, indice, d, textos = self.pilha.pop()
+        if tag in _PRESERVA_ESPACOS:
+            self.preserva -= 1
+        if indice is not None:
+            texto = "".join(textos)
+            if tag == "p" and texto.strip().startswith(PREFIXOS_OBS):
+                d["style"] = ESTILO_OBS
+                self.saida[indice] = "<hr/>" + _abrir(tag, d)
+                self.saida.append("</p><hr/>")
+                return
+            if tag == "strong" and "(" in texto and ")" in texto:
+                d["style"] = ESTILO_STRONG
+            self.saida[indice] = _abrir(tag, d)
+        self.saida.append(f"</{tag}>")
+
+
+def _processar(html_content, fragmento=False):
+    """Parser já alimentado com o fragmento, ou None se ele precisar do caminho DOM."""
+    parser = _TransformadorStream(fragmento)
+    try:
+        parser.feed(html_content)
+        parser.close()
+        parser._descarregar()
+    except _PrecisaReparo:
+        return None
+    if parser.pilha:
+        return None
+    return parser
+
+
+def estilizar_fragmento_stream(html_content):
+    """Versão em streaming de estilizar_fragmento. Retorna None se precisar do caminho DOM."""
+    parser = _processar(html_content, fragmento=True)
+    if parser is None:
+        return None
+    return "".join(parser.saida)
+
+
+def transformar_html_stream(html_content, versao, img_padrao_eorbis, img_padrao_metaprime):
+    """
+    Versão em streaming de transformar_html (backend "html.parser").
+    Retorna None se o conteúdo precisar do caminho DOM.
+    """
+    parser = _processar(html_content)
+    if parser is None:
+        return None
+
+    antes_body, cabecalho, rodape = _template(img_padrao_eorbis, img_padrao_metaprime)
+    cabecalho = cabecalho.replace(_SENTINELA_VERSAO, _escapar_texto(versao))
+    return "".join((antes_body, *parser.antes_body, cabecalho, *parser.saida, rodape))
@@ -1,41 +1,133 @@
 # Main/Transformer/transformerFile.py
 
-import os
-import requests
 from bs4 import BeautifulSoup
 from datetime import datetime
 
+from config import TRANSFORMER_FAST_PATH
+from Transformer.parserBackend import resolver_backend, features_bs4
+
+# A consulta/cache da versão do E-Orbis fica em Transformer/versionInfo.py
+
 # As URLs e diretórios agora são importados do config.py
 # Os arquivos Logs/ e Results/ serão gerenciados pela main.py
 
-def obter_versao(url, log_file):
-    """Tenta obter a versão de uma URL ou retorna uma fallback."""
-    try:
-        resp = requests.get(url, timeout=5)
-        resp.raise_for_status()
-        soup = BeautifulSoup(resp.text, "html.parser")
-        div = soup.find("div", class_="softgray")
-        if div and "Versão:" in div.text:
-            versao = div.text.strip().split("Versão:")[-1].strip()
-            os.makedirs(os.path.dirname(log_file), exist_ok=True)
-            with open(log_file, "w", encoding="utf-8") as f:
-                f.write(versao)
-            return versao
-    except requests.RequestException as e:
-        print(f"[WARN] Falha de conexão ao obter versão: {e}")
-    except Exception as e:
-        print(f"[WARN] Erro ao extrair a versão do HTML: {e}")
-    
-    # Versão fallback
-    return "1.0.0"
+# Estilos aplicados pelo transformer
+ESTILOS_TITULOS = {
+    "h1": "font-size:20pt; font-weight:bold; text-align:center;",
+    "h2": "font-size:18pt; font-weight:bold; text-align:left; margin-top:20px;",
+    "h3": "font-size:16pt; font-weight:bold; text-align:left; margin-top:15px;",
+}
+ESTILO_OBS = "font-size:16pt; text-align:center; margin:20px 0; border: 1px solid #ffcc00; padding: 10px;"
+ESTILO_IMAGEM = "display:block; margin:20px auto; max-width:1200px;"
+ESTILO_STRONG = "font-weight:bold; color:#2563eb;" # Exemplo de cor
+
+PREFIXOS_OBS = ("OBS:", "⚠️ OBS:")
+ALTS_LOGOS = ("Logo E-Orbis", "Logo Meta Prime")
+
+_MAX_PREFIXO_OBS = max(len(p) for p in PREFIXOS_OBS)
 
 
-def transformar_html(html_content, versao, img_padrao_eorbis, img_padrao_metaprime):
+def _comeca_com_obs(el):
+    """
+    Equivale a el.text.strip().startswith(PREFIXOS_OBS), mas lê só os
+    primeiros caracteres de texto em vez de montar o texto inteiro.
+    """
+    inicio = ""
+    for s in el.strings:
+        inicio = (inicio + s).lstrip()
+        if len(inicio) >= _MAX_PREFIXO_OBS:
+            break
+    return inicio.startswith(PREFIXOS_OBS)
+
+
+def _tem_parenteses(el):
+    """Equivale a '(' in el.text and ')' in el.text, parando assim que achar os dois."""
+    abre = fecha = False
+    for s in el.strings:
+        abre = abre or "(" in s
+        fecha = fecha or ")" in s
+        if abre and fecha:
+            return True
+    return False
+
+
+def _estilizar_titulo(soup, el):
+    el["style"] = ESTILOS_TITULOS[el.name]
+
+
+def _estilizar_paragrafo(soup, p):
+    # Estilo para blocos de atenção (OBS)
+    if _comeca_com_obs(p):
+        p["style"] = ESTILO_OBS
+        p.insert_before(soup.new_tag("hr"))
+        p.insert_after(soup.new_tag("hr"))
+
+
+def _estilizar_imagem(soup, img):
+    # Imagens centralizadas, exceto logos
+    alt = img.get("alt", "")
+    if not any(logo in alt for logo in ALTS_LOGOS):
+        img["style"] = ESTILO_IMAGEM
+
+
+def _estilizar_strong(soup, strong):
+    # Destaque para textos em strong com parênteses
+    if _tem_parenteses(strong):
+        strong["style"] = ESTILO_STRONG
+
+
+# Tabela de regras: tag -> função que estiliza o elemento
+REGRAS_ESTILO = {
+    **{tag: _estilizar_titulo for tag in ESTILOS_TITULOS},
+    "p": _estilizar_paragrafo,
+    "img": _estilizar_imagem,
+    "strong": _estilizar_strong,
+}
+_TAGS_ESTILIZADAS = list(REGRAS_ESTILO)
+
+
+def transformar_html(html_content, versao, img_padrao_eorbis, img_padrao_metaprime, backend=None):
     """
     Transforma o conteúdo HTML bruto, aplicando estilos e estrutura.
     Retorna o conteúdo HTML transformado.
+
+    `backend` escolhe o parser (padrão: config.PARSER_BACKEND); ver
+    Transformer/parserBackend.py.
+    """
+    backend = resolver_backend(backend)
+    if backend == "selectolax":
+        from Transformer.selectolaxTransformer import transformar_html_selectolax
+        return transformar_html_selectolax(html_content, versao, img_padrao_eorbis, img_padrao_metaprime)
+
+    if backend == "html.parser" and TRANSFORMER_FAST_PATH:
+        # Caminho rápido sem montar a árvore; None = precisa do caminho DOM
+        from Transformer.streamTransformer import transformar_html_stream
+        transformed_html = transformar_html_stream(html_content, versao, img_padrao_eorbis, img_padrao_metaprime)
+        if transformed_html is not None:
+            return transformed_html
+
+    return _transformar_html_dom(html_content, versao, img_padrao_eorbis, img_padrao_metaprime, backend)
+
+
+def estilizar_fragmento(html_content):
     """
+    Aplica só as regras de REGRAS_ESTILO a um fragmento, sem <html>/<head>,
+    cabeçalho nem rodapé (usado pelo modo pacote, Pipeline/bundleBuilder.py).
+    """
+    if TRANSFORMER_FAST_PATH:
+        from Transformer.streamTransformer import estilizar_fragmento_stream
+        fragmento = estilizar_fragmento_stream(html_content)
+        if fragmento is not None:
+            return fragmento
     soup = BeautifulSoup(html_content, "html.parser")
+    for el in soup.find_all(_TAGS_ESTILIZADAS):
+        REGRAS_ESTILO[el.name](soup, el)
+    return str(soup)
+
+
+def _transformar_html_dom(html_content, versao, img_padrao_eorbis, img_padrao_metaprime, backend):
+    """Caminho completo: monta a árvore com o BeautifulSoup, estiliza e serializa."""
+    soup = BeautifulSoup(html_content, features_bs4(backend))
 
     # Garante as tags <html>, <head> e <body>
     if not soup.html:
@@ -70,32 +162,10 @@ def transformar_html(html_content, versao, img_padrao_eorbis, img_padrao_metapri
 
     soup.body.insert(0, header_div)
 
-    # Aplica estilos aos elementos
-    style_map = {
-        "h1": "font-size:20pt; font-weight:bold; text-align:center;",
-        "h2": "font-size:18pt; font-weight:bold; text-align:left; margin-top:20px;",
-        "h3": "font-size:16pt; font-weight:bold; text-align:left; margin-top:15px;",
-    }
-    for tag, style in style_map.items():
-        for el in soup.find_all(tag):
-            el["style"] = style
-
-    # Estilo para blocos de atenção (OBS)
-    for p in soup.find_all("p"):
-        if p.text.strip().startswith(("OBS:", "⚠️ OBS:")):
-            p["style"] = "font-size:16pt; text-align:center; margin:20px 0; border: 1px solid #ffcc00; padding: 10px;"
-            p.insert_before(soup.new_tag("hr"))
-            p.insert_after(soup.new_tag("hr"))
-
-    # Imagens centralizadas, exceto logos
-    for img in soup.find_all("img"):
-        if "Logo E-Orbis" not in img.get("alt", "") and "Logo Meta Prime" not in img.get("alt", ""):
-            img["style"] = "display:block; margin:20px auto; max-width:1200px;"
-
-    # Destaque para textos em strong com parênteses
-    for strong in soup.find_all("strong"):
-        if "(" in strong.text and ")" in strong.text:
-            strong["style"] = "font-weight:bold; color:#2563eb;" # Exemplo de cor
+    # Aplica estilos aos elementos: uma única varredura da árvore, com a
+    # regra de cada tag buscada na tabela REGRAS_ESTILO
+    for el in soup.find_all(_TAGS_ESTILIZADAS):
+        REGRAS_ESTILO[el.name](soup, el)
 
     # Adiciona o footer com o logo MetaPrime
     footer_tag = soup.new_tag("footer", style="border-top: 2px solid #ccc; padding-top: 10px; margin-top: 20px; text-align: right;")
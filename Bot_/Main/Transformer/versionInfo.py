@@ -0,0 +1,93 @@
+# Main/Transformer/versionInfo.py
+
+import os
+import time
+
+from config import VERSAO_FIXA, VERSAO_CACHE_TTL
+from Transformer.parserBackend import resolver_backend, features_bs4
+
+# Versão do E-Orbis carimbada nas páginas: fixa (config/EORBIS_VERSAO), em
+# cache (Logs/versao.txt) ou consultada no servidor. Módulo leve de propósito:
+# a GUI lê a versão antes de abrir a janela, sem carregar bs4 nem requests.
+
+VERSAO_FALLBACK = "1.0.0"
+
+
+def consultar_versao(url, log_file):
+    """Consulta a versão no servidor do E-Orbis e grava em log_file. Retorna None se falhar."""
+    # Importados aqui: quem só converte arquivos (CLI com --versao) e a
+    # abertura da GUI não pagam o custo do requests nem do bs4
+    import requests
+    from bs4 import BeautifulSoup
+    try:
+        resp = requests.get(url, timeout=5)
+        resp.raise_for_status()
+        soup = BeautifulSoup(resp.text, features_bs4(resolver_backend()))
+        div = soup.find("div", class_="softgray")
+        if div and "Versão:" in div.text:
+            versao = div.text.strip().split("Versão:")[-1].strip()
+            os.makedirs(os.path.dirname(log_file), exist_ok=True)
+            with open(log_file, "w", encoding="utf-8") as f:
+                f.write(versao)
+            return versao
+    except requests.RequestException as e:
+        print(f"[WARN] Falha de conexão ao obter versão: {e}")
+    except Exception as e:
+        print(f"[WARN] Erro ao extrair a versão do HTML: {e}")
+    return None
+
+
+def obter_versao(url, log_file):
+    """Tenta obter a versão de uma URL ou retorna uma fallback."""
+    return consultar_versao(url, log_file) or VERSAO_FALLBACK
+
+
+def versao_fixa():
+    """Versão fixada pelo usuário (env EORBIS_VERSAO ou config.VERSAO_FIXA), ou None."""
+    return os.environ.get("EORBIS_VERSAO") or VERSAO_FIXA
+
+
+def ler_versao_cache(log_file, ttl=None):
+    """
+    Lê a última versão gravada por consultar_versao.
+    Retorna (versao, ainda_valida) ou (None, False) se não houver cache.
+    """
+    ttl = VERSAO_CACHE_TTL if ttl is None else ttl
+    try:
+        with open(log_file, "r", encoding="utf-8") as f:
+            versao = f.read().strip()
+        idade = time.time() - os.path.getmtime(log_file)
+    except OSError:
+        return None, False
+    if not versao:
+        return None, False
+    return versao, idade <= ttl
+
+
+def versao_inicial(log_file, ttl=None):
+    """
+    Versão disponível sem acessar a rede, como (versao, origem), com origem
+    "fixa", "cache", "cache_expirado" ou "fallback". Só "fixa" e "cache"
+    dispensam uma consulta ao servidor.
+    """
+    fixa = versao_fixa()
+    if fixa:
+        return fixa, "fixa"
+    versao, valida = ler_versao_cache(log_file, ttl)
+    if versao:
+        return versao, "cache" if valida else "cache_expirado"
+    return VERSAO_FALLBACK, "fallback"
+
+
+def obter_versao_cacheada(url, log_file, ttl=None):
+    """
+    Como obter_versao, mas usa o cache de log_file enquanto estiver dentro do
+    TTL. Retorna (versao, origem); origem "servidor" quando veio da rede.
+    """
+    versao, origem = versao_inicial(log_file, ttl)
+    if origem in ("fixa", "cache"):
+        return versao, origem
+    consultada = consultar_versao(url, log_file)
+    if consultada:
+        return consultada, "servidor"
+    return versao, origem
@@ -0,0 +1,425 @@
+# cli.py
+# -*- coding: utf-8 -*-
+#
+# Entrada de linha de comando (sem interface gráfica) para o pipeline
+# Markdown -> HTML. Não importa tkinter, PIL, tkhtmlview nem tkinterdnd2,
+# então roda em servidores de build sem display.
+#
+# Exemplos:
+#   python cli.py docs/ -o saida/
+#   python cli.py "vault/**/*.md" -o saida/ --versao 3.19.2515 --workers 8
+#   python cli.py vault/ -o saida/ --excluir "rascunhos/*"
+#   python cli.py vault/ -o saida/ --watch
+#   python cli.py vault/ -o pacote/ --pacote documento
+#   python cli.py vault/ -o saida/ --otimizar-imagens --formato-imagens webp
+#   python cli.py vault/ -o saida/ --shard 2/4      (um job de um build dividido em 4)
+#   python cli.py -o saida/ --mesclar               (depois dos 4 shards)
+#
+# Só config, versionInfo, runLog e runReport são importados no início; o
+# pipeline e cada recurso opcional (watch, pacote, imagens, links, busca,
+# shards) são importados no ramo que os usa, então --help e uma conversão
+# simples não pagam pelo que não foi pedido.
+
+import os
+import sys
+import time
+import argparse
+import multiprocessing
+
+from config import (OUTPUT_DIR, VERSAO_URL, VERSAO_LOG, IMG_PADRAO_EORBIS, IMG_PADRAO_METAPRIME, BUILD_CACHE,
+                    BATCH_MODOS, BUNDLE_MODO, BUNDLE_MODOS, IMG_OTIMIZAR, IMG_FORMATO, IMG_FORMATOS,
+                    IMG_LARGURA_MAX, LINKS_RESOLVER, BUSCA_INDICE, BUSCA_PAGINA)
+from Transformer.versionInfo import obter_versao_cacheada
+from Pipeline.runLog import LogExecucao
+from Pipeline.runReport import RelatorioExecucao, formatar
+
+
+def _shard(texto):
+    from Pipeline.shardBuild import ler_shard
+    try:
+        return ler_shard(texto)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def _criar_parser():
+    parser = argparse.ArgumentParser(
+        prog="cli.py",
+        description="E-Orbis • Processador de Markdown → HTML (modo sem interface)."
+    )
+    parser.add_argument("entradas", nargs="*",
+                        help="Arquivos .md, pastas ou padrões glob (ex.: \"docs/**/*.md\"). Pastas são "
+                             "varridas recursivamente e a saída mantém as subpastas.")
+    parser.add_argument("--incluir", action="append", metavar="GLOB",
+                        help="Padrão de arquivos a incluir ao varrer pastas (repetível; padrão: config.PASTA_INCLUIR).")
+    parser.add_argument("--excluir", action="append", metavar="GLOB",
+                        help="Padrão de arquivos/pastas a ignorar ao varrer pastas (repetível; padrão: config.PASTA_EXCLUIR).")
+    parser.add_argument("-o", "--saida", default=OUTPUT_DIR,
+                        help=f"Pasta de saída dos .html (padrão: {OUTPUT_DIR}).")
+    parser.add_argument("--versao",
+                        help="Versão do E-Orbis a carimbar nas páginas. Se omitida, usa EORBIS_VERSAO, "
+                             "o cache em Logs/versao.txt ou consulta o servidor.")
+    parser.add_argument("-w", "--workers", type=int, default=None,
+                        help="Quantidade de workers (padrão: número de núcleos).")
+    parser.add_argument("--modo", choices=BATCH_MODOS, default=None,
+                        help="Modo de execução da fila (padrão: config.BATCH_MODE).")
+    parser.add_argument("-f", "--forcar", action="store_true",
+                        help="Reconverte todos os arquivos, ignorando o manifesto de build incremental.")
+    parser.add_argument("--sem-cache", action="store_true",
+                        help="Não lê nem grava o manifesto de build incremental.")
+    parser.add_argument("--pacote", choices=BUNDLE_MODOS, default=BUNDLE_MODO,
+                        help="Gera um pacote em vez de páginas independentes: 'documento' (um .html com "
+                             "sumário) ou 'site' (páginas + index.html), com estilo.css e assets/ compartilhados.")
+    parser.add_argument("--otimizar-imagens", action="store_true", default=IMG_OTIMIZAR,
+                        help="Reduz e recomprime as imagens locais usadas nas páginas e grava as cópias "
+                             "em <saída>/imagens (requer Pillow; padrão: config.IMG_OTIMIZAR).")
+    parser.add_argument("--formato-imagens", choices=IMG_FORMATOS, default=IMG_FORMATO,
+                        help=f"Formato das imagens otimizadas (padrão: {IMG_FORMATO}).")
+    parser.add_argument("--largura-imagens", type=int, default=IMG_LARGURA_MAX, metavar="PX",
+                        help=f"Largura máxima das imagens otimizadas (padrão: {IMG_LARGURA_MAX}).")
+    parser.add_argument("--sem-links", action="store_true", default=not LINKS_RESOLVER,
+                        help="Não resolve os links entre notas ([[Nota]], [[Nota#Título]]); eles ficam como "
+                             "texto (padrão: config.LINKS_RESOLVER).")
+    parser.add_argument("--sem-busca", action="store_true", default=not BUSCA_INDICE,
+                        help=f"Não gera o índice de busca (<saída>/busca/) nem a página {BUSCA_PAGINA} "
+                             "(padrão: config.BUSCA_INDICE).")
+    parser.add_argument("--shard", type=_shard, metavar="I/N",
+                        help="Converte só o shard I de N (pelo caminho de saída de cada arquivo) e grava um "
+                             "manifesto parcial na pasta de saída, para dividir o build entre jobs ou máquinas. "
+                             "Passe as mesmas entradas em todos os shards.")
+    parser.add_argument("--mesclar", action="store_true",
+                        help="Junta os manifestos parciais dos shards da pasta de saída: confere saídas "
+                             "faltando ou duplicadas, grava o manifesto de build e o índice de busca e gera "
+                             "o relatório final (sem entradas).")
+    parser.add_argument("--watch", action="store_true",
+                        help="Após a conversão, continua observando as entradas e reconverte cada .md "
+                             "assim que ele for salvo (Ctrl+C para sair).")
+    parser.add_argument("--perfil", metavar="ARQUIVO",
+                        help="Grava cProfile e tracemalloc da conversão do .md ARQUIVO (o nome ou o caminho "
+                             "relativo à pasta de entrada) em Logs/perfis (o mesmo que a variável EORBIS_PERFIL).")
+    parser.add_argument("-q", "--quiet", action="store_true",
+                        help="Mostra apenas erros e o resumo final.")
+    return parser
+
+
+def main(argv=None):
+    parser = _criar_parser()
+    args = parser.parse_args(argv)
+    if args.mesclar:
+        if args.entradas or args.shard:
+            parser.error("--mesclar não recebe entradas nem --shard")
+        return _mesclar(args)
+    if not args.entradas:
+        parser.error("informe os arquivos, pastas ou padrões de entrada")
+    if args.shard and (args.pacote or args.watch):
+        parser.error("--shard não pode ser usado com --pacote nem com --watch")
+    if args.perfil:
+        # Pela variável de ambiente, para valer também nos processos do pool
+        os.environ["EORBIS_PERFIL"] = args.perfil
+
+    from Pipeline.batchProcessor import coletar_arquivos, saidas_duplicadas
+
+    raizes = {}
+    arquivos = coletar_arquivos(args.entradas, raizes, args.incluir, args.excluir)
+    if not arquivos:
+        print("[ERRO] Nenhum arquivo .md encontrado nas entradas informadas.", file=sys.stderr)
+        return 2
+    for destino, origens in saidas_duplicadas(arquivos, args.saida, raizes).items():
+        print(f"[WARN] {len(origens)} arquivos geram a mesma saída {destino}; o último convertido prevalece.",
+              file=sys.stderr)
+
+    versao = args.versao
+    if not versao:
+        versao, origem = obter_versao_cacheada(VERSAO_URL, VERSAO_LOG)
+        if origem == "fallback":
+            print(f"[WARN] Versão do E-Orbis desconhecida; usando {versao}. Use --versao para fixá-la.", file=sys.stderr)
+        elif origem == "cache_expirado":
+            print(f"[WARN] Servidor indisponível; usando a última versão conhecida ({versao}).", file=sys.stderr)
+
+    imagens = None
+    if args.otimizar_imagens:
+        from Pipeline.imageOptimizer import OtimizadorImagens
+        try:
+            imagens = OtimizadorImagens(largura=args.largura_imagens, formato=args.formato_imagens)
+        except RuntimeError as e:
+            print(f"[ERRO] {e}", file=sys.stderr)
+            return 2
+
+    estado = {'sucesso': 0, 'erros': 0, 'pulados': 0}
+    relatorio = RelatorioExecucao()
+    parcial = None
+    total = len(arquivos)
+    if args.shard:
+        from Pipeline.batchProcessor import arquivos_do_shard
+        from Pipeline.shardBuild import ManifestoParcial
+        parcial = ManifestoParcial(args.saida, args.shard, arquivos, raizes)
+        total = len(arquivos_do_shard(arquivos, args.saida, args.shard, raizes))
+        print(f"[INFO] Shard {args.shard[0]}/{args.shard[1]}: {total} de {len(arquivos)} arquivo(s).")
+
+    try:
+        # Um log por shard: shards na mesma máquina podem começar no mesmo segundo
+        log_execucao = LogExecucao(prefixo=f"execucao-shard{args.shard[0]}de{args.shard[1]}") \
+            if args.shard else LogExecucao()
+        log_execucao.registrar("inicio", total=total, saida=args.saida, versao=versao, forcar=args.forcar,
+                               shard=args.shard)
+    except OSError as e:
+        log_execucao = None
+        print(f"[WARN] Não foi possível criar o log da execução: {e}", file=sys.stderr)
+
+    def on_result(resultado):
+        nome = os.path.basename(resultado['arquivo'])
+        if log_execucao:
+            log_execucao.arquivo(resultado)
+        relatorio.adicionar(resultado)
+        if parcial:
+            parcial.adicionar(resultado)
+        if resultado.get('perfil'):
+            print(f"[INFO] Perfil de {nome}: {resultado['perfil']}")
+        elif resultado.get('erro_perfil'):
+            print(f"[WARN] Perfil de {nome} não gravado: {resultado['erro_perfil']}", file=sys.stderr)
+        if resultado['pulado']:
+            estado['sucesso'] += 1
+            estado['pulados'] += 1
+        elif resultado['ok']:
+            estado['sucesso'] += 1
+            if not args.quiet:
+                print(f"[OK] {nome} → {resultado['saida']}")
+        else:
+            estado['erros'] += 1
+            print(f"[ERRO] Falha ao processar {nome}: {resultado['erro']}", file=sys.stderr)
+
+    if args.pacote:
+        return _gerar_pacote(args, arquivos, raizes, versao, on_result, estado, log_execucao, imagens)
+
+    from Pipeline.batchProcessor import processar_lote
+    from Pipeline.buildCache import ManifestoBuild
+    from Pipeline.outputWriter import GravadorSaida
+
+    links = _indice_links(args)
+    busca = _indice_busca(args)
+    saidas = GravadorSaida()
+    manifesto = None
+    if BUILD_CACHE and not args.sem_cache:
+        manifesto = ManifestoBuild(args.saida, forcar=args.forcar, imagens=imagens, links=links is not None)
+
+    inicio = time.perf_counter()
+    try:
+        concluido = processar_lote(
+            arquivos, args.saida, versao, IMG_PADRAO_EORBIS, IMG_PADRAO_METAPRIME,
+            modo=args.modo, workers=args.workers,
+            on_result=on_result, manifesto=manifesto, raizes=raizes, imagens=imagens, links=links, busca=busca,
+            saidas=saidas, shard=args.shard
+        )
+    except KeyboardInterrupt:
+        concluido = False
+    duracao = time.perf_counter() - inicio
+
+    extras = {"imagens": imagens.resumo()} if imagens else {}
+    if links:
+        extras["links"] = links.resumo()
+    if busca and busca.resumo():
+        extras["busca"] = busca.resumo()
+    extras["saidas"] = saidas.resumo()
+    dados_relatorio = relatorio.gerar(duracao, versao=versao, concluido=concluido, **extras)
+    try:
+        # Num shard, o relatório da pasta de saída só sai na mesclagem
+        if parcial:
+            caminho_relatorio = parcial.salvar(duracao, concluido, versao, manifesto=manifesto, busca=busca,
+                                               links=links, saidas=saidas)
+        else:
+            caminho_relatorio = RelatorioExecucao.salvar(dados_relatorio, args.saida)
+    except OSError as e:
+        caminho_relatorio = None
+        print(f"[WARN] Não foi possível gravar o relatório da execução: {e}", file=sys.stderr)
+    if log_execucao and not args.watch:
+        log_execucao.fechar(concluido=concluido, duracao=duracao, relatorio=caminho_relatorio, **estado)
+    if not args.quiet and (estado['sucesso'] - estado['pulados']):
+        print(formatar(dados_relatorio))
+
+    print(f"[INFO] {estado['sucesso']}/{total} arquivos processados com sucesso "
+          f"em {duracao:.2f}s (versão {versao}).")
+    if estado['pulados']:
+        print(f"[INFO] {estado['pulados']} arquivo(s) sem alterações não foram reconvertidos.")
+    if imagens:
+        _resumo_imagens(imagens)
+    if links:
+        _links_quebrados(links)
+    if busca and busca.resumo():
+        _resumo_busca(args, busca)
+    _resumo_saidas(saidas)
+    if manifesto:
+        for obsoleto in manifesto.obsoletos():
+            print(f"[WARN] Saída obsoleta (o .md de origem não existe mais): {obsoleto}")
+    if not concluido:
+        print("[WARN] Processamento interrompido.", file=sys.stderr)
+        return 130
+    if args.watch:
+        try:
+            return _observar(args, arquivos, raizes, versao, manifesto, on_result, imagens)
+        finally:
+            if log_execucao:
+                log_execucao.fechar(concluido=True, duracao=time.perf_counter() - inicio, **estado)
+    if not args.quiet:
+        if caminho_relatorio:
+            print(f"[INFO] {'Manifesto parcial do shard' if parcial else 'Relatório da execução'}: "
+                  f"{caminho_relatorio}")
+        if log_execucao:
+            print(f"[INFO] Log da execução: {log_execucao.path}")
+    return 1 if estado['erros'] else 0
+
+
+def _resumo_imagens(imagens):
+    resumo = imagens.resumo()
+    print(f"[INFO] Imagens otimizadas ({resumo['opcoes']}): {resumo['processadas']} geradas "
+          f"({resumo['bytes_origem'] / 1024:.0f} KiB → {resumo['bytes_destino'] / 1024:.0f} KiB), "
+          f"{resumo['em_cache']} já existiam.")
+    for erro in imagens.erros:
+        print(f"[WARN] Imagem copiada sem otimizar: {erro}", file=sys.stderr)
+
+
+def _links_quebrados(links):
+    for arquivo, alvo in links.quebrados:
+        print(f"[WARN] Link quebrado em {os.path.basename(arquivo)}: [[{alvo}]]", file=sys.stderr)
+
+
+def _resumo_busca(args, busca):
+    resumo = busca.resumo()
+    print(f"[INFO] Índice de busca: {resumo['paginas']} página(s), {resumo['termos']} termos em "
+          f"{resumo['shards']} arquivo(s) → {os.path.join(args.saida, BUSCA_PAGINA)}")
+
+
+def _resumo_saidas(saidas):
+    resumo = saidas.resumo()
+    if resumo["inalterados"] or resumo["removidos"]:
+        print(f"[INFO] Saídas: {resumo['gravados']} gravada(s), {resumo['inalterados']} sem alteração "
+              f"(não regravadas), {resumo['removidos']} removida(s).")
+    for removido in saidas.removidos:
+        print(f"[INFO] Saída removida (não é mais gerada): {removido}")
+
+
+def _indice_links(args):
+    if args.sem_links:
+        return None
+    from Pipeline.linkIndex import IndiceLinks
+    return IndiceLinks(args.saida)
+
+
+def _indice_busca(args):
+    if args.sem_busca:
+        return None
+    from Pipeline.searchIndex import IndiceBusca
+    return IndiceBusca(args.saida)
+
+
+def _mesclar(args):
+    """--mesclar: junta os manifestos parciais dos shards gravados em args.saida."""
+    from Pipeline.shardBuild import mesclar
+    try:
+        dados_relatorio = mesclar(args.saida)
+    except RuntimeError as e:
+        print(f"[ERRO] {e}", file=sys.stderr)
+        return 2
+    mesclagem = dados_relatorio["mesclagem"]
+    try:
+        caminho_relatorio = RelatorioExecucao.salvar(dados_relatorio, args.saida)
+    except OSError as e:
+        caminho_relatorio = None
+        print(f"[WARN] Não foi possível gravar o relatório da execução: {e}", file=sys.stderr)
+    if not args.quiet:
+        print(formatar(dados_relatorio))
+
+    for path in mesclagem["ignorados"]:
+        print(f"[INFO] Manifesto parcial de outra divisão ignorado: {path}")
+    for problema in mesclagem["problemas"]:
+        print(f"[WARN] {problema}", file=sys.stderr)
+    if not mesclagem["indices_gravados"]:
+        print("[WARN] Manifesto de build e índice de busca não foram gravados (shards incompletos "
+              "ou inconsistentes).", file=sys.stderr)
+    for saida in mesclagem["faltando"]:
+        print(f"[ERRO] Saída faltando: {saida}", file=sys.stderr)
+    for saida, origens in mesclagem["duplicadas"].items():
+        print(f"[WARN] Saída gerada mais de uma vez: {saida} ← {'; '.join(origens)}", file=sys.stderr)
+    for arquivo in dados_relatorio["com_erro"]:
+        print(f"[ERRO] Falha ao processar {arquivo}", file=sys.stderr)
+
+    shards = dados_relatorio["shards"]
+    arquivos = dados_relatorio["arquivos"]
+    print(f"[INFO] {shards['mesclados']}/{shards['total']} shard(s) mesclados: {arquivos['convertidos']} "
+          f"convertido(s), {arquivos['pulados']} sem alterações, {arquivos['erros']} com erro.")
+    if dados_relatorio.get("busca"):
+        print(f"[INFO] Índice de busca: {dados_relatorio['busca']['paginas']} página(s) → "
+              f"{os.path.join(args.saida, BUSCA_PAGINA)}")
+    if caminho_relatorio and not args.quiet:
+        print(f"[INFO] Relatório da execução: {caminho_relatorio}")
+    falhou = mesclagem["problemas"] or mesclagem["faltando"] or mesclagem["duplicadas"] or arquivos["erros"]
+    return 1 if falhou else 0
+
+
+def _gerar_pacote(args, arquivos, raizes, versao, on_result, estado, log_execucao, imagens):
+    """Modo pacote: sempre regenera o pacote inteiro (não usa o manifesto incremental)."""
+    from Pipeline.bundleBuilder import gerar_pacote
+    inicio = time.perf_counter()
+    try:
+        resumo = gerar_pacote(arquivos, args.saida, versao, args.pacote, raizes=raizes,
+                              modo=args.modo, workers=args.workers, on_result=on_result, imagens=imagens)
+    except KeyboardInterrupt:
+        resumo = None
+    duracao = time.perf_counter() - inicio
+    if log_execucao:
+        log_execucao.fechar(concluido=bool(resumo and not resumo["interrompido"]), duracao=duracao,
+                            pacote=resumo, **estado)
+    if resumo is None or resumo["interrompido"]:
+        print("[WARN] Processamento interrompido.", file=sys.stderr)
+        return 130
+    print(f"[INFO] Pacote '{resumo['modo']}' com {resumo['notas']} nota(s) gerado em {duracao:.2f}s: {resumo['saida']}")
+    print(f"[INFO] {resumo['assets']} imagem(ns) copiada(s) para assets/ ({resumo['bytes_assets'] / 1024:.0f} KiB).")
+    if imagens:
+        _resumo_imagens(imagens)
+    return 1 if estado['erros'] else 0
+
+
+def _observar(args, arquivos, raizes, versao, manifesto, on_result, imagens):
+    """Modo watch: reconverte só os arquivos salvos, até Ctrl+C."""
+    from Pipeline.batchProcessor import processar_lote
+    from Pipeline.outputWriter import GravadorSaida
+    from Pipeline.watcher import ObservadorArquivos
+    pastas = sorted(set(raizes.values()))
+    avulsos = [a for a in arquivos if a not in raizes]
+
+    def on_mudanca(alterados):
+        inicio = time.perf_counter()
+        raizes_alterados = {a: observador.raiz_de(a) for a in alterados if observador.raiz_de(a)}
+        links = _indice_links(args)
+        busca = _indice_busca(args)
+        saidas = GravadorSaida()
+        processar_lote(
+            alterados, args.saida, versao, IMG_PADRAO_EORBIS, IMG_PADRAO_METAPRIME,
+            # Poucos arquivos por vez: subir um pool de processos a cada salvamento
+            # custaria mais que a conversão (como no modo watch da GUI)
+            modo="threads", workers=args.workers,
+            on_result=on_result, manifesto=manifesto, raizes=raizes_alterados, imagens=imagens, links=links,
+            busca=busca, saidas=saidas
+        )
+        if links:
+            _links_quebrados(links)
+        if not args.quiet:
+            _resumo_saidas(saidas)
+        if not args.quiet:
+            print(f"[INFO] {len(alterados)} arquivo(s) alterado(s) verificado(s) em {time.perf_counter() - inicio:.2f}s.")
+
+    observador = ObservadorArquivos(on_mudanca, avulsos, pastas, args.incluir, args.excluir).iniciar()
+    print(f"[INFO] Observando {len(avulsos)} arquivo(s) e {len(pastas)} pasta(s) "
+          f"({observador.modo}). Ctrl+C para sair.")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        observador.parar()
+    return 0
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
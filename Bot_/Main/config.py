@@ -8,9 +8,175 @@ OUTPUT_DIR = "temp_output"
 # URL para pegar a versão do E-Orbis (sem login)
 VERSAO_URL = "http://192.168.99.183:8585/eorbis/"
 
+# Arquivo onde a última versão obtida do servidor fica gravada
+VERSAO_LOG = "Logs/versao.txt"
+
+# Validade (s) da versão gravada em Logs/versao.txt. Dentro do prazo ela é
+# usada direto; depois disso o app abre com ela e atualiza em segundo plano.
+VERSAO_CACHE_TTL = 6 * 60 * 60
+
+# Versão fixa a carimbar nas páginas (ignora servidor e cache). Também pode
+# ser definida pela variável de ambiente EORBIS_VERSAO.
+VERSAO_FIXA = None
+
+# Extras do markdown2 usados na conversão .md -> HTML
+MARKDOWN_EXTRAS = ["tables", "fenced-code-blocks"]
+
+# Parser usado pelo transformer: "html.parser" (puro-Python, sempre disponível),
+# "lxml", "selectolax" ou "auto" (o mais rápido instalado). Backends não
+# instalados caem para "html.parser".
+PARSER_BACKEND = "html.parser"
+
+# Com o backend "html.parser", usa o transformer em streaming (sem montar a
+# árvore do BeautifulSoup) sempre que o HTML do markdown2 for bem formado.
+# A saída é idêntica; entradas que precisam de reparo seguem pelo caminho DOM.
+TRANSFORMER_FAST_PATH = True
+
+# Modo de execução da fila: "processos" (um núcleo por worker), "threads" ou "sequencial".
+# Se o pool de processos não puder ser criado, cai automaticamente para "threads".
+BATCH_MODE = "processos"
+BATCH_MODOS = ("processos", "threads", "sequencial")
+
+# Quantidade de workers da fila (None = número de núcleos da máquina)
+BATCH_WORKERS = None
+
+# Manifesto do build incremental, gravado na pasta de saída. Arquivos cujo .md,
+# versão e transformer não mudaram desde a última execução não são reconvertidos.
+BUILD_CACHE = True
+BUILD_MANIFEST = ".eorbis_build.json"
+
+# Saídas registradas no manifesto cujo .md de origem não existe mais são
+# apagadas ao fim do lote (False: só avisa). As demais só são regravadas
+# quando o conteúdo muda (Pipeline/outputWriter.py).
+SAIDA_REMOVER_OBSOLETOS = True
+
+# Links entre notas do Obsidian ([[Nota]], [[Nota#Título]], [[Nota|texto]]):
+# resolvidos por um índice de nomes, aliases e títulos de todas as notas,
+# gravado na pasta de saída e atualizado só para as notas alteradas
+# (Pipeline/linkIndex.py). Desligado, os links ficam como texto.
+LINKS_RESOLVER = True
+LINKS_INDICE = ".eorbis_links.json"
+
+# Índice de busca de texto completo (Pipeline/searchIndex.py): gerado ao final
+# de cada lote em <saída>/busca/, com um arquivo por prefixo dos termos
+# (BUSCA_PREFIXO letras), e a página <saída>/busca.html, que carrega só os
+# arquivos dos termos buscados. Também alimenta o filtro da fila na interface.
+BUSCA_INDICE = True
+BUSCA_DADOS = ".eorbis_busca.json"
+BUSCA_PASTA = "busca"
+BUSCA_PAGINA = "busca.html"
+BUSCA_PREFIXO = 2
+BUSCA_TITULO = "Buscar na documentação E-Orbis"
+
+# Build dividido em shards (cli.py --shard I/N, Pipeline/shardBuild.py): cada
+# invocação converte os arquivos cujo caminho de saída cai no shard I e grava
+# um manifesto parcial na pasta de saída; cli.py --mesclar junta os N
+# manifestos parciais, grava o manifesto de build e o índice de busca e gera
+# o relatório final.
+SHARD_PARCIAL = ".eorbis_shard_{indice}de{total}.json"
+
+# Varredura de pastas ("Adicionar Pasta" e pastas passadas ao cli.py): recursiva,
+# com padrões glob aplicados ao caminho relativo e ao nome. Pastas excluídas não
+# são visitadas; ".*" ignora .obsidian, .git, .trash etc.
+PASTA_INCLUIR = ["*.md"]
+PASTA_EXCLUIR = [".*"]
+# Arquivos enviados à fila da interface por vez durante a varredura
+PASTA_LOTE = 200
+
+# Modo watch: reconverte os .md alterados. Sem o pacote watchdog, verifica
+# mtime/tamanho a cada WATCH_INTERVALO segundos; enquanto nada muda, o
+# intervalo dobra até WATCH_INTERVALO_MAX. Eventos do mesmo arquivo dentro
+# de WATCH_DEBOUNCE segundos contam como um único salvamento.
+WATCH_DEBOUNCE = 0.25
+WATCH_INTERVALO = 0.5
+WATCH_INTERVALO_MAX = 5.0
+
+# Log estruturado (JSON lines) de cada execução da fila, gravado em LOGS_DIR.
+# Só as LOG_EXECUCOES_MANTER execuções mais recentes são mantidas.
+LOGS_DIR = "Logs"
+LOG_EXECUCOES_MANTER = 30
+
+# Log da interface: linhas visíveis (as mais antigas são descartadas) e
+# máximo de mensagens escritas no widget a cada atualização da UI (50 ms)
+LOG_MAX_LINHAS = 2000
+LOG_LOTE_UI = 1000
+
+# Relatório de cada execução (tempo por etapa, percentis, arquivos mais lentos),
+# gravado na pasta de saída e mostrado na aba "Relatório" ao final da fila.
+# Os tempos mudam a cada execução, então é o único arquivo da pasta de saída
+# sempre regravado: a sincronização com o servidor deve ignorar
+# RELATORIO_ARQUIVO, ou RELATORIO_PASTA pode apontar para outra pasta (ex.:
+# LOGS_DIR). None = a pasta de saída.
+RELATORIO_ARQUIVO = "relatorio_execucao.json"
+RELATORIO_PASTA = None
+RELATORIO_MAIS_LENTOS = 10
+
+# Perfil (cProfile + tracemalloc) de um único arquivo: nome do .md a perfilar
+# ou o caminho dele relativo à pasta de origem (ex.: "Guia/Instalacao.md"),
+# ou None. Só o primeiro que casar é perfilado. A variável de ambiente
+# EORBIS_PERFIL tem prioridade.
+PERFIL_ARQUIVO = None
+PERFIL_PASTA = os.path.join("Logs", "perfis")
+
 # URL base para links de imagens do Obsidian no HTML gerado
 URL_BASE_IMAGENS = "https://raw.githubusercontent.com/MirandaDev00/Bot_Documentacao_Eorbis/main/Bot_/img_doc/"
 
+# Pastas locais com as mesmas imagens de URL_BASE_IMAGENS. Quando a imagem
+# existe aqui, preview e thumbnails usam o arquivo local em vez da rede.
+IMG_DIRS_LOCAIS = [os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "img_doc")]
+
+# Logos usados no cabeçalho e no rodapé das páginas geradas
+IMG_PADRAO_EORBIS = "https://raw.githubusercontent.com/MirandaDev00/Bot_Documentacao_Eorbis/main/Bot_/Assets/Logo%20eorbis.png"
+IMG_PADRAO_METAPRIME = "https://raw.githubusercontent.com/MirandaDev00/Bot_Documentacao_Eorbis/main/Bot_/Assets/Logo%20metaprime.png"
+
+# Cópia local de Bot_/Assets (logos), usada no modo pacote em vez do GitHub
+URL_BASE_ASSETS = "https://raw.githubusercontent.com/MirandaDev00/Bot_Documentacao_Eorbis/main/Bot_/Assets/"
+ASSETS_LOCAIS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Assets")
+
+# Modo pacote: None (uma página .html independente por arquivo), "documento"
+# (um único .html com sumário) ou "site" (páginas + index.html com sumário).
+# Nos dois últimos, os estilos ficam num estilo.css compartilhado e as imagens
+# locais são copiadas uma vez para assets/, com o hash do conteúdo no nome.
+BUNDLE_MODO = None
+BUNDLE_MODOS = ("documento", "site")
+BUNDLE_DOCUMENTO = "documentacao.html"
+BUNDLE_TITULO = "Documentação E-Orbis"
+
+# Otimização das imagens referenciadas (Pipeline/imageOptimizer.py, requer
+# Pillow). Desligada, as páginas apontam para URL_BASE_IMAGENS; ligada, cada
+# imagem de IMG_DIRS_LOCAIS usada nas páginas é reduzida para a largura de
+# exibição, recomprimida (ou convertida para WebP) e gravada uma única vez em
+# <saída>/imagens (ou assets/ no modo pacote), com o hash do conteúdo no nome.
+IMG_OTIMIZAR = False
+IMG_LARGURA_MAX = 1200          # a mesma largura máxima das <img> nas páginas
+IMG_FORMATO = "webp"            # "webp", "jpeg", "png" ou "original" (mantém o formato)
+IMG_FORMATOS = ("webp", "jpeg", "png", "original")
+IMG_QUALIDADE = 80
+IMG_PASTA_SAIDA = "imagens"
+
+# Thumbnails do preview: carregadas em segundo plano, com cache em memória
+# (LRU, em quantidade de imagens) e em disco (por URL + ETag)
+THUMB_CACHE_DIR = os.path.join("Cache", "thumbs")
+THUMB_CACHE_MEMORIA = 256
+THUMB_TAMANHO = (140, 140)
+THUMB_TIMEOUT = 6
+THUMB_WORKERS = 6
+
+# Tamanho máximo (em bytes de HTML) do cache de previews já renderizados
+PREVIEW_CACHE_BYTES = 32 * 1024 * 1024
+
+# Espera (ms) após a última mudança de seleção antes de renderizar o preview
+PREVIEW_DEBOUNCE_MS = 150
+
+# Abertura da GUI: com GUI_INICIO_RAPIDO a janela aparece antes de carregar
+# os módulos pesados (markdown2, bs4, requests, PIL, tkhtmlview, tkinterdnd2)
+# e das abas do preview, que são carregados no primeiro uso. Com
+# GUI_PRECARREGAR, depois que a janela aparece eles são importados em
+# segundo plano, para o primeiro preview/execução não esperar por isso.
+# GUI_INICIO_RAPIDO = False carrega tudo antes de mostrar a janela.
+GUI_INICIO_RAPIDO = True
+GUI_PRECARREGAR = True
+
 # Dicionário de temas para fácil alternância
 THEMES = {
     'light': {
@@ -2,44 +2,44 @@
 # -*- coding: utf-8 -*-
 
 import os
-import re
+import time
 import threading
 import queue
+import importlib
+import importlib.util
+import multiprocessing
 import traceback
-import requests
-import io
-import markdown2
+from concurrent.futures import ThreadPoolExecutor
 
 import tkinter as tk
-from tkinter import ttk, filedialog, messagebox
+from tkinter import ttk, filedialog, messagebox, simpledialog
 from tkinter.scrolledtext import ScrolledText
 
 # ---- Módulos locais e constantes ----
-# Agora importa a função transformer da sua nova localização
-from Transformer.transformerFile import transformar_html, obter_versao
-from config import THEMES, URL_BASE_IMAGENS, VERSAO_URL, OUTPUT_DIR
+# Só os módulos leves são importados aqui. Conversão (markdown2/bs4), preview,
+# thumbnails (requests/PIL), relatórios e modo watch são importados dentro
+# dos métodos que os usam, na primeira vez (ver config.GUI_INICIO_RAPIDO).
+from Transformer.versionInfo import versao_inicial, consultar_versao
+from config import (THEMES, VERSAO_URL, VERSAO_LOG,
+                    IMG_PADRAO_EORBIS, IMG_PADRAO_METAPRIME, BUILD_CACHE, PREVIEW_DEBOUNCE_MS,
+                    PASTA_INCLUIR, PASTA_EXCLUIR, PASTA_LOTE, LOG_MAX_LINHAS, LOG_LOTE_UI, BUNDLE_MODO,
+                    IMG_OTIMIZAR, GUI_INICIO_RAPIDO, GUI_PRECARREGAR, LINKS_RESOLVER,
+                    BUSCA_INDICE, BUSCA_PAGINA)
+from Pipeline.fileDiscovery import descobrir_markdown, em_lotes, separar_padroes
+from Pipeline.fileQueue import FilaArquivos
+from Transformer.imageResolver import resolvedor_padrao
 
 # ---- Dependências opcionais ----
-try:
-    from tkhtmlview import HTMLLabel
-except ImportError:
-    HTMLLabel = None
-
-try:
-    from PIL import Image, ImageTk
-    PIL_AVAILABLE = True
-except ImportError:
-    PIL_AVAILABLE = False
-
-try:
-    from tkinterdnd2 import DND_FILES, TkinterDnD
-    DND_AVAILABLE = True
-except ImportError:
-    DND_AVAILABLE = False
-
-# URLs de imagens para o transformer
-IMG_PADRAO_EORBIS = "https://raw.githubusercontent.com/MirandaDev00/Bot_Documentacao_Eorbis/main/Bot_/Assets/Logo%20eorbis.png"
-IMG_PADRAO_METAPRIME = "https://raw.githubusercontent.com/MirandaDev00/Bot_Documentacao_Eorbis/main/Bot_/Assets/Logo%20metaprime.png"
+# Aqui só se verifica se estão instaladas; a importação fica para o primeiro uso
+HTMLVIEW_AVAILABLE = importlib.util.find_spec("tkhtmlview") is not None
+PIL_AVAILABLE = importlib.util.find_spec("PIL") is not None
+DND_AVAILABLE = importlib.util.find_spec("tkinterdnd2") is not None
+
+# Importados em segundo plano logo depois que a janela aparece (GUI_PRECARREGAR)
+MODULOS_PESADOS = (
+    "Preview.previewCache", "Pipeline.batchProcessor", "Pipeline.buildCache",
+    "Pipeline.runReport", "Pipeline.runLog", "Preview.thumbnailLoader", "tkhtmlview",
+)
 
 class App:
     def __init__(self, root):
@@ -47,24 +47,101 @@ class App:
         self.root.title("E-Orbis • Processador de Markdown → HTML")
         self.root.geometry("1480x920")
 
+        # Versão sem tocar na rede (fixa ou Logs/versao.txt); o servidor é
+        # consultado em segundo plano logo após a janela aparecer
+        versao, origem_versao = versao_inicial(VERSAO_LOG)
+
         # Estado da Aplicação
         self.state = {
-            'file_queue': [],
+            'file_queue': FilaArquivos(),
             'output_folder': "",
-            'current_version': obter_versao(VERSAO_URL, "Logs/versao.txt"), 
+            'current_version': versao,
+            'version_source': origem_versao,
             'is_processing': False,
             'stop_processing': False,
-            'current_theme': 'light'
+            'current_theme': 'light',
+            'force_rebuild': False,
+            'bundle_mode': None,
+            'optimize_images': IMG_OTIMIZAR and PIL_AVAILABLE
         }
         
         self.ui_queue = queue.Queue()
+        # Mensagens do log (de qualquer thread), escritas no widget em lote
+        self.log_queue = queue.Queue()
         self.styles = ttk.Style()
         self.thumb_images_cache = []
+        self.thumb_generation = 0
+        # Criados no primeiro uso (ver as properties thumb_loader e preview_cache)
+        self._thumb_loader = None
+        self._preview_cache = None
+        self.image_resolver = resolvedor_padrao()
+        # Um único worker: só a seleção mais recente interessa
+        self.preview_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="preview")
+        self.preview_generation = 0
+        self.preview_after_id = None
+        # Varreduras de pasta em andamento (um Event de cancelamento por varredura)
+        self.active_scans = set()
+        # Modo watch: observador ativo (None quando desligado)
+        self.watcher = None
+        self.watch_restart_id = None
+        # Uma escrita na pasta de saída (e no manifesto) por vez: execução da
+        # fila ou reconversão do modo watch. Arquivos salvos durante uma
+        # execução ficam em watch_pendentes e são reconvertidos depois dela
+        self.saida_lock = threading.Lock()
+        self.watch_lock = threading.Lock()
+        self.watch_pendentes = set()
+        # Filtro da fila: ids visíveis na Listbox (None = fila inteira) e a
+        # consulta ao índice de busca da pasta de saída, carregada no primeiro uso
+        self.queue_filter_ids = None
+        self.queue_filter_after_id = None
+        self.search_query = None
+        self.search_query_folder = None
 
         self._build_ui()
         self._setup_styles()
-        self._init_drag_and_drop()
         self._process_ui_queue()
+        if GUI_INICIO_RAPIDO:
+            # Primeiro a janela; o resto quando o Tk ficar ocioso (já desenhada)
+            self.root.after_idle(self._after_first_paint)
+        else:
+            self._load_everything()
+            self._after_first_paint()
+
+    def _after_first_paint(self):
+        self._init_drag_and_drop()
+        self._refresh_version()
+        if GUI_INICIO_RAPIDO and GUI_PRECARREGAR:
+            threading.Thread(target=self._preload_modules, daemon=True).start()
+
+    def _preload_modules(self):
+        """Importa os módulos pesados fora da thread da UI, antes do primeiro preview/execução."""
+        for nome in MODULOS_PESADOS:
+            try:
+                importlib.import_module(nome)
+            except ImportError:
+                pass  # dependência opcional ausente: quem usa o módulo trata isso
+
+    def _load_everything(self):
+        """Carregamento antecipado (GUI_INICIO_RAPIDO = False): módulos e todas as abas."""
+        self._preload_modules()
+        for aba in list(self.pending_tabs):
+            self._ensure_tab(aba)
+        self._ensure_html_preview()
+
+    @property
+    def preview_cache(self):
+        if self._preview_cache is None:
+            from Preview.previewCache import CachePreview  # markdown2 só no primeiro preview
+            self._preview_cache = CachePreview(resolvedor=self.image_resolver)
+        return self._preview_cache
+
+    @property
+    def thumb_loader(self):
+        """CarregadorThumbnails (requests + PIL) da primeira thumbnail em diante; None sem Pillow."""
+        if self._thumb_loader is None and PIL_AVAILABLE:
+            from Preview.thumbnailLoader import CarregadorThumbnails
+            self._thumb_loader = CarregadorThumbnails()
+        return self._thumb_loader
 
     # --- Estilos e Temas ---
     def _setup_styles(self):
@@ -88,31 +165,41 @@ class App:
             self.styles.configure(style, font=("Inter", 11, "bold"), padding=10)
         self.styles.configure("Ghost.TButton", font=("Inter", 11), padding=8)
         self.styles.configure("Horizontal.TProgressbar", thickness=10)
+        self.styles.configure("TCheckbutton", background=colors["panel"], foreground=colors["text"], font=("Inter", 11))
         self._repaint_widgets(colors)
     
     def _repaint_widgets(self, colors):
         widgets = [
             self.topbar, self.left_panel, self.right_panel, self.bottom_panel,
-            self.frame_preview_tabs, self.frame_thumbs_container
+            self.frame_preview_tabs, self.frame_thumbs_container, self.filter_frame
         ]
         for w in widgets:
             w.configure(background=colors["panel"])
             
-        code_bg = self._mix(colors["panel"], "#000000", 0.05) if self.state['current_theme'] == 'light' else colors['code_bg']
+        code_bg = self._code_bg(colors)
 
-        self.logs.configure(bg=code_bg, fg=colors["text"], insertbackground=colors["text"])
-        self.codigo_html.configure(bg=code_bg, fg=colors["text"], insertbackground=colors["text"])
+        # As abas ainda não construídas pegam o tema atual quando forem criadas
+        for w in (self.logs, self.codigo_html, self.relatorio_texto):
+            if w is not None:
+                w.configure(bg=code_bg, fg=colors["text"], insertbackground=colors["text"])
         self.queue_list.configure(
             bg=self._mix(colors["panel"], "#000000", 0.02), fg=colors["text"],
             selectbackground=colors["list_sel"], selectforeground=colors["text"],
             highlightthickness=0, relief="flat"
         )
         self.preview_info.configure(fg=colors["muted"], bg=colors["panel"])
+        self.version_label.configure(fg=colors["muted"], bg=colors["panel"])
+        self.scan_label.configure(fg=colors["muted"], bg=colors["panel"])
+        for lbl in self.filter_labels:
+            lbl.configure(fg=colors["muted"], bg=colors["panel"])
         self.logs.tag_config("INFO", foreground=colors["accent"])
         self.logs.tag_config("OK", foreground=colors["accent2"])
         self.logs.tag_config("ERRO", foreground=colors["danger"])
         self.logs.tag_config("WARN", foreground=colors["warn"])
 
+    def _code_bg(self, colors):
+        return self._mix(colors["panel"], "#000000", 0.05) if self.state['current_theme'] == 'light' else colors['code_bg']
+
     def toggle_theme(self):
         self.state['current_theme'] = 'dark' if self.state['current_theme'] == 'light' else 'light'
         self._apply_theme()
@@ -156,9 +243,45 @@ class App:
         self.btn_exec = ttk.Button(self.topbar, text="▶️ Executar Fila", style="Primary.TButton", command=self.start_processing)
         self.btn_exec.pack(side="left", padx=5)
 
+        self.btn_stop = ttk.Button(self.topbar, text="⏹ Parar", style="Danger.TButton", command=self.stop_all)
+        self.btn_stop.pack(side="left", padx=5)
+
+        self.var_force_rebuild = tk.BooleanVar(value=False)
+        self.chk_force_rebuild = ttk.Checkbutton(self.topbar, text="♻ Reconverter tudo", variable=self.var_force_rebuild)
+        self.chk_force_rebuild.pack(side="left", padx=5)
+
+        self.var_watch = tk.BooleanVar(value=False)
+        self.chk_watch = ttk.Checkbutton(self.topbar, text="👁 Observar alterações", variable=self.var_watch,
+                                         command=self.toggle_watch)
+        self.chk_watch.pack(side="left", padx=5)
+
+        # Otimização das imagens (Pipeline/imageOptimizer.py): só com Pillow instalado
+        self.var_optimize_images = tk.BooleanVar(value=self.state['optimize_images'])
+        self.chk_optimize_images = ttk.Checkbutton(
+            self.topbar, text="🖼 Otimizar imagens", variable=self.var_optimize_images,
+            command=lambda: self.state.update(optimize_images=self.var_optimize_images.get()),
+            state="normal" if PIL_AVAILABLE else "disabled"
+        )
+        self.chk_optimize_images.pack(side="left", padx=5)
+
+        # Formato da saída: páginas independentes (padrão) ou um pacote (Pipeline/bundleBuilder.py)
+        self.modos_saida = {"Páginas": None, "Documento único": "documento", "Site": "site"}
+        rotulo_padrao = next(r for r, m in self.modos_saida.items() if m == BUNDLE_MODO)
+        self.var_output_mode = tk.StringVar(value=rotulo_padrao)
+        self.cmb_output_mode = ttk.Combobox(self.topbar, textvariable=self.var_output_mode, state="readonly",
+                                            values=list(self.modos_saida), width=16)
+        self.cmb_output_mode.pack(side="left", padx=5)
+
         self.btn_theme = ttk.Button(self.topbar, text="🌓 Tema", style="Ghost.TButton", command=self.toggle_theme)
         self.btn_theme.pack(side="right", padx=5)
 
+        self.btn_version = ttk.Button(self.topbar, text="🏷 Fixar Versão", style="Ghost.TButton", command=self.pin_version)
+        self.btn_version.pack(side="right", padx=5)
+
+        self.version_label = tk.Label(self.topbar, bg=colors["panel"], fg=colors["muted"], font=("Inter", 11))
+        self.version_label.pack(side="right", padx=10)
+        self._update_version_label()
+
         # Corpo dividido: esquerda (fila) | direita (preview)
         body = tk.Frame(self.root, bg=colors["bg"])
         body.pack(fill="both", expand=True, padx=12, pady=8)
@@ -173,6 +296,23 @@ class App:
         tk.Label(self.left_panel, text="Fila de Arquivos", font=("Inter", 13, "bold"),
                  bg=colors["panel"], fg=colors["text"]).pack(anchor="w", padx=10, pady=(10, 6))
 
+        # Filtros usados por "Adicionar Pasta" (globs separados por ';')
+        self.filter_frame = tk.Frame(self.left_panel, bg=colors["panel"])
+        self.filter_frame.pack(fill="x", padx=10, pady=(0, 6))
+        self.var_include = tk.StringVar(value="; ".join(PASTA_INCLUIR))
+        self.var_exclude = tk.StringVar(value="; ".join(PASTA_EXCLUIR))
+        # Filtro da fila: nome do arquivo ou texto das páginas já geradas (índice de busca)
+        self.var_queue_filter = tk.StringVar()
+        self.var_queue_filter.trace_add("write", self._on_queue_filter_change)
+        self.filter_labels = []
+        for row, (texto, var) in enumerate((("Incluir:", self.var_include), ("Excluir:", self.var_exclude),
+                                            ("🔎 Filtrar:", self.var_queue_filter))):
+            lbl = tk.Label(self.filter_frame, text=texto, bg=colors["panel"], fg=colors["muted"])
+            lbl.grid(row=row, column=0, sticky="w")
+            ttk.Entry(self.filter_frame, textvariable=var).grid(row=row, column=1, sticky="ew", padx=(6, 0), pady=1)
+            self.filter_labels.append(lbl)
+        self.filter_frame.columnconfigure(1, weight=1)
+
         list_frame = tk.Frame(self.left_panel, bg=colors["panel"])
         list_frame.pack(fill="y", expand=False, padx=10, pady=(0, 10))
 
@@ -192,10 +332,14 @@ class App:
         ttk.Button(move_frame, text="↑ Mover", style="Ghost.TButton", command=lambda: self.move_item(-1)).pack(side="left", fill="x", expand=True, padx=4)
         ttk.Button(move_frame, text="↓ Mover", style="Ghost.TButton", command=lambda: self.move_item(1)).pack(side="left", fill="x", expand=True, padx=4)
 
-        dd_text = "Arraste .md aqui para adicionar (Drag & Drop habilitado)" if DND_AVAILABLE else "Dica: clique em 'Adicionar .MD' ou 'Adicionar Pasta' para incluir arquivos."
+        dd_text = "Arraste .md aqui para adicionar (Drag & Drop habilitado)" if getattr(self.root, "TkdndVersion", None) else "Dica: clique em 'Adicionar .MD' ou 'Adicionar Pasta' para incluir arquivos."
         self.dd_hint = tk.Label(self.left_panel, text=dd_text, bg=colors["panel"], fg=colors["muted"], wraplength=340, justify="left")
         self.dd_hint.pack(anchor="w", padx=10, pady=(0, 10))
 
+        self.scan_label = tk.Label(self.left_panel, text="", bg=colors["panel"], fg=colors["muted"],
+                                   wraplength=340, justify="left")
+        self.scan_label.pack(anchor="w", padx=10, pady=(0, 10))
+
         # ---- Right: Preview + Thumbs + Código ----
         header_right = tk.Frame(self.right_panel, bg=colors["panel"])
         header_right.pack(fill="x")
@@ -210,19 +354,18 @@ class App:
         self.notebook = ttk.Notebook(self.frame_preview_tabs)
         self.notebook.pack(fill="both", expand=True)
 
-        # Tab 1: Render
-        frame_render = tk.Frame(self.notebook, bg=colors["panel"])
-        self.notebook.add(frame_render, text="👁 Renderizado")
-
-        if HTMLLabel:
-            self.html_preview = HTMLLabel(frame_render, html="<p style='color:gray'>Sem preview ainda.</p>",
-                                          background=colors["panel"])
-            self.html_preview.pack(fill="both", expand=True, padx=10, pady=10)
+        # Tab 1: Render. O HTMLLabel (tkhtmlview) só é criado no primeiro preview
+        self.frame_render = tk.Frame(self.notebook, bg=colors["panel"])
+        self.notebook.add(self.frame_render, text="👁 Renderizado")
+        self.html_preview = None
+        if HTMLVIEW_AVAILABLE:
+            self.render_placeholder = tk.Label(self.frame_render, text="Sem preview ainda.",
+                                               fg="gray", bg=colors["panel"], font=("Inter", 11), anchor="nw")
         else:
-            lbl = tk.Label(frame_render, text="tkhtmlview não instalado.\nInstale com: pip install tkhtmlview",
-                           fg=colors["danger"], bg=colors["panel"], font=("Inter", 12))
-            lbl.pack(fill="both", expand=True, padx=10, pady=10)
-            self.html_preview = None
+            self.render_placeholder = tk.Label(self.frame_render,
+                                               text="tkhtmlview não instalado.\nInstale com: pip install tkhtmlview",
+                                               fg=colors["danger"], bg=colors["panel"], font=("Inter", 12))
+        self.render_placeholder.pack(fill="both", expand=True, padx=10, pady=10)
 
         # Container para thumbnails (abaixo do render)
         self.frame_thumbs_container = tk.Frame(self.right_panel, bg=colors["panel"])
@@ -233,13 +376,24 @@ class App:
         self.frame_thumbs = tk.Frame(self.frame_thumbs_container, bg=colors["panel"])
         self.frame_thumbs.pack(fill="x", pady=(4, 10))
 
-        # Tab 2: Código HTML
-        frame_code = tk.Frame(self.notebook, bg=colors["panel"])
-        self.notebook.add(frame_code, text="📝 Código HTML")
-        self.codigo_html = ScrolledText(frame_code, wrap="none", font=("Consolas", 11),
-                                        bg=self._mix(colors["panel"], "#000000", 0.05), fg=colors["text"],
-                                        insertbackground=colors["text"])
-        self.codigo_html.pack(fill="both", expand=True, padx=10, pady=10)
+        # Tab 2: Código HTML e Tab 3: Relatório da última execução da fila.
+        # O conteúdo é construído na primeira vez em que a aba é exibida;
+        # até lá o último preview/relatório fica guardado em preview_html/report_text.
+        self.frame_code = tk.Frame(self.notebook, bg=colors["panel"])
+        self.notebook.add(self.frame_code, text="📝 Código HTML")
+        self.codigo_html = None
+        self.preview_html = ""
+
+        self.frame_report = tk.Frame(self.notebook, bg=colors["panel"])
+        self.notebook.add(self.frame_report, text="📊 Relatório")
+        self.relatorio_texto = None
+        self.report_text = "Execute a fila para ver o tempo gasto em cada etapa."
+
+        self.pending_tabs = {
+            str(self.frame_code): self._build_code_tab,
+            str(self.frame_report): self._build_report_tab,
+        }
+        self.notebook.bind("<<NotebookTabChanged>>", lambda e: self._ensure_tab(self.notebook.select()))
 
         # ---- Bottom: Logs + Progresso ----
         self.bottom_panel = tk.Frame(self.root, bg=colors["panel"])
@@ -262,14 +416,89 @@ class App:
         self.progress_label = tk.Label(progress_frame, text="0%", bg=colors["panel"], fg=colors["muted"])
         self.progress_label.pack(side="left", padx=8)
 
+    def _ensure_tab(self, aba):
+        construir = self.pending_tabs.pop(str(aba), None)
+        if construir:
+            construir()
+
+    def _text_tab(self, frame, texto, font_size):
+        colors = THEMES[self.state['current_theme']]
+        widget = ScrolledText(frame, wrap="none", font=("Consolas", font_size), bg=self._code_bg(colors),
+                              fg=colors["text"], insertbackground=colors["text"])
+        widget.insert("1.0", texto)
+        widget.pack(fill="both", expand=True, padx=10, pady=10)
+        return widget
+
+    def _build_code_tab(self):
+        self.codigo_html = self._text_tab(self.frame_code, self.preview_html, 11)
+
+    def _build_report_tab(self):
+        self.relatorio_texto = self._text_tab(self.frame_report, self.report_text, 10)
+
+    def _ensure_html_preview(self):
+        """Troca o aviso da aba Renderizado pelo HTMLLabel; None sem tkhtmlview."""
+        if self.html_preview is None and HTMLVIEW_AVAILABLE:
+            from tkhtmlview import HTMLLabel
+            self.render_placeholder.destroy()
+            self.html_preview = HTMLLabel(self.frame_render, html="<p style='color:gray'>Sem preview ainda.</p>",
+                                          background=THEMES[self.state['current_theme']]["panel"])
+            self.html_preview.pack(fill="both", expand=True, padx=10, pady=10)
+        return self.html_preview
+
     # --- Callbacks UI ---
     def add_folder(self):
         folder_path = filedialog.askdirectory(title="Selecione a pasta com arquivos .md")
         if not folder_path:
             return
-        
-        md_files = [os.path.join(folder_path, f) for f in os.listdir(folder_path) if f.lower().endswith(".md")]
-        self._add_files_to_queue(md_files)
+        self._scan_folder(folder_path)
+
+    def _scan_folder(self, folder_path):
+        """Varre a pasta (recursivamente) em segundo plano, enviando os arquivos à fila em lotes."""
+        raiz = os.path.abspath(folder_path)
+        incluir = separar_padroes(self.var_include.get()) or PASTA_INCLUIR
+        excluir = separar_padroes(self.var_exclude.get())
+        cancelar = threading.Event()
+        self.active_scans.add(cancelar)
+        self._log(f"[INFO] Varrendo {raiz}…", "INFO")
+
+        def tarefa():
+            contadores = {'encontrados': 0, 'adicionados': 0}
+
+            def enfileirar(lote):
+                # Roda na thread da UI: a fila só é alterada lá
+                contadores['adicionados'] += self._enqueue(lote, raiz)
+                self.scan_label.config(text=f"🔎 {os.path.basename(raiz) or raiz}: "
+                                            f"{contadores['encontrados']} encontrado(s), "
+                                            f"{contadores['adicionados']} novo(s) na fila…")
+
+            try:
+                arquivos = descobrir_markdown(raiz, incluir, excluir, should_stop=cancelar.is_set)
+                for lote in em_lotes(arquivos, PASTA_LOTE):
+                    if cancelar.is_set():
+                        break
+                    contadores['encontrados'] += len(lote)
+                    self._ui_update(lambda lote=lote: enfileirar(lote))
+            except Exception as e:
+                self._ui_update(lambda erro=e: self._log(f"[ERRO] Falha ao varrer {raiz}: {erro}", "ERRO"))
+            self._ui_update(lambda: self._finish_scan(raiz, cancelar, contadores))
+
+        threading.Thread(target=tarefa, daemon=True).start()
+
+    def _finish_scan(self, raiz, cancelar, contadores):
+        self.active_scans.discard(cancelar)
+        status = "interrompida" if cancelar.is_set() else "concluída"
+        self._log(f"[INFO] Varredura {status}: {contadores['encontrados']} arquivo(s) em {raiz}, "
+                  f"{contadores['adicionados']} adicionados.", "INFO")
+        if not self.active_scans:
+            self.scan_label.config(text="")
+
+    def stop_all(self):
+        """Cancela as varreduras de pasta e o processamento da fila em andamento."""
+        for cancelar in self.active_scans:
+            cancelar.set()
+        if self.state['is_processing']:
+            self.state['stop_processing'] = True
+            self._log("[WARN] Interrompendo o processamento…", "WARN")
 
     def add_files(self):
         files = filedialog.askopenfilenames(title="Selecione arquivos .md", filetypes=[("Markdown", "*.md")])
@@ -278,42 +507,131 @@ class App:
         self._add_files_to_queue(files)
 
     def _add_files_to_queue(self, files):
-        added_count = 0
-        for file_path in files:
-            if file_path not in self.state['file_queue']:
-                self.state['file_queue'].append(file_path)
-                self.queue_list.insert(tk.END, file_path)
-                added_count += 1
+        added_count = self._enqueue(files)
         self._log(f"[INFO] {added_count} arquivo(s) adicionados.", "INFO")
 
+    def _enqueue(self, files, raiz=None):
+        novos = self.state['file_queue'].adicionar(files, raiz)
+        if novos:
+            caminhos = [caminho for _, caminho in novos]
+            if self.queue_filter_ids is not None:
+                # Com o filtro ativo, só os novos que passam por ele aparecem
+                caminhos = self._consulta_busca().filtrar(caminhos, self.var_queue_filter.get())
+                self.queue_filter_ids.extend(self.state['file_queue'].id_de(c) for c in caminhos)
+            if caminhos:
+                # Uma única chamada ao Tk para o lote inteiro
+                self.queue_list.insert(tk.END, *caminhos)
+            self._schedule_watch_restart()
+        return len(novos)
+
+    def _enqueue_watch(self, raizes):
+        """Põe na fila, por pasta, os arquivos salvos que o modo watch encontrou."""
+        for raiz in dict.fromkeys(raizes.values()):
+            self._enqueue([a for a in raizes if raizes[a] == raiz], raiz)
+
+    def _posicoes_fila(self, linhas):
+        """Posições na fila das linhas da Listbox (diferentes delas com o filtro ativo)."""
+        if self.queue_filter_ids is None:
+            return list(linhas)
+        fila = self.state['file_queue']
+        return [fila.posicao(self.queue_filter_ids[i]) for i in linhas]
+
     def remove_selected(self):
         sel = list(self.queue_list.curselection())
         if not sel:
             return
-        for i in reversed(sel):
-            file_path = self.queue_list.get(i)
-            if file_path in self.state['file_queue']:
-                self.state['file_queue'].remove(file_path)
-            self.queue_list.delete(i)
+        self.state['file_queue'].remover_posicoes(self._posicoes_fila(sel))
+        if self.queue_filter_ids is not None:
+            for i in reversed(sel):
+                del self.queue_filter_ids[i]
+        self._schedule_watch_restart()
+        # Apaga as faixas contíguas da seleção, de trás para frente
+        fim = sel[-1]
+        for i in range(len(sel) - 1, -1, -1):
+            if i == 0 or sel[i - 1] != sel[i] - 1:
+                self.queue_list.delete(sel[i], fim)
+                if i:
+                    fim = sel[i - 1]
         self._log("[INFO] Arquivo(s) removido(s) da fila.", "INFO")
 
     def clear_queue(self):
         self.queue_list.delete(0, tk.END)
-        self.state['file_queue'].clear()
+        self.state['file_queue'].limpar()
+        if self.queue_filter_ids is not None:
+            self.queue_filter_ids = []
+        self._schedule_watch_restart()
         self._log("[INFO] Fila limpa.", "INFO")
 
     def move_item(self, direction):
         sel = self.queue_list.curselection()
         if not sel:
             return
+        if self.queue_filter_ids is not None:
+            messagebox.showinfo("Filtro ativo", "Limpe o filtro da fila para reordenar os arquivos.")
+            return
         idx = sel[0]
-        new_idx = idx + direction
-        if 0 <= new_idx < len(self.state['file_queue']):
-            self.state['file_queue'][idx], self.state['file_queue'][new_idx] = self.state['file_queue'][new_idx], self.state['file_queue'][idx]
-            self.queue_list.delete(0, tk.END)
-            for f in self.state['file_queue']:
-                self.queue_list.insert(tk.END, f)
-            self.queue_list.select_set(new_idx)
+        new_idx = self.state['file_queue'].mover(idx, direction)
+        if new_idx is None:
+            return
+        # Só a linha movida é reescrita na Listbox
+        file_path = self.queue_list.get(idx)
+        self.queue_list.delete(idx)
+        self.queue_list.insert(new_idx, file_path)
+        self.queue_list.selection_clear(0, tk.END)
+        self.queue_list.select_set(new_idx)
+        self.queue_list.activate(new_idx)
+        self.queue_list.see(new_idx)
+
+    # --- Filtro da fila ---
+    def _on_queue_filter_change(self, *_):
+        if self.queue_filter_after_id is not None:
+            self.root.after_cancel(self.queue_filter_after_id)
+        self.queue_filter_after_id = self.root.after(PREVIEW_DEBOUNCE_MS, self._apply_queue_filter)
+
+    def _apply_queue_filter(self):
+        """Reconstrói a Listbox com os itens da fila que passam pelo filtro (ou com a fila inteira)."""
+        self.queue_filter_after_id = None
+        consulta = self.var_queue_filter.get().strip()
+        fila = self.state['file_queue']
+        if not consulta and self.queue_filter_ids is None:
+            return
+        if consulta:
+            caminhos = self._consulta_busca().filtrar(fila.caminhos(), consulta)
+            self.queue_filter_ids = [fila.id_de(c) for c in caminhos]
+        else:
+            caminhos = fila.caminhos()
+            self.queue_filter_ids = None
+        self.queue_list.delete(0, tk.END)
+        if caminhos:
+            self.queue_list.insert(tk.END, *caminhos)
+        if consulta:
+            self.scan_label.config(text=f"Filtro: {len(caminhos)} de {len(fila)} arquivo(s).")
+        else:
+            self.scan_label.config(text="")
+
+    def _consulta_busca(self):
+        """
+        Consulta ao índice de busca da pasta de saída (Pipeline/searchIndex.py).
+        Enquanto ele é carregado em segundo plano, o filtro usa só os nomes.
+        """
+        from Pipeline.searchIndex import ConsultaIndice
+        pasta = self.state['output_folder']
+        if self.search_query is None or self.search_query_folder != pasta:
+            self.search_query = ConsultaIndice()
+            self.search_query_folder = pasta
+            if pasta and BUSCA_INDICE:
+                def tarefa():
+                    consulta = ConsultaIndice.carregar(pasta)
+
+                    def aplicar():
+                        if self.search_query_folder == pasta:
+                            self.search_query = consulta
+                            if self.queue_filter_ids is not None:
+                                self._apply_queue_filter()
+                    self._ui_update(aplicar)
+
+                threading.Thread(target=tarefa, daemon=True).start()
+        return self.search_query
 
     def select_output_folder(self):
         folder = filedialog.askdirectory(title="Selecione a pasta de saída")
@@ -321,6 +639,9 @@ class App:
             self.state['output_folder'] = folder
             messagebox.showinfo("Pasta de Saída", f"Pasta de saída definida:\n{folder}")
             self._log(f"[INFO] Pasta de saída definida: {folder}", "INFO")
+            self._schedule_watch_restart()
+            if self.queue_filter_ids is not None:
+                self._apply_queue_filter()
 
     def on_select_file(self, event=None):
         selected_index = self.queue_list.curselection()
@@ -329,40 +650,66 @@ class App:
             
         file_path = self.queue_list.get(selected_index[0])
         self.preview_info.config(text=f"Preview • {os.path.basename(file_path)}")
-        self._render_preview(file_path)
+
+        # Debounce: navegar com as setas só renderiza o arquivo em que a seleção parar
+        if self.preview_after_id is not None:
+            self.root.after_cancel(self.preview_after_id)
+        self.preview_after_id = self.root.after(PREVIEW_DEBOUNCE_MS, lambda: self._render_preview(file_path))
 
     def _render_preview(self, md_path):
-        """Lê o Markdown, converte para HTML e atualiza o preview da UI."""
+        """Atualiza o preview da UI; a conversão do Markdown roda em segundo plano."""
+        self.preview_after_id = None
+        self.preview_generation += 1
+        geracao = self.preview_generation
+
+        # Arquivo não modificado desde a última seleção: vem pronto do cache
+        item = self.preview_cache.obter(md_path)
+        if item is not None:
+            self._show_preview(geracao, md_path, *item)
+            return
+
+        def tarefa():
+            # Uma seleção mais nova já chegou: nem começa a renderizar
+            if geracao != self.preview_generation:
+                return
+            try:
+                html_content, image_urls = self.preview_cache.renderizar(md_path)
+            except FileNotFoundError:
+                self._ui_update(lambda: self._log(f"[ERRO] Arquivo não encontrado: {md_path}", "ERRO"))
+                return
+            except Exception as e:
+                erro = f"[ERRO] Falha ao renderizar preview: {e}\n{traceback.format_exc()}"
+                self._ui_update(lambda: self._log(erro, "ERRO"))
+                return
+            self._ui_update(lambda: self._show_preview(geracao, md_path, html_content, image_urls))
+
+        self.preview_executor.submit(tarefa)
+
+    def _show_preview(self, geracao, md_path, html_content, image_urls):
+        # Resultado de uma seleção que já não é a atual: descarta
+        if geracao != self.preview_generation:
+            return
         try:
-            with open(md_path, "r", encoding="utf-8") as f:
-                raw_markdown = f.read()
+            html_preview = self._ensure_html_preview()
+            if html_preview is not None:
+                html_preview.set_html(html_content)
+
+            self.preview_html = html_content
+            if self.codigo_html is not None:
+                self.codigo_html.delete("1.0", tk.END)
+                self.codigo_html.insert(tk.END, html_content)
+
+            urls = [self.image_resolver.local_ou_url(u) for u in image_urls]
+            self._populate_thumbnails(urls)
 
-            html_content = markdown2.markdown(raw_markdown, extras=["tables", "fenced-code-blocks"])
-            html_content = re.sub(r'!\[\[(.*?)\]\]', lambda m: f'<img src="{URL_BASE_IMAGENS}{m.group(1)}" alt="{m.group(1)}">', html_content)
-            
-            if self.html_preview:
-                if isinstance(self.html_preview, HTMLLabel):
-                    self.html_preview.set_html(html_content)
-                else:
-                    self._log("[WARN] tkhtmlview indisponível. Preview renderizado não será exibido.", "WARN")
-                    
-            self.codigo_html.delete("1.0", tk.END)
-            self.codigo_html.insert(tk.END, html_content)
-
-            self._populate_thumbnails(self._extract_image_urls(html_content))
-            
-        except FileNotFoundError:
-            self._log(f"[ERRO] Arquivo não encontrado: {md_path}", "ERRO")
         except Exception as e:
-            self._log(f"[ERRO] Falha ao renderizar preview: {e}\n{traceback.format_exc()}", "ERRO")
-            
-    def _extract_image_urls(self, html_content):
-        return re.findall(r'<img[^>]+src=["\']([^"\']+)["\']', html_content)
+            self._log(f"[ERRO] Falha ao exibir preview de {os.path.basename(md_path)}: {e}\n{traceback.format_exc()}", "ERRO")
 
     def _populate_thumbnails(self, urls):
         for w in self.frame_thumbs.winfo_children():
             w.destroy()
         self.thumb_images_cache.clear()
+        self.thumb_generation += 1
 
         if not PIL_AVAILABLE:
             tk.Label(self.frame_thumbs, text="Pillow não instalado — thumbs indisponíveis.",
@@ -374,26 +721,42 @@ class App:
                      bg=THEMES[self.state['current_theme']]["panel"], fg=THEMES[self.state['current_theme']]["muted"]).pack(anchor="w", padx=6, pady=6)
             return
 
-        row = tk.Frame(self.frame_thumbs, bg=THEMES[self.state['current_theme']]["panel"])
+        colors = THEMES[self.state['current_theme']]
+        row = tk.Frame(self.frame_thumbs, bg=colors["panel"])
         row.pack(fill="x")
 
-        for i, url in enumerate(urls[:12]):
-            try:
-                resp = requests.get(url, timeout=6)
-                resp.raise_for_status()
-                img = Image.open(io.BytesIO(resp.content))
-                img.thumbnail((140, 140))
-                tkimg = ImageTk.PhotoImage(img)
-                self.thumb_images_cache.append(tkimg)
-                wrap = tk.Frame(row, bg=THEMES[self.state['current_theme']]["panel"], padx=6, pady=6)
-                wrap.pack(side="left")
-                lbl = tk.Label(wrap, image=tkimg, bg=THEMES[self.state['current_theme']]["panel"])
-                lbl.pack()
-                cap = tk.Label(wrap, text=os.path.basename(url), bg=THEMES[self.state['current_theme']]["panel"], fg=THEMES[self.state['current_theme']]["muted"])
-                cap.pack()
-            except Exception:
-                pass
-            
+        # Cada imagem ganha um espaço na ordem do arquivo; as que não estão em
+        # memória chegam depois, pelo ui_queue, conforme o download termina.
+        geracao = self.thumb_generation
+        for url in urls[:12]:
+            wrap = tk.Frame(row, bg=colors["panel"], padx=6, pady=6)
+            wrap.pack(side="left")
+            lbl = tk.Label(wrap, text="⏳", width=8, bg=colors["panel"], fg=colors["muted"])
+            lbl.pack()
+            cap = tk.Label(wrap, text=os.path.basename(url), bg=colors["panel"], fg=colors["muted"])
+            cap.pack()
+
+            img = self.thumb_loader.da_memoria(url)
+            if img is not None:
+                self._set_thumbnail(geracao, lbl, img)
+            else:
+                self.thumb_loader.carregar(
+                    url,
+                    lambda url, img, lbl=lbl: self._ui_update(lambda: self._set_thumbnail(geracao, lbl, img))
+                )
+
+    def _set_thumbnail(self, geracao, lbl, img):
+        # Resultado de uma seleção anterior: os widgets já foram destruídos
+        if geracao != self.thumb_generation:
+            return
+        if img is None:
+            lbl.config(text="✖", fg=THEMES[self.state['current_theme']]["danger"])
+            return
+        from PIL import ImageTk
+        tkimg = ImageTk.PhotoImage(img)
+        self.thumb_images_cache.append(tkimg)
+        lbl.config(image=tkimg, text="", width=0)
+
     def start_processing(self):
         if self.state['is_processing']:
             self._log("[WARN] Processamento já está em andamento.", "WARN")
@@ -407,64 +770,424 @@ class App:
             messagebox.showwarning("Atenção", "Adicione arquivos à fila antes de executar.")
             return
 
+        if self.state['version_source'] == "fallback":
+            continuar = messagebox.askyesno(
+                "Versão desconhecida",
+                f"Não foi possível obter a versão do E-Orbis.\n"
+                f"As páginas serão geradas com a versão {self.state['current_version']}.\n\n"
+                "Continuar mesmo assim? (Use '🏷 Fixar Versão' para informá-la.)"
+            )
+            if not continuar:
+                return
+
         self.state['is_processing'] = True
         self.state['stop_processing'] = False
+        self.state['force_rebuild'] = self.var_force_rebuild.get()
+        self.state['bundle_mode'] = self.modos_saida[self.var_output_mode.get()]
         self._log("[INFO] Processamento iniciado.", "INFO")
         
-        threading.Thread(target=self._process_queue_worker, daemon=True).start()
+        # A fila pode ser editada durante o processamento: o worker recebe uma cópia
+        arquivos = self.state['file_queue'].caminhos()
+        raizes = self.state['file_queue'].raizes()
+        threading.Thread(target=self._process_queue_worker, args=(arquivos, raizes), daemon=True).start()
+
+    def _otimizador_imagens(self):
+        """Um OtimizadorImagens por execução (os contadores são da execução), ou None."""
+        if not self.state['optimize_images']:
+            return None
+        from Pipeline.imageOptimizer import OtimizadorImagens
+        return OtimizadorImagens()
+
+    def _indice_links(self):
+        """Um IndiceLinks por execução (relido da pasta de saída), ou None se os links ficam como texto."""
+        if not LINKS_RESOLVER:
+            return None
+        from Pipeline.linkIndex import IndiceLinks
+        return IndiceLinks(self.state['output_folder'])
+
+    def _indice_busca(self):
+        """Um IndiceBusca por execução (relido da pasta de saída), ou None se a busca está desligada."""
+        if not BUSCA_INDICE:
+            return None
+        from Pipeline.searchIndex import IndiceBusca
+        return IndiceBusca(self.state['output_folder'])
+
+    def _busca_atualizada(self, busca):
+        """Depois de uma execução: o filtro da fila passa a usar o índice novo."""
+        if busca is None or busca.resumo() is None:
+            return
+
+        def recarregar():
+            self.search_query = None
+            if self.queue_filter_ids is not None:
+                self._apply_queue_filter()
+        self._ui_update(recarregar)
+
+    def _log_links_quebrados(self, links, prefixo=""):
+        for arquivo, alvo in links.quebrados:
+            self._log(f"[WARN] {prefixo}Link quebrado em {os.path.basename(arquivo)}: [[{alvo}]]", "WARN")
+
+    def _log_saidas(self, saidas, prefixo=""):
+        resumo = saidas.resumo()
+        if resumo["inalterados"] or resumo["removidos"]:
+            self._log(f"[INFO] {prefixo}Saídas: {resumo['gravados']} gravada(s), {resumo['inalterados']} sem "
+                      f"alteração (não regravadas), {resumo['removidos']} removida(s).", "INFO")
+        for removido in saidas.removidos:
+            self._log(f"[INFO] {prefixo}Saída removida (não é mais gerada): {removido}", "INFO")
+
+    def _process_queue_worker(self, arquivos, raizes):
+        if not self.saida_lock.acquire(blocking=False):
+            self._log("[INFO] Aguardando a reconversão do modo watch terminar…", "INFO")
+            self.saida_lock.acquire()
+        try:
+            self._processar_fila(arquivos, raizes)
+        finally:
+            with self.watch_lock:
+                self.saida_lock.release()
+                pendentes, self.watch_pendentes = self.watch_pendentes, set()
+            if pendentes:
+                threading.Thread(target=self._on_watch_change, args=(sorted(pendentes),), daemon=True).start()
+
+    def _processar_fila(self, arquivos, raizes):
+        # Importados na thread do worker: a UI não trava na primeira execução
+        from Pipeline.batchProcessor import processar_lote, saidas_duplicadas
+        from Pipeline.buildCache import ManifestoBuild
+        from Pipeline.outputWriter import GravadorSaida
+        from Pipeline.runLog import LogExecucao
+        from Pipeline.runReport import RelatorioExecucao, formatar as formatar_relatorio
+
+        for destino, origens in saidas_duplicadas(arquivos, self.state['output_folder'], raizes).items():
+            self._log(f"[WARN] {len(origens)} arquivos geram a mesma saída {destino}; o último convertido prevalece.", "WARN")
+        total_files = len(arquivos)
+        imagens = self._otimizador_imagens()
+        contadores = {'concluidos': 0, 'sucesso': 0, 'pulados': 0}
+        relatorio = RelatorioExecucao()
 
-    def _process_queue_worker(self):
-        total_files = len(self.state['file_queue'])
-        processed_count = 0
-        
         self._ui_update(lambda: self._set_progress(0, total_files))
 
-        for file_path in self.state['file_queue']:
-            if self.state['stop_processing']:
-                self._log("[WARN] Processamento interrompido pelo usuário.", "WARN")
-                break
-            
-            try:
-                # md -> html bruto
-                with open(file_path, "r", encoding="utf-8") as f:
-                    raw_markdown = f.read()
-                
-                html_content_bruto = markdown2.markdown(raw_markdown, extras=["tables", "fenced-code-blocks"])
-                
-                # Aplica as transformações do transformer
-                transformed_html = transformar_html(
-                    html_content_bruto, 
-                    self.state['current_version'], 
-                    IMG_PADRAO_EORBIS, 
-                    IMG_PADRAO_METAPRIME
+        try:
+            log_execucao = LogExecucao()
+            log_execucao.registrar("inicio", total=total_files, saida=self.state['output_folder'],
+                                   versao=self.state['current_version'], forcar=self.state['force_rebuild'])
+        except OSError as e:
+            log_execucao = None
+            self._log(f"[WARN] Não foi possível criar o log da execução: {e}", "WARN")
+
+        def on_result(resultado):
+            nome = os.path.basename(resultado['arquivo'])
+            if log_execucao:
+                log_execucao.arquivo(resultado)
+            relatorio.adicionar(resultado)
+            if resultado['pulado']:
+                contadores['sucesso'] += 1
+                contadores['pulados'] += 1
+            elif resultado['ok']:
+                contadores['sucesso'] += 1
+                self._log(f"[OK] {nome} → {resultado['saida']}", "OK")
+            else:
+                self._log(f"[ERRO] Falha ao processar {nome}: {resultado['erro']}", "ERRO")
+            contadores['concluidos'] += 1
+            concluidos = contadores['concluidos']
+            self._ui_update(lambda: self._set_progress(concluidos, total_files))
+
+        manifesto = None
+        links = None
+        busca = None
+        saidas = GravadorSaida()
+        concluido = False
+        inicio = time.perf_counter()
+        try:
+            if self.state['bundle_mode']:
+                concluido = self._gerar_pacote(arquivos, raizes, on_result, imagens)
+            else:
+                links = self._indice_links()
+                busca = self._indice_busca()
+                if BUILD_CACHE:
+                    manifesto = ManifestoBuild(self.state['output_folder'], forcar=self.state['force_rebuild'],
+                                               imagens=imagens, links=links is not None)
+                concluido = processar_lote(
+                    arquivos,
+                    self.state['output_folder'],
+                    self.state['current_version'],
+                    IMG_PADRAO_EORBIS,
+                    IMG_PADRAO_METAPRIME,
+                    on_result=on_result,
+                    should_stop=lambda: self.state['stop_processing'],
+                    manifesto=manifesto,
+                    raizes=raizes,
+                    imagens=imagens,
+                    links=links,
+                    busca=busca,
+                    saidas=saidas
                 )
-                
-                # Salva o arquivo final
-                html_filename = os.path.splitext(os.path.basename(file_path))[0] + ".html"
-                final_html_path = os.path.join(self.state['output_folder'], html_filename)
-                
-                os.makedirs(os.path.dirname(final_html_path), exist_ok=True)
-                with open(final_html_path, "w", encoding="utf-8") as f:
-                    f.write(transformed_html)
-                
-                processed_count += 1
-                self._log(f"[OK] {os.path.basename(file_path)} → {final_html_path}", "OK")
-                
-            except Exception as e:
-                self._log(f"[ERRO] Falha ao processar {os.path.basename(file_path)}: {e}\n{traceback.format_exc()}", "ERRO")
-            finally:
-                current_index = self.state['file_queue'].index(file_path) + 1
-                self._ui_update(lambda: self._set_progress(current_index, total_files))
-
+            if not concluido:
+                self._log("[WARN] Processamento interrompido pelo usuário.", "WARN")
+            if contadores['pulados']:
+                self._log(f"[INFO] {contadores['pulados']} arquivo(s) sem alterações não foram reconvertidos.", "INFO")
+            if imagens:
+                resumo = imagens.resumo()
+                self._log(f"[INFO] Imagens otimizadas: {resumo['processadas']} geradas "
+                          f"({resumo['bytes_origem'] / 1024:.0f} KiB → {resumo['bytes_destino'] / 1024:.0f} KiB), "
+                          f"{resumo['em_cache']} já existiam.", "INFO")
+                for erro in imagens.erros:
+                    self._log(f"[WARN] Imagem copiada sem otimizar: {erro}", "WARN")
+            if links:
+                self._log_links_quebrados(links)
+            if busca and busca.resumo():
+                resumo = busca.resumo()
+                self._log(f"[INFO] Índice de busca: {resumo['paginas']} página(s), {resumo['termos']} termos → "
+                          f"{os.path.join(self.state['output_folder'], BUSCA_PAGINA)}", "INFO")
+                self._busca_atualizada(busca)
+            self._log_saidas(saidas)
+            if manifesto:
+                for obsoleto in manifesto.obsoletos():
+                    self._log(f"[WARN] Saída obsoleta (o .md de origem não existe mais): {obsoleto}", "WARN")
+        except Exception as e:
+            self._log(f"[ERRO] Falha no processamento da fila: {e}\n{traceback.format_exc()}", "ERRO")
+
+        processed_count = contadores['sucesso']
+        duracao = time.perf_counter() - inicio
+        extras = {"imagens": imagens.resumo()} if imagens else {}
+        if links:
+            extras["links"] = links.resumo()
+        if busca and busca.resumo():
+            extras["busca"] = busca.resumo()
+        if not self.state['bundle_mode']:
+            extras["saidas"] = saidas.resumo()
+        dados_relatorio = relatorio.gerar(duracao, versao=self.state['current_version'], concluido=concluido,
+                                          **extras)
+        caminho_relatorio = None
+        try:
+            caminho_relatorio = RelatorioExecucao.salvar(dados_relatorio, self.state['output_folder'])
+        except OSError as e:
+            self._log(f"[WARN] Não foi possível gravar o relatório da execução: {e}", "WARN")
+        texto_relatorio = formatar_relatorio(dados_relatorio)
+        if caminho_relatorio:
+            texto_relatorio += f"\n\nRelatório completo: {caminho_relatorio}"
+        self._ui_update(lambda: self._show_report(texto_relatorio))
+
+        if log_execucao:
+            log_execucao.fechar(concluido=concluido, sucesso=processed_count, pulados=contadores['pulados'],
+                                erros=contadores['concluidos'] - processed_count,
+                                duracao=duracao, relatorio=caminho_relatorio)
+            self._log(f"[INFO] Log completo da execução: {log_execucao.path}", "INFO")
         self.state['is_processing'] = False
         self._ui_update(lambda: self._set_progress(total_files, total_files))
         self._ui_update(lambda: messagebox.showinfo("Concluído", f"Processamento finalizado. {processed_count}/{total_files} arquivos processados com sucesso."))
 
+    def _gerar_pacote(self, arquivos, raizes, on_result, imagens):
+        """Gera o pacote (documento único ou site) em vez das páginas independentes."""
+        from Pipeline.bundleBuilder import gerar_pacote
+        resumo = gerar_pacote(
+            arquivos,
+            self.state['output_folder'],
+            self.state['current_version'],
+            self.state['bundle_mode'],
+            raizes=raizes,
+            on_result=on_result,
+            should_stop=lambda: self.state['stop_processing'],
+            imagens=imagens
+        )
+        if resumo['interrompido']:
+            return False
+        self._log(f"[OK] Pacote gerado: {resumo['saida']} ({resumo['notas']} nota(s), "
+                  f"{resumo['assets']} imagem(ns) em assets/)", "OK")
+        return True
+
+    def _show_report(self, texto):
+        self.report_text = texto
+        if self.relatorio_texto is None:
+            self._ensure_tab(self.frame_report)
+        else:
+            self.relatorio_texto.delete("1.0", tk.END)
+            self.relatorio_texto.insert("1.0", texto)
+        self.notebook.select(self.frame_report)
+
+    # --- Modo watch ---
+    def toggle_watch(self):
+        if not self.var_watch.get():
+            self._stop_watch()
+            self._log("[INFO] Observação de alterações desativada.", "INFO")
+            return
+        if not self.state['output_folder']:
+            self.var_watch.set(False)
+            messagebox.showwarning("Atenção", "Defina a pasta de saída antes de observar alterações.")
+            return
+        self._start_watch()
+
+    def _start_watch(self):
+        """(Re)cria o observador com os arquivos e pastas atuais da fila."""
+        from Pipeline.watcher import ObservadorArquivos
+        self._stop_watch()
+        fila = self.state['file_queue']
+        raizes = fila.raizes()
+        pastas = sorted(set(raizes.values()))
+        avulsos = [c for c in fila if c not in raizes]
+        self.watcher = ObservadorArquivos(
+            self._on_watch_change, avulsos, pastas,
+            separar_padroes(self.var_include.get()) or PASTA_INCLUIR,
+            separar_padroes(self.var_exclude.get())
+        ).iniciar()
+        self._log(f"[INFO] Observando {len(avulsos)} arquivo(s) e {len(pastas)} pasta(s) "
+                  f"({self.watcher.modo}).", "INFO")
+
+    def _stop_watch(self):
+        if self.watch_restart_id is not None:
+            self.root.after_cancel(self.watch_restart_id)
+            self.watch_restart_id = None
+        if self.watcher is not None:
+            # parar() espera as threads do observador: não bloquear a UI com isso
+            threading.Thread(target=self.watcher.parar, daemon=True).start()
+            self.watcher = None
+
+    def _schedule_watch_restart(self):
+        """Após mudanças na fila, recria o observador (uma vez por rajada de mudanças)."""
+        if self.watcher is None:
+            return
+        if self.watch_restart_id is not None:
+            self.root.after_cancel(self.watch_restart_id)
+
+        def reiniciar():
+            self.watch_restart_id = None
+            if self.var_watch.get():
+                self._start_watch()
+
+        self.watch_restart_id = self.root.after(500, reiniciar)
+
+    def _on_watch_change(self, alterados):
+        """Roda na thread do observador: reconverte só os arquivos salvos."""
+        if self.watcher is None:
+            return
+        with self.watch_lock:
+            if not self.saida_lock.acquire(blocking=False):
+                # Execução da fila em andamento: reconverte quando ela terminar
+                self.watch_pendentes.update(alterados)
+                return
+        try:
+            self._reconverter_watch(alterados)
+        finally:
+            self.saida_lock.release()
+
+    def _reconverter_watch(self, alterados):
+        watcher = self.watcher
+        if watcher is None:
+            return
+        raizes = {a: watcher.raiz_de(a) for a in alterados if watcher.raiz_de(a)}
+        # A fila é do Tk: quem já está nela é conferido lá (_enqueue ignora os repetidos)
+        self._ui_update(lambda raizes=raizes: self._enqueue_watch(raizes))
+
+        from Pipeline.batchProcessor import processar_lote
+        from Pipeline.buildCache import ManifestoBuild
+        from Pipeline.outputWriter import GravadorSaida
+
+        def on_result(resultado):
+            nome = os.path.basename(resultado['arquivo'])
+            if resultado['ok'] and not resultado['pulado']:
+                self._ui_update(lambda: self._log(f"[OK] (watch) {nome} → {resultado['saida']}", "OK"))
+            elif not resultado['ok']:
+                self._ui_update(lambda: self._log(f"[ERRO] (watch) Falha ao processar {nome}: {resultado['erro']}", "ERRO"))
+
+        try:
+            # Manifesto relido a cada rajada: a fila pode tê-lo atualizado nesse meio-tempo
+            imagens = self._otimizador_imagens()
+            links = self._indice_links()
+            busca = self._indice_busca()
+            saidas = GravadorSaida()
+            manifesto = None
+            if BUILD_CACHE:
+                manifesto = ManifestoBuild(self.state['output_folder'], imagens=imagens, links=links is not None)
+            processar_lote(
+                alterados,
+                self.state['output_folder'],
+                self.state['current_version'],
+                IMG_PADRAO_EORBIS,
+                IMG_PADRAO_METAPRIME,
+                modo="threads",
+                on_result=on_result,
+                manifesto=manifesto,
+                raizes=raizes,
+                imagens=imagens,
+                links=links,
+                busca=busca,
+                saidas=saidas
+            )
+            if links:
+                self._ui_update(lambda: self._log_links_quebrados(links, "(watch) "))
+            self._ui_update(lambda: self._log_saidas(saidas, "(watch) "))
+            self._busca_atualizada(busca)
+        except Exception as e:
+            self._ui_update(lambda erro=e: self._log(f"[ERRO] Falha no modo watch: {erro}", "ERRO"))
+
+    # --- Versão do E-Orbis ---
+    def _refresh_version(self):
+        """Consulta o servidor em segundo plano se a versão atual não for fixa nem cache válido."""
+        if self.state['version_source'] in ("fixa", "cache"):
+            return
+
+        def tarefa():
+            versao = consultar_versao(VERSAO_URL, VERSAO_LOG)
+            if versao:
+                self._ui_update(lambda: self._set_version(versao, "servidor"))
+            else:
+                self._ui_update(lambda: self._log(
+                    f"[WARN] Servidor do E-Orbis indisponível; usando a versão {self.state['current_version']}.", "WARN"))
+
+        threading.Thread(target=tarefa, daemon=True).start()
+
+    def _set_version(self, versao, origem):
+        # Uma versão fixada pelo usuário nunca é sobrescrita pela consulta
+        if self.state['version_source'] == "fixa" and origem != "fixa":
+            return
+        self.state['current_version'] = versao
+        self.state['version_source'] = origem
+        self._update_version_label()
+
+    def _update_version_label(self):
+        sufixo = {
+            "fixa": " (fixa)",
+            "cache_expirado": " (atualizando…)",
+            "fallback": " (desconhecida)",
+        }.get(self.state['version_source'], "")
+        self.version_label.config(text=f"Versão: {self.state['current_version']}{sufixo}")
+
+    def pin_version(self):
+        versao = simpledialog.askstring("Fixar Versão", "Versão do E-Orbis a carimbar nas páginas:",
+                                        initialvalue=self.state['current_version'], parent=self.root)
+        if versao and versao.strip():
+            self._set_version(versao.strip(), "fixa")
+            self._log(f"[INFO] Versão fixada: {versao.strip()}", "INFO")
+
     # --- Métodos de Utilidade ---
     def _log(self, message, tag="INFO"):
-        self.logs.insert(tk.END, message + "\n", tag)
+        # Seguro em qualquer thread: a linha entra no widget no próximo tick da UI
+        self.log_queue.put((message, tag))
+
+    def _flush_logs(self):
+        """Escreve as mensagens pendentes de uma vez e descarta as linhas além de LOG_MAX_LINHAS."""
+        registros = []
+        try:
+            while len(registros) < LOG_LOTE_UI:
+                registros.append(self.log_queue.get_nowait())
+        except queue.Empty:
+            pass
+        if not registros:
+            return
+
+        # Um único insert com pares (texto, tag), agrupando mensagens seguidas da mesma tag
+        partes = []
+        for message, tag in registros:
+            if partes and partes[-1] == tag:
+                partes[-2] += message + "\n"
+            else:
+                partes.extend((message + "\n", tag))
+        self.logs.insert(tk.END, *partes)
+
+        linhas = int(self.logs.index("end-1c").split(".")[0]) - 1
+        if linhas > LOG_MAX_LINHAS:
+            self.logs.delete("1.0", f"{linhas - LOG_MAX_LINHAS + 1}.0")
         self.logs.see(tk.END)
-        
+
+
     def _ui_update(self, func):
         self.ui_queue.put(func)
 
@@ -475,6 +1198,7 @@ class App:
                 fn()
         except queue.Empty:
             pass
+        self._flush_logs()
         self.root.after(50, self._process_ui_queue)
         
     def _set_progress(self, current, total):
@@ -484,33 +1208,52 @@ class App:
         self.progress_label.config(text=f"{percentage}%")
 
     def _init_drag_and_drop(self):
-        if DND_AVAILABLE:
-            self.queue_list.drop_target_register(DND_FILES)
-            self.queue_list.dnd_bind('<<Drop>>', self._on_drop_files)
+        # Só numa janela criada por TkinterDnD.Tk() (ver _criar_janela)
+        if not getattr(self.root, "TkdndVersion", None):
+            return
+        from tkinterdnd2 import DND_FILES
+        self.queue_list.drop_target_register(DND_FILES)
+        self.queue_list.dnd_bind('<<Drop>>', self._on_drop_files)
 
     def _on_drop_files(self, event):
         paths = self._parse_dnd_paths(event.data)
-        added_count = 0
         for path in paths:
-            if path.lower().endswith(".md") and path not in self.state['file_queue']:
-                self.state['file_queue'].append(path)
-                self.queue_list.insert(tk.END, path)
-                added_count += 1
+            if os.path.isdir(path):
+                self._scan_folder(path)
+        added_count = self._enqueue(p for p in paths if p.lower().endswith(".md"))
         self._log(f"[INFO] {added_count} arquivo(s) arrastados para a fila.", "INFO")
 
     def _parse_dnd_paths(self, data):
         return data.strip().split()
 
 # --- Inicialização ---
-def main():
+def _criar_janela():
+    """TkinterDnD.Tk() com o tkinterdnd2 instalado (Drag & Drop na fila); senão, tk.Tk()."""
     if DND_AVAILABLE:
-        root = TkinterDnD.Tk()
-    else:
-        root = tk.Tk()
-    
-    app = App(root) 
-    
+        try:
+            from tkinterdnd2 import TkinterDnD
+            return TkinterDnD.Tk()
+        except (ImportError, RuntimeError, tk.TclError) as e:
+            print(f"[WARN] Drag & Drop indisponível: {e}")
+    return tk.Tk()
+
+
+def main():
+    # Necessário para o pool de processos em executáveis congelados (PyInstaller/Windows)
+    multiprocessing.freeze_support()
+
+    root = _criar_janela()
+
+    app = App(root)
+
     root.mainloop()
 
+    # Não espera downloads de thumbnails nem previews pendentes para fechar o programa
+    if app._thumb_loader:
+        app._thumb_loader.encerrar()
+    app.preview_executor.shutdown(wait=False, cancel_futures=True)
+    if app.watcher:
+        app.watcher.parar()
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
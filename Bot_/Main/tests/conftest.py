@@ -0,0 +1,7 @@
+# Main/tests/conftest.py
+
+import os
+import sys
+
+# Os módulos do projeto são importados a partir de Bot_/Main (como em main.py e cli.py)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
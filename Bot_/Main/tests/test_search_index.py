@@ -0,0 +1,75 @@
+# Main/tests/test_search_index.py
+#
+# Docs estáveis do índice de busca (Pipeline/searchIndex.py): incluir ou
+# remover uma página não pode renumerar as seções das outras, senão cada
+# build regrava todos os arquivos busca/<ab>.js.
+
+import os
+
+from Pipeline.searchIndex import IndiceBusca, extrair_secoes
+from Pipeline.outputWriter import GravadorSaida
+from config import BUSCA_PASTA
+
+
+def _pagina(pasta, saida, nome, html_content):
+    origem = os.path.join(pasta, nome + ".md")
+    destino = os.path.join(saida, nome + ".html")
+    for path in (origem, destino):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(html_content)
+    return {"arquivo": origem, "saida": destino, "ok": True, "busca": extrair_secoes(html_content)}
+
+
+def _gerar(saida, resultados=()):
+    busca = IndiceBusca(saida)
+    for resultado in resultados:
+        busca.registrar(resultado)
+    saidas = GravadorSaida()
+    busca.gerar(saidas)
+    return busca, saidas
+
+
+def _shard(saida, prefixo):
+    with open(os.path.join(saida, BUSCA_PASTA, prefixo + ".js"), "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def test_remover_pagina_nao_renumera_as_outras(tmp_path):
+    pasta, saida = str(tmp_path / "vault"), str(tmp_path / "saida")
+    os.makedirs(pasta)
+    os.makedirs(saida)
+    resultados = [_pagina(pasta, saida, "a", '<h1 id="a">Alfa</h1><p>cadastro</p><h2 id="b">Beta</h2><p>pedido</p>'),
+                  _pagina(pasta, saida, "b", '<h1 id="c">Gama</h1><p>estoque</p>'),
+                  _pagina(pasta, saida, "c", '<h1 id="d">Delta</h1><p>fiscal</p>')]
+    busca, _ = _gerar(saida, resultados)
+    docs = dict(busca.docs)
+    shards = {p: _shard(saida, p) for p in ("ca", "pe", "es", "fi")}
+
+    os.remove(resultados[1]["arquivo"])
+    os.remove(resultados[1]["saida"])
+    busca, saidas = _gerar(saida)
+
+    assert busca.docs == {secao: doc for secao, doc in docs.items() if not secao.startswith("b.html")}
+    assert not os.path.exists(os.path.join(saida, BUSCA_PASTA, "es.js"))
+    for prefixo in ("ca", "pe", "fi"):
+        assert _shard(saida, prefixo) == shards[prefixo]
+    assert saidas.resumo()["removidos"] == 2  # es.js e ga.js
+
+
+def test_secoes_novas_ganham_docs_novos(tmp_path):
+    pasta, saida = str(tmp_path / "vault"), str(tmp_path / "saida")
+    os.makedirs(pasta)
+    os.makedirs(saida)
+    busca, _ = _gerar(saida, [_pagina(pasta, saida, "a", '<h1 id="a">Alfa</h1><h2>Passo</h2><h2>Passo</h2>')])
+    assert sorted(busca.docs.values()) == [0, 1, 2]
+
+    # Uma seção no meio da página: as que já existiam mantêm o doc
+    busca, _ = _gerar(saida, [_pagina(pasta, saida, "a", '<h1 id="a">Alfa</h1><h2 id="x">Novo</h2>'
+                                                           '<h2>Passo</h2><h2>Passo</h2>')])
+    assert sorted(busca.docs.values()) == [0, 1, 2, 3]
+    assert busca.docs["a.html\tx\tNovo"] == 3
+
+    # Docs de seções removidas não voltam a ser usados
+    busca, _ = _gerar(saida, [_pagina(pasta, saida, "a", '<h1 id="a">Alfa</h1><h2 id="y">Outro</h2>')])
+    assert busca.docs["a.html\ty\tOutro"] == 4
+    assert IndiceBusca(saida).proximo == 5
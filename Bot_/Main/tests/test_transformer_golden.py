@@ -0,0 +1,185 @@
+# Main/tests/test_transformer_golden.py
+#
+# Testes golden do transformer (Transformer/transformerFile.py).
+#
+# tests/golden/ tem as entradas do transformer: a saída do markdown2 para
+# cada <nome>.md (gravada em <nome>.html) e alguns .html escritos à mão com
+# o que faz o caminho rápido desistir (entidades, tags desbalanceadas,
+# <script>/<style>, <html>/<body> já presentes). <nome>.esperado.html é a
+# saída de referência do caminho DOM com o "html.parser".
+#
+# - caminho rápido (streamTransformer), caminho DOM e transformar_html com o
+#   "html.parser" precisam dar a saída de referência byte a byte;
+# - lxml e selectolax precisam dar a mesma árvore, depois de normalizada.
+#   Com tags desbalanceadas cada parser conserta a árvore do seu jeito (o
+#   html.parser aninha o que ficou aberto, lxml e Lexbor seguem as regras do
+#   HTML5), então ali a comparação é da sequência de textos e elementos
+#   estilizados, sem o aninhamento.
+#
+# Depois de uma mudança intencional na saída, regenere os arquivos com
+#   python tests/test_transformer_golden.py
+# e revise o diff de tests/golden/ antes do commit.
+
+import os
+import re
+import sys
+import glob
+
+import pytest
+from bs4 import BeautifulSoup, Comment, Doctype
+
+if __name__ == "__main__":
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Transformer.markdownConverter import markdown_para_html
+from Transformer.transformerFile import transformar_html, _transformar_html_dom
+from Transformer.streamTransformer import transformar_html_stream
+from Transformer.parserBackend import backend_disponivel
+
+PASTA = os.path.join(os.path.dirname(os.path.abspath(__file__)), "golden")
+VERSAO = "3.19.2515 <beta> & cia"
+IMG_EORBIS = "img/logo eorbis.png?v=1&t=2"
+IMG_METAPRIME = "img/logo_metaprime.png"
+
+_DATA = re.compile(r"(Última atualização: )\d{2}/\d{2}/\d{4}")
+_ESPACOS = re.compile(r"\s+")
+
+# Entradas que o caminho rápido não trata (vão para o caminho DOM)
+PRECISAM_DOM = {"desbalanceado", "entidade_desconhecida", "script", "html_body"}
+# Entradas que cada parser conserta com outra árvore (ver sequencia)
+REPARO_DIVERGENTE = {"desbalanceado"}
+# Diferenças conhecidas entre os backends
+DIVERGENCIAS = {
+    "entidade_desconhecida": "o html.parser do BeautifulSoup descarta o ';' de entidades "
+                             "desconhecidas (&unknown; vira &unknown); lxml e Lexbor mantêm",
+}
+
+
+def _ler(nome):
+    with open(os.path.join(PASTA, nome), "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def _sem_data(html_content):
+    """A data do cabeçalho muda todo dia; a saída de referência guarda DD/MM/AAAA."""
+    return _DATA.sub(r"\1DD/MM/AAAA", html_content)
+
+
+def _markdown(nome):
+    """Como a fila converte o .md antes do transformer."""
+    return markdown_para_html(_ler(f"{nome}.md"))
+
+
+def casos():
+    return sorted(os.path.basename(p)[:-5] for p in glob.glob(os.path.join(PASTA, "*.html"))
+                  if not p.endswith(".esperado.html"))
+
+
+def casos_markdown():
+    return sorted(os.path.basename(p)[:-3] for p in glob.glob(os.path.join(PASTA, "*.md")))
+
+
+def arvore(html_content):
+    """
+    Árvore normalizada para comparar backends: tags, atributos (valores com
+    espaços colapsados) e textos não vazios com espaços colapsados, sem
+    comentários nem doctype. <meta .../> e <meta ...> dão a mesma árvore, e
+    o charset não diferencia maiúsculas (o BeautifulSoup grava "utf-8").
+    """
+    def no(el):
+        if isinstance(el, (Comment, Doctype)):
+            return None
+        if el.name is None:
+            texto = _ESPACOS.sub(" ", str(el)).strip()
+            return texto or None
+        attrs = tuple(sorted((k, _ESPACOS.sub(" ", " ".join(v) if isinstance(v, list) else v).strip())
+                             for k, v in el.attrs.items()))
+        attrs = tuple((k, v.lower() if k == "charset" else v) for k, v in attrs)
+        return (el.name, attrs, tuple(filhos(el)))
+
+    def filhos(el):
+        for filho in el.children:
+            n = no(filho)
+            if n is not None:
+                yield n
+
+    return tuple(filhos(BeautifulSoup(html_content, "html.parser")))
+
+
+def sequencia(html_content):
+    """
+    Textos e elementos com atributos ou vazios (<hr>, <img>...) na ordem do
+    documento, sem o aninhamento nem as tags sem atributos que o parser
+    recria ao consertar o HTML (<strong>, <em>, <p>...).
+    """
+    def percorrer(itens):
+        for item in itens:
+            if isinstance(item, str):
+                yield item
+                continue
+            nome, attrs, filhos = item
+            if attrs or not filhos:
+                yield (nome, attrs)
+            yield from percorrer(filhos)
+    return list(percorrer(arvore(html_content)))
+
+
+def _transformar(entrada, backend):
+    return _sem_data(transformar_html(entrada, VERSAO, IMG_EORBIS, IMG_METAPRIME, backend=backend))
+
+
+@pytest.mark.parametrize("nome", casos_markdown())
+def test_markdown2_igual_ao_golden(nome):
+    assert _markdown(nome) == _ler(f"{nome}.html")
+
+
+@pytest.mark.parametrize("nome", casos())
+def test_dom_igual_ao_golden(nome):
+    saida = _transformar_html_dom(_ler(f"{nome}.html"), VERSAO, IMG_EORBIS, IMG_METAPRIME, "html.parser")
+    assert _sem_data(saida) == _ler(f"{nome}.esperado.html")
+
+
+@pytest.mark.parametrize("nome", casos())
+def test_stream_igual_ao_golden(nome):
+    saida = transformar_html_stream(_ler(f"{nome}.html"), VERSAO, IMG_EORBIS, IMG_METAPRIME)
+    if nome in PRECISAM_DOM:
+        assert saida is None
+    else:
+        assert saida is not None
+        assert _sem_data(saida) == _ler(f"{nome}.esperado.html")
+
+
+@pytest.mark.parametrize("nome", casos())
+def test_transformar_html_igual_ao_golden(nome):
+    assert _transformar(_ler(f"{nome}.html"), "html.parser") == _ler(f"{nome}.esperado.html")
+
+
+@pytest.mark.parametrize("backend", ["lxml", "selectolax"])
+@pytest.mark.parametrize("nome", casos())
+def test_backend_equivalente_ao_golden(nome, backend, request):
+    if not backend_disponivel(backend):
+        pytest.skip(f"{backend} não instalado")
+    if nome in DIVERGENCIAS:
+        request.applymarker(pytest.mark.xfail(reason=DIVERGENCIAS[nome], strict=True))
+    saida = _transformar(_ler(f"{nome}.html"), backend)
+    esperado = _ler(f"{nome}.esperado.html")
+    if nome in REPARO_DIVERGENTE:
+        assert sequencia(saida) == sequencia(esperado)
+    else:
+        assert arvore(saida) == arvore(esperado)
+
+
+def atualizar_golden():
+    """Regrava as saídas do markdown2 e as saídas de referência de tests/golden/."""
+    for nome in casos_markdown():
+        with open(os.path.join(PASTA, f"{nome}.html"), "w", encoding="utf-8", newline="") as f:
+            f.write(_markdown(nome))
+    for nome in casos():
+        saida = _transformar_html_dom(_ler(f"{nome}.html"), VERSAO, IMG_EORBIS, IMG_METAPRIME, "html.parser")
+        with open(os.path.join(PASTA, f"{nome}.esperado.html"), "w", encoding="utf-8", newline="") as f:
+            f.write(_sem_data(saida))
+        print(f"[OK] {nome}")
+
+
+if __name__ == "__main__":
+    atualizar_golden()